@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import PlainTextResponse
-from ics import Calendar, Event
 from datetime import datetime, time, timedelta
 from uuid import UUID
 from typing import Dict, Any
@@ -43,7 +42,8 @@ async def generate_task_calendar_event(
                 detail="Task has no due date"
             )
 
-        # Create calendar and event
+        # Create calendar and event (ics is imported on first use, it slows down startup)
+        from ics import Calendar, Event
         cal = Calendar()
         event = Event()
 
@@ -1,77 +1,363 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from uuid import UUID
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import uuid
+import json
+import math
+from fastapi.encoders import jsonable_encoder
 
-from app.models.note_schemas import ProcessNoteRequest, NoteResponse
+from app.core.config import settings
+from app.core.metrics import span
+from app.models.note_schemas import (
+    ProcessNoteRequest,
+    NoteResponse,
+    ProcessNoteJobAccepted,
+    ProcessingJobResponse,
+    BatchProcessNotesRequest,
+    MAX_IMPORT_NOTES
+)
 from app.models.task_schemas import SaveTasksRequest, TaskResponseSchema
 from app.auth.security import get_current_user
-from app.services.ai_processing_service import generate_summary_and_extract_tasks
-from app.db.supabase_ops import create_meeting_note, create_tasks_batch, get_meeting_note_by_id
+from app.services.ai_processing_service import generate_summary_and_extract_tasks, stream_summary_and_extract_tasks
+from app.services.idempotency import idempotent_response
+from app.services.llm_resilience import LLMUnavailableError
+from app.services.llm_scheduler import SchedulerFullError
+from app.services.note_jobs import note_jobs, QueueFullError, TERMINAL_JOB_STATUSES
+from app.services.note_import import import_notes, read_ndjson_notes
+from app.services.token_usage import TokenQuotaExceededError, token_usage
+from app.db.supabase_ops import (
+    create_meeting_note,
+    create_tasks_batch,
+    get_meeting_note_by_id,
+    create_processing_job,
+    get_processing_job,
+    update_processing_job
+)
 
 router = APIRouter()
 
+def quota_exceeded(e: TokenQuotaExceededError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+    )
+
+note_response_adapter = TypeAdapter(NoteResponse)
+task_response_list_adapter = TypeAdapter(List[TaskResponseSchema])
+
 @router.post("/process", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 async def process_notes(
     request: ProcessNoteRequest,
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    http_request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
     Process meeting notes to generate a summary and extract tasks.
+    With an Idempotency-Key header, retries of the request replay the first response
+    instead of processing and saving the notes again.
     """
+    # Get user_id from authenticated user
+    user_id = UUID(current_user["user_id"])
+    
+    async def execute() -> bytes:
+        try:
+            # Process notes with AI to generate summary and extract tasks
+            summary, extracted_tasks = await generate_summary_and_extract_tasks(request.text, str(user_id), timezone=request.timezone)
+            
+            # Save the meeting note to database
+            with span("db.insert_note"):
+                note_record = await create_meeting_note(user_id, request.text, summary)
+            
+            # Return the result
+            return note_response_adapter.dump_json(note_response_adapter.validate_python({
+                "note_id": note_record["id"],
+                "original_text": request.text,
+                "summary": summary,
+                "extracted_tasks": extracted_tasks,
+                "created_at": note_record.get("created_at")
+            }))
+        except LLMUnavailableError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            )
+        except SchedulerFullError as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": str(settings.NOTE_JOB_RETRY_AFTER_SECONDS)}
+            )
+        except TokenQuotaExceededError as e:
+            raise quota_exceeded(e)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error processing notes: {str(e)}"
+            )
+    
+    return await idempotent_response(
+        http_request, str(user_id), idempotency_key, request, execute, status.HTTP_201_CREATED
+    )
+
+def format_sse(event: str, data: Any) -> str:
+    """Format a server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@router.post("/process-stream")
+async def process_notes_stream(
+    request: ProcessNoteRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Process meeting notes and stream the results as server-sent events:
+    "summary" events carry summary tokens, "task" events carry each extracted task as
+    soon as it is parsed, and a final "done" event carries the persisted note_id.
+    """
+    user_id = UUID(current_user["user_id"])
+    # Over-quota requests get a 429 rather than an error event
+    try:
+        await token_usage.check_quota(str(user_id))
+    except TokenQuotaExceededError as e:
+        raise quota_exceeded(e)
+    
+    async def event_stream():
+        try:
+            summary, extracted_tasks = "", []
+            async for event, data in stream_summary_and_extract_tasks(request.text, str(user_id), request.timezone):
+                if event == "summary_token":
+                    yield format_sse("summary", {"token": data})
+                elif event == "task":
+                    yield format_sse("task", data)
+                elif event == "result":
+                    summary, extracted_tasks = data
+            
+            note_record = await create_meeting_note(user_id, request.text, summary)
+            yield format_sse("done", {
+                "note_id": note_record["id"],
+                "summary": summary,
+                "extracted_tasks": extracted_tasks,
+                "created_at": note_record.get("created_at")
+            })
+        except Exception as e:
+            print(f"Error in process_notes_stream: {e}")
+            yield format_sse("error", {"detail": f"Error processing notes: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def ndjson_import_response(user_id: UUID, notes) -> StreamingResponse:
+    """Stream import_notes results as newline-delimited JSON"""
+    async def result_stream():
+        async for result in import_notes(user_id, notes):
+            yield json.dumps(jsonable_encoder(result)) + "\n"
+    
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/batch")
+async def process_notes_batch(
+    request: BatchProcessNotesRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Process and save many meeting notes, with their extracted tasks.
+    Results stream back as newline-delimited JSON, one line per note in completion
+    order ("index" is the note's position in the request), then a "done" line.
+    """
+    user_id = UUID(current_user["user_id"])
+    
+    async def notes():
+        for note in request.notes:
+            yield note
+    
+    return ndjson_import_response(user_id, notes())
+
+@router.post("/batch/upload")
+async def process_notes_upload(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Import meeting notes from an NDJSON request body, one {"text": ..., "timezone": ...} object per line.
+    Results stream back like /batch; an invalid line ends the import with an "error" line.
+    """
+    user_id = UUID(current_user["user_id"])
+    
+    # The body is read up front: the response streams while the import runs, and
+    # Starlette does not support reading the request body from a streaming response
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.NOTE_IMPORT_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload is larger than {settings.NOTE_IMPORT_MAX_BYTES} bytes"
+            )
+    return ndjson_import_response(user_id, read_ndjson_notes(bytes(body), MAX_IMPORT_NOTES))
+
+def format_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a processing_jobs row to the ProcessingJobResponse shape"""
+    return {
+        "job_id": job["id"],
+        "note_id": job["note_id"],
+        "status": job["status"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "updated_at": job.get("updated_at")
+    }
+
+@router.post("/process-async", response_model=ProcessNoteJobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def process_notes_async(
+    request: ProcessNoteRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Persist meeting notes immediately and process them in the background.
+    Poll /jobs/{job_id} or stream /jobs/{job_id}/events for the result.
+    """
+    queue_full = HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many notes are being processed, please retry shortly",
+        headers={"Retry-After": str(settings.NOTE_JOB_RETRY_AFTER_SECONDS)}
+    )
     try:
-        # Get user_id from authenticated user
         user_id = UUID(current_user["user_id"])
         
-        # Process notes with AI to generate summary and extract tasks
-        summary, extracted_tasks = await generate_summary_and_extract_tasks(request.text)
+        # Reject before writing anything when the queue is already full or the user is over quota
+        await note_jobs.check_capacity()
+        await token_usage.check_quota(str(user_id))
         
-        # Save the meeting note to database
-        note_record = await create_meeting_note(user_id, request.text, summary)
+        # Save the note now; the summary is filled in once processing finishes
+        note_record = await create_meeting_note(user_id, request.text, "")
+        job = await create_processing_job(user_id, UUID(note_record["id"]), request.timezone)
         
-        # Return the result
-        return {
-            "note_id": note_record["id"],
-            "original_text": request.text,
-            "summary": summary,
-            "extracted_tasks": extracted_tasks,
-            "created_at": note_record.get("created_at")
-        }
+        try:
+            note_jobs.enqueue(job["id"])
+        except QueueFullError:
+            await update_processing_job(UUID(job["id"]), "failed", error="Processing queue was full")
+            raise
+        
+        return {"job_id": job["id"], "note_id": note_record["id"], "status": job["status"]}
+    except QueueFullError:
+        raise queue_full
+    except TokenQuotaExceededError as e:
+        raise quota_exceeded(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing notes: {str(e)}"
+            detail=f"Error queueing notes for processing: {str(e)}"
         )
 
-@router.post("/{note_id}/tasks", response_model=List[TaskResponseSchema])
-async def save_note_tasks(
-    note_id: UUID,
-    request: SaveTasksRequest,
+@router.get("/jobs/{job_id}", response_model=ProcessingJobResponse)
+async def get_processing_job_status(
+    job_id: UUID,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    Save tasks extracted from a specific note.
+    Get the status, and the result once completed, of a background processing job.
     """
     try:
-        # Get user_id from authenticated user
         user_id = UUID(current_user["user_id"])
-        
-        # Optional: Verify the user owns the note_id
-        note = await get_meeting_note_by_id(note_id, user_id)
-        if not note:
+        job = await get_processing_job(job_id, user_id)
+        if not job:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Note with ID {note_id} not found or does not belong to current user"
+                detail="Job not found"
             )
-        
-        # Save tasks to database
-        created_tasks = await create_tasks_batch(user_id, note_id, [task.dict() for task in request.tasks])
-        
-        return created_tasks
+        return format_job(job)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error saving tasks: {str(e)}"
-        )
\ No newline at end of file
+            detail=f"Error retrieving job: {str(e)}"
+        )
+
+@router.get("/jobs/{job_id}/events")
+async def stream_processing_job_status(
+    job_id: UUID,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Stream status changes of a background processing job as server-sent events.
+    The stream ends after the completed or failed event.
+    """
+    user_id = UUID(current_user["user_id"])
+    job = await get_processing_job(job_id, user_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    async def event_stream():
+        current = job
+        last_status = None
+        while True:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                payload = ProcessingJobResponse(**format_job(current)).model_dump_json()
+                yield f"event: status\ndata: {payload}\n\n"
+            if last_status in TERMINAL_JOB_STATUSES:
+                break
+            await note_jobs.wait_for_update(str(job_id), settings.NOTE_JOB_POLL_SECONDS)
+            yield ": keep-alive\n\n"
+            current = await get_processing_job(job_id, user_id) or current
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/{note_id}/tasks", response_model=List[TaskResponseSchema])
+async def save_note_tasks(
+    note_id: UUID,
+    request: SaveTasksRequest,
+    http_request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Save tasks extracted from a specific note.
+    With an Idempotency-Key header, retries replay the first response instead of
+    saving the tasks again.
+    """
+    # Get user_id from authenticated user
+    user_id = UUID(current_user["user_id"])
+    
+    async def execute() -> bytes:
+        try:
+            # Optional: Verify the user owns the note_id
+            note = await get_meeting_note_by_id(note_id, user_id)
+            if not note:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Note with ID {note_id} not found or does not belong to current user"
+                )
+            
+            # Save tasks to database
+            created_tasks = await create_tasks_batch(user_id, note_id, [task.dict() for task in request.tasks])
+            
+            return task_response_list_adapter.dump_json(task_response_list_adapter.validate_python(created_tasks))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error saving tasks: {str(e)}"
+            )
+    
+    return await idempotent_response(http_request, str(user_id), idempotency_key, request, execute)
\ No newline at end of file
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from uuid import UUID
+from typing import Dict, Any, Optional
+
+from app.auth.security import get_current_user
+from app.core.config import settings
+from app.core.fast_json import dumps, project_rows
+from app.models.sync_schemas import SyncNoteSchema, SyncResponse
+from app.models.task_schemas import TaskResponseSchema
+from app.services.delta_sync import SyncCursorExpiredError, decode_sync_cursor, get_sync_changes
+from app.services.response_cache import cached_response
+
+router = APIRouter()
+
+@router.get("/sync", response_model=SyncResponse)
+async def sync_changes(
+    request: Request,
+    since: Optional[str] = Query(None, description="Cursor from the previous sync; omit for a full snapshot"),
+    limit: int = Query(settings.SYNC_MAX_CHANGES, ge=1, le=settings.SYNC_MAX_CHANGES, description="Maximum changes per kind, unless more share one timestamp"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Get the tasks and notes created, updated or deleted since the cursor.
+    Apply upserts before deletions, store the returned cursor, and sync again
+    immediately while has_more is true. A 410 means the cursor expired and the
+    client should discard its copy and sync without since.
+    """
+    try:
+        after = decode_sync_cursor(since)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        user_id = UUID(current_user["user_id"])
+
+        async def build():
+            changes = await get_sync_changes(user_id, after, limit)
+            if settings.FAST_JSON_ENABLED:
+                return dumps({
+                    **changes,
+                    "tasks": project_rows(changes["tasks"], TaskResponseSchema),
+                    "notes": project_rows(changes["notes"], SyncNoteSchema)
+                }), {}
+            return SyncResponse.model_validate(changes).model_dump_json().encode(), {}
+
+        return await cached_response(request, str(user_id), build)
+    except SyncCursorExpiredError as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error syncing changes: {str(e)}"
+        )
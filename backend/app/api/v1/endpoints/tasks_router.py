@@ -1,36 +1,85 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
 from uuid import UUID
-from typing import Dict, Any, List
+from datetime import date, datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from typing import Dict, Any, List, Optional
 
 from app.models.task_schemas import (
     TaskResponseSchema, 
     UpdateTaskStatusRequest,
-    UpdateTaskImportanceRequest
+    UpdateTaskImportanceRequest,
+    BulkTaskRequest,
+    BulkTaskResponse
 )
+from app.core.compression import json_response
+from app.core.config import settings
+from app.core.fast_json import serialize_rows
 from app.auth.security import get_current_user
+from app.services.digest_store import digest_store
+from app.services.response_cache import cached_response
+from app.services.change_feed import ChangeFeedFullError, change_feed
+from app.db.pagination import MAX_PAGE_SIZE, decode_cursor, next_cursor
 from app.db.supabase_ops import (
     get_tasks_for_user, 
     update_task_status_by_id, 
     get_tasks_by_note_id, 
     get_notes_with_tasks,
     update_task_importance_by_id,
-    get_daily_digest_tasks,
-    delete_task_by_id
+    delete_task_by_id,
+    bulk_mutate_tasks
 )
 
 router = APIRouter()
 
+class TaskListParams:
+    """Pagination and filter query parameters shared by the task list endpoints"""
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit to return all tasks"),
+        cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+        status: Optional[str] = Query(None, description="Only tasks with this status"),
+        is_important: Optional[bool] = Query(None, description="Only important (true) or unimportant (false) tasks"),
+        due_from: Optional[date] = Query(None, description="Only tasks due on or after this date"),
+        due_to: Optional[date] = Query(None, description="Only tasks due on or before this date"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.filters = {"status": status, "is_important": is_important, "due_from": due_from, "due_to": due_to}
+
+def parse_cursor(cursor: Optional[str]):
+    """Decode a pagination cursor, rejecting malformed ones with 400"""
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def next_cursor_headers(rows: List[Dict[str, Any]], limit: Optional[int]) -> Dict[str, str]:
+    """Expose the cursor of the next page, if there is one, in the X-Next-Cursor header"""
+    cursor = next_cursor(rows, limit)
+    return {"X-Next-Cursor": cursor} if cursor else {}
+
 @router.get("", response_model=List[TaskResponseSchema])
 async def get_user_tasks(
+    request: Request,
+    params: TaskListParams = Depends(),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    Get all tasks for the authenticated user.
+    Get tasks for the authenticated user, newest first.
+    With a limit, the cursor of the next page is returned in the X-Next-Cursor header.
+    Responses carry an ETag and are served from the per-user response cache.
     """
+    after = parse_cursor(params.cursor)
     try:
         user_id = UUID(current_user["user_id"])
-        tasks = await get_tasks_for_user(user_id)
-        return tasks
+        
+        async def build():
+            tasks = await get_tasks_for_user(user_id, params.limit, after, **params.filters)
+            body = serialize_rows(tasks, TaskResponseSchema)
+            return body, next_cursor_headers(tasks, params.limit)
+        
+        return await cached_response(request, str(user_id), build)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -83,35 +132,132 @@ async def update_task_importance(
             detail=f"Error updating task importance: {str(e)}"
         )
 
+@router.post("/bulk", response_model=BulkTaskResponse)
+async def bulk_update_tasks(
+    request: BulkTaskRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Update the status or importance of, or delete, many tasks in one request.
+    Updates are applied before deletes; each operation gets its own result, with
+    ok false when the task does not exist.
+    """
+    try:
+        user_id = UUID(current_user["user_id"])
+        operations = [operation.model_dump(mode="json", exclude_none=True) for operation in request.operations]
+        changed = {
+            (op_name, str(task["id"])): task
+            for op_name, task in await bulk_mutate_tasks(user_id, operations)
+        }
+        
+        results = []
+        for operation in request.operations:
+            task = changed.get((operation.op, str(operation.task_id)))
+            results.append({
+                "op": operation.op,
+                "task_id": operation.task_id,
+                "ok": task is not None,
+                "task": task,
+                "error": None if task is not None else "Task not found"
+            })
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating tasks: {str(e)}"
+        )
+
+def user_today(tz: Optional[str]) -> date:
+    """Today's date in the user's IANA time zone (or the default time zone)"""
+    try:
+        return datetime.now(ZoneInfo(tz)).date()
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown time zone: {tz}"
+        )
+
 @router.get("/daily-digest", response_model=List[TaskResponseSchema])
 async def get_daily_digest(
+    request: Request,
+    limit: int = Query(settings.DAILY_DIGEST_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Number of tasks in the digest"),
+    tz: Optional[str] = Query(None, description="IANA time zone used to determine today, e.g. Europe/Berlin"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Get the daily smart digest of tasks for the authenticated user.
     """
+    tz = tz or settings.DEFAULT_TIMEZONE
+    today = user_today(tz)
     try:
         user_id = UUID(current_user["user_id"])
-        digest_tasks = await get_daily_digest_tasks(user_id)
-        return digest_tasks
+        digest_tasks = await digest_store.get_digest(user_id, tz, today, limit)
+        return await json_response(request, serialize_rows(digest_tasks, TaskResponseSchema))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving daily digest: {str(e)}"
         )
 
+@router.get("/events")
+async def stream_task_changes(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Stream the authenticated user's task changes as server-sent events.
+    "created", "updated" and "deleted" events carry the affected tasks. A connection
+    that falls too far behind receives an "evicted" event and is closed; reconnect
+    and catch up with /api/v1/sync.
+    """
+    try:
+        subscription = change_feed.subscribe(current_user["user_id"])
+    except ChangeFeedFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(int(settings.CHANGE_FEED_HEARTBEAT_SECONDS))}
+        )
+    
+    async def event_stream():
+        try:
+            yield ": connected\n\n"
+            while not subscription.closed:
+                frames = await subscription.next_frames(settings.CHANGE_FEED_HEARTBEAT_SECONDS)
+                if subscription.evicted:
+                    yield 'event: evicted\ndata: {"detail": "Too many undelivered changes"}\n\n'
+                    break
+                yield "".join(frames) if frames else ": keep-alive\n\n"
+        finally:
+            change_feed.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/by-note/{note_id}", response_model=List[TaskResponseSchema])
 async def get_tasks_by_note(
     note_id: UUID,
+    request: Request,
+    params: TaskListParams = Depends(),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    Get all tasks for a specific note for the authenticated user.
+    Get tasks for a specific note for the authenticated user, newest first.
+    With a limit, the cursor of the next page is returned in the X-Next-Cursor header.
+    Responses carry an ETag and are served from the per-user response cache.
     """
+    after = parse_cursor(params.cursor)
     try:
         user_id = UUID(current_user["user_id"])
-        tasks = await get_tasks_by_note_id(user_id, note_id)
-        return tasks
+        
+        async def build():
+            tasks = await get_tasks_by_note_id(user_id, note_id, params.limit, after, **params.filters)
+            body = serialize_rows(tasks, TaskResponseSchema)
+            return body, next_cursor_headers(tasks, params.limit)
+        
+        return await cached_response(request, str(user_id), build)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -120,15 +266,26 @@ async def get_tasks_by_note(
 
 @router.get("/notes", response_model=List[Dict[str, Any]])
 async def get_notes_with_tasks_endpoint(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit to return all notes"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    include_text: bool = Query(False, description="Include the original note text"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    Get all notes that have tasks for the authenticated user.
+    Get notes that have tasks for the authenticated user, newest first.
+    With a limit, the cursor of the next page is returned in the X-Next-Cursor header.
+    Responses carry an ETag and are served from the per-user response cache.
     """
+    after = parse_cursor(cursor)
     try:
         user_id = UUID(current_user["user_id"])
-        notes = await get_notes_with_tasks(user_id)
-        return notes
+        
+        async def build():
+            notes = await get_notes_with_tasks(user_id, limit, after, include_text)
+            return serialize_rows(notes), next_cursor_headers(notes, limit)
+        
+        return await cached_response(request, str(user_id), build)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,48 +1,145 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 import jwt
 from jwt.exceptions import PyJWTError
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import base64
+import hashlib
+import hmac
+import time
 from app.core.config import settings
+from app.core.metrics import span
 
 # Security scheme for JWT Bearer token
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+# Supabase HS256 secret, parsed once instead of on every request
+_hmac_key: Optional[jwt.PyJWK] = None
+if settings.SUPABASE_JWT_SECRET:
+    _hmac_key = jwt.PyJWK({
+        "kty": "oct",
+        "k": base64.urlsafe_b64encode(settings.SUPABASE_JWT_SECRET.encode()).decode().rstrip("=")
+    }, algorithm="HS256")
+
+# Optional JWKS for asymmetric (RS256/ES256) Supabase signing keys.
+# PyJWKClient caches the key set for AUTH_JWKS_CACHE_SECONDS and refetches it when a
+# token names an unknown kid, which handles key rotation.
+_jwks_client: Optional[jwt.PyJWKClient] = None
+if settings.SUPABASE_JWKS_URL:
+    _jwks_client = jwt.PyJWKClient(
+        settings.SUPABASE_JWKS_URL,
+        cache_keys=True,
+        lifespan=settings.AUTH_JWKS_CACHE_SECONDS
+    )
+
+class VerifiedTokenCache:
+    """Bounded LRU of already-verified tokens, keyed by token hash and honouring exp"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return user
+
+    def put(self, token: str, expires_at: float, user: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (expires_at, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+token_cache = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+async def _get_signing_key(token: str) -> jwt.PyJWK:
+    """Pick the key that signed the token: a JWKS key for asymmetric tokens, the shared secret for HS256"""
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") != "HS256" and _jwks_client is not None:
+        # Only touches the network when the key set is not cached yet or the kid is unknown
+        return await run_in_threadpool(_jwks_client.get_signing_key_from_jwt, token)
+    if _hmac_key is None:
+        raise jwt.InvalidKeyError("No JWT verification key is configured")
+    return _hmac_key
+
+async def verify_token(token: str) -> Dict[str, Any]:
+    """
+    Verify the signature and claims of a Supabase access token and return its payload.
+    Raises PyJWTError if the token is invalid.
+    """
+    key = await _get_signing_key(token)
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[key.algorithm_name],
+        audience=settings.SUPABASE_JWT_AUDIENCE,
+        options={"require": ["exp", "sub"]}
+    )
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     """
     Verify the JWT token from Supabase Auth and extract the user information.
-    
+    Tokens verified before are served from an LRU until they expire, skipping the crypto.
+
     Returns:
         Dict containing user information with at least the user_id
     """
+    # Get the token from the Authorization header
+    token = credentials.credentials
+
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
     try:
-        # Get the token from the Authorization header
-        token = credentials.credentials
-        
-        # Verify the token using PyJWT with the Supabase JWT secret
-        # Note: In production, you might want to use JWKS for verification instead
-        # This is a simplified version for the MVP
-        payload = jwt.decode(
-            token,
-            settings.SUPABASE_JWT_SECRET,
-            algorithms=["HS256"],
-            options={"verify_signature": False}  # In MVP we might skip signature verification for simplicity
-        )
-        
-        # Extract user_id from the 'sub' claim
-        user_id = payload.get("sub")
-        
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-            )
-            
-        # Return user info (at minimum the user_id)
-        return {"user_id": user_id}
-        
+        with span("auth.verify_token"):
+            payload = await verify_token(token)
     except PyJWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid authentication credentials: {str(e)}",
-        )
\ No newline at end of file
+        )
+
+    # Extract user_id from the 'sub' claim
+    user_id = payload.get("sub")
+
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+
+    # Return user info (at minimum the user_id)
+    user = {"user_id": user_id}
+    token_cache.put(token, float(payload["exp"]), user)
+    return user
+
+async def require_stats_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> None:
+    """Allow the operational stats endpoint only with the STATS_TOKEN bearer token; 404 when it is not set"""
+    if not settings.STATS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stats are disabled")
+    if not hmac.compare_digest(credentials.credentials.encode(), settings.STATS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
@@ -0,0 +1,79 @@
+import asyncio
+import gzip
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Only gzip is offered
+    brotli = None
+
+# Preferred first when the client weighs them equally
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+# Bigger bodies are compressed in a worker thread (zlib and brotli release the GIL)
+THREAD_MIN_BYTES = 64 * 1024
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q-values"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The content coding to compress a response with, or None to send it as is"""
+    if not accept_encoding or settings.RESPONSE_COMPRESSION_MIN_BYTES <= 0:
+        return None
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+def should_compress(body: bytes) -> bool:
+    return settings.RESPONSE_COMPRESSION_MIN_BYTES > 0 and len(body) >= settings.RESPONSE_COMPRESSION_MIN_BYTES
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+    # mtime=0 keeps the output, and so its ETag, the same for the same body
+    return gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+
+async def compress_async(body: bytes, encoding: str) -> bytes:
+    """compress() that keeps large bodies off the event loop"""
+    if len(body) >= THREAD_MIN_BYTES:
+        return await asyncio.to_thread(compress, body, encoding)
+    return compress(body, encoding)
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Strong ETag of the compressed representation of a body with this ETag"""
+    return f'{etag[:-1]}-{encoding}"'
+
+async def json_response(request: Request, body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response, compressed as negotiated when it is large (for responses that are not cached)"""
+    headers = dict(headers or {})
+    if settings.RESPONSE_COMPRESSION_MIN_BYTES > 0:
+        headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate_encoding(request.headers.get("accept-encoding")) if should_compress(body) else None
+    if encoding is not None:
+        body = await compress_async(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -12,11 +12,168 @@ class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL")
     SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET")
+    SUPABASE_JWT_AUDIENCE: str = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+    # Optional JWKS endpoint for asymmetric signing keys, e.g. <SUPABASE_URL>/auth/v1/.well-known/jwks.json
+    SUPABASE_JWKS_URL: str = os.getenv("SUPABASE_JWKS_URL")
     
+    # Auth Settings
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    AUTH_JWKS_CACHE_SECONDS: int = int(os.getenv("AUTH_JWKS_CACHE_SECONDS", "600"))
+
+    # Database HTTP Pool Settings
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "50"))
+    DB_POOL_KEEPALIVE: int = int(os.getenv("DB_POOL_KEEPALIVE", "20"))
+    DB_KEEPALIVE_EXPIRY: float = float(os.getenv("DB_KEEPALIVE_EXPIRY", "30"))
+    DB_TIMEOUT: float = float(os.getenv("DB_TIMEOUT", "10"))
+    DB_CONNECT_TIMEOUT: float = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+
     # OpenAI Settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL_NAME: str = os.getenv("OPENAI_MODEL_NAME", "gpt-3.5-turbo")
     
+    # Model Routing Settings
+    # Notes of at most AI_ROUTER_FAST_MAX_TOKENS tokens go to the fast model (empty disables routing);
+    # its results are escalated to OPENAI_MODEL_NAME when they fail validation or look incomplete
+    OPENAI_FAST_MODEL_NAME: str = os.getenv("OPENAI_FAST_MODEL_NAME", "")
+    AI_ROUTER_FAST_MAX_TOKENS: int = int(os.getenv("AI_ROUTER_FAST_MAX_TOKENS", "1500"))
+    AI_ROUTER_ESCALATE_ON_NO_TASKS: bool = os.getenv("AI_ROUTER_ESCALATE_ON_NO_TASKS", "true").lower() == "true"
+    AI_ROUTER_MIN_SUMMARY_CHARS: int = int(os.getenv("AI_ROUTER_MIN_SUMMARY_CHARS", "20"))
+    # Prices per 1K prompt/completion tokens for the cost counters, e.g. "gpt-4o-mini=0.00015/0.0006"
+    AI_MODEL_PRICES: str = os.getenv("AI_MODEL_PRICES", "")
+    
+    # AI Processing Settings
+    # "parallel" runs separate summary and task extraction calls, "single" does both in one call
+    AI_PROCESSING_MODE: str = os.getenv("AI_PROCESSING_MODE", "parallel")
+    # Notes longer than this many tokens are split into chunks and processed map-reduce style
+    AI_CHUNK_MAX_TOKENS: int = int(os.getenv("AI_CHUNK_MAX_TOKENS", "3000"))
+    AI_CHUNK_CONCURRENCY: int = int(os.getenv("AI_CHUNK_CONCURRENCY", "4"))
+    # When LangChain is imported and the chains are built: "background" right after startup without
+    # delaying it, "startup" before the worker accepts requests, "lazy" on the first notes processed
+    LLM_WARMUP: str = os.getenv("LLM_WARMUP", "background")
+    
+    # Rule-based Pre-extraction Settings (runs before the LLM)
+    AI_PRE_EXTRACT_ENABLED: bool = os.getenv("AI_PRE_EXTRACT_ENABLED", "true").lower() == "true"
+    # Notes of at most this many lines that contain only action items are handled without the LLM, 0 disables
+    AI_PRE_EXTRACT_MAX_TRIVIAL_LINES: int = int(os.getenv("AI_PRE_EXTRACT_MAX_TRIVIAL_LINES", "8"))
+    
+    # LLM Result Cache Settings
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    # Maximum SimHash Hamming distance (0-7) treated as a near-duplicate, 0 disables near-duplicate hits
+    LLM_CACHE_SIMHASH_DISTANCE: int = int(os.getenv("LLM_CACHE_SIMHASH_DISTANCE", "4"))
+    LLM_CACHE_SIMHASH_MIN_WORDS: int = int(os.getenv("LLM_CACHE_SIMHASH_MIN_WORDS", "30"))
+    
+    # Background Note Processing Settings
+    # "inprocess" runs jobs on API worker tasks, "external" leaves them to `python -m app.services.note_jobs`
+    NOTE_JOB_EXECUTOR: str = os.getenv("NOTE_JOB_EXECUTOR", "inprocess")
+    NOTE_JOB_CONCURRENCY: int = int(os.getenv("NOTE_JOB_CONCURRENCY", "4"))
+    NOTE_JOB_QUEUE_MAX_DEPTH: int = int(os.getenv("NOTE_JOB_QUEUE_MAX_DEPTH", "100"))
+    NOTE_JOB_STALE_SECONDS: int = int(os.getenv("NOTE_JOB_STALE_SECONDS", "600"))
+    NOTE_JOB_POLL_SECONDS: float = float(os.getenv("NOTE_JOB_POLL_SECONDS", "1"))
+    NOTE_JOB_RETRY_AFTER_SECONDS: int = int(os.getenv("NOTE_JOB_RETRY_AFTER_SECONDS", "5"))
+    
+    # Response Cache Settings (per-user list responses with ETags)
+    # With several server.py workers it needs REDIS_URL to share its versions, otherwise it is disabled
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    
+    # List Response Serialization Settings
+    # Encode database rows directly with orjson instead of validating them into the response models
+    FAST_JSON_ENABLED: bool = os.getenv("FAST_JSON_ENABLED", "false").lower() == "true"
+    # List responses of at least this many bytes are sent brotli (if installed) or gzip compressed
+    # when the client accepts it; 0 disables compression
+    RESPONSE_COMPRESSION_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "4"))
+    RESPONSE_BROTLI_QUALITY: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+    
+    # LLM Rate Limits (client-side, adapted down on 429s)
+    LLM_RATE_LIMIT_RPM: int = int(os.getenv("LLM_RATE_LIMIT_RPM", "500"))
+    LLM_RATE_LIMIT_TPM: int = int(os.getenv("LLM_RATE_LIMIT_TPM", "200000"))
+    
+    # LLM Scheduler Settings (shared by all LLM work of a worker)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_QUEUE_MAX_DEPTH: int = int(os.getenv("LLM_QUEUE_MAX_DEPTH", "500"))
+    # Batch work waiting longer than this is dispatched ahead of interactive work
+    LLM_BATCH_MAX_WAIT_SECONDS: float = float(os.getenv("LLM_BATCH_MAX_WAIT_SECONDS", "30"))
+    
+    # LLM Resilience Settings (retries with jittered backoff, hedging, circuit breaker)
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BASE_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+    LLM_RETRY_MAX_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+    # Start a duplicate attempt when one is slower than this percentile of recent calls
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RESET_SECONDS: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+    LLM_BREAKER_TRIAL_TIMEOUT_SECONDS: float = float(os.getenv("LLM_BREAKER_TRIAL_TIMEOUT_SECONDS", "120"))
+
+    # LLM Token Accounting Settings (per user and UTC day, written to llm_token_usage in batches)
+    TOKEN_USAGE_ENABLED: bool = os.getenv("TOKEN_USAGE_ENABLED", "true").lower() == "true"
+    TOKEN_USAGE_FLUSH_SECONDS: float = float(os.getenv("TOKEN_USAGE_FLUSH_SECONDS", "10"))
+    TOKEN_USAGE_FLUSH_BATCH_SIZE: int = int(os.getenv("TOKEN_USAGE_FLUSH_BATCH_SIZE", "500"))
+    # Prompt plus completion tokens a user may use per UTC day, 0 disables the quota
+    LLM_DAILY_TOKEN_QUOTA: int = int(os.getenv("LLM_DAILY_TOKEN_QUOTA", "0"))
+    # Quota checks re-read a user's total from the database at most this often, to see other workers' usage
+    TOKEN_USAGE_SYNC_SECONDS: float = float(os.getenv("TOKEN_USAGE_SYNC_SECONDS", "30"))
+
+    # Batch Note Import Settings
+    NOTE_IMPORT_CONCURRENCY: int = int(os.getenv("NOTE_IMPORT_CONCURRENCY", "8"))
+    NOTE_IMPORT_WRITE_BATCH_SIZE: int = int(os.getenv("NOTE_IMPORT_WRITE_BATCH_SIZE", "25"))
+    NOTE_IMPORT_MAX_BYTES: int = int(os.getenv("NOTE_IMPORT_MAX_BYTES", str(20 * 1024 * 1024)))
+    
+    # Idempotency-Key Settings (POST /notes/process and POST /notes/{note_id}/tasks)
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+    # How long a duplicate on another worker waits for the first request to finish (then 409),
+    # and how long the execution lock outlives a worker that dies; it is extended while the request runs
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+
+    # Optional shared Redis-compatible backend for caches
+    REDIS_URL: str = os.getenv("REDIS_URL")
+    
+    # Daily Digest Settings
+    DAILY_DIGEST_SIZE: int = int(os.getenv("DAILY_DIGEST_SIZE", "20"))
+    # Also the time zone relative due dates in notes are resolved in, unless a request names one
+    DEFAULT_TIMEZONE: str = os.getenv("DEFAULT_TIMEZONE", "UTC")
+    # Materialized digests: recomputed after this many seconds even without local writes
+    DIGEST_MAX_STALENESS_SECONDS: float = float(os.getenv("DIGEST_MAX_STALENESS_SECONDS", "60"))
+    DIGEST_CACHE_MAX_USERS: int = int(os.getenv("DIGEST_CACHE_MAX_USERS", "10000"))
+    DIGEST_ROLLOVER_CHECK_SECONDS: float = float(os.getenv("DIGEST_ROLLOVER_CHECK_SECONDS", "60"))
+    
+    # Real-time Task Change Feed Settings
+    # "local" delivers within this worker only, "redis" fans out to all workers via Redis pub/sub
+    CHANGE_FEED_BROKER: str = os.getenv("CHANGE_FEED_BROKER", "local")
+    CHANGE_FEED_BUFFER_SIZE: int = int(os.getenv("CHANGE_FEED_BUFFER_SIZE", "100"))
+    CHANGE_FEED_MAX_CONNECTIONS: int = int(os.getenv("CHANGE_FEED_MAX_CONNECTIONS", "10000"))
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+    
+    # Delta Sync Settings
+    SYNC_MAX_CHANGES: int = int(os.getenv("SYNC_MAX_CHANGES", "1000"))
+    # Changes committed up to this long after a sync are still picked up by the next one
+    SYNC_OVERLAP_SECONDS: float = float(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+    
+    # Metrics Settings (Prometheus /metrics endpoint, optional OpenTelemetry traces)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Bearer token for the /stats endpoint (cache, queue and LLM usage stats); unset disables it
+    STATS_TOKEN: str = os.getenv("STATS_TOKEN")
+    # Needs the opentelemetry-api package and an SDK configured by the deployment
+    OTEL_TRACES_ENABLED: bool = os.getenv("OTEL_TRACES_ENABLED", "false").lower() == "true"
+
+    # Production Server Settings (server.py)
+    SERVER_HOST: str = os.getenv("HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("PORT", "8000"))
+    # Worker processes, one per core by default (set it in containers with CPU limits: the core count is the host's)
+    SERVER_WORKERS: int = int(os.getenv("WEB_CONCURRENCY", "0")) or (os.cpu_count() or 1)
+    # Import the app once in the supervisor and fork the workers from it
+    SERVER_PRELOAD: bool = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+    # Seconds a stopping worker waits for in-flight requests before closing them
+    SERVER_GRACEFUL_TIMEOUT: float = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+
     # CORS Settings
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
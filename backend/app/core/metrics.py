@@ -0,0 +1,205 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# Latency buckets in seconds, from cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    """Monotonic counter with labels, in the Prometheus data model"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, in the Prometheus data model"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: per-bucket counts (the last one is +Inf), sum
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+class MetricsRegistry:
+    """The metrics of this worker, rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    "taskflow_http_request_duration_seconds", "Time to complete HTTP requests (streamed responses excluded)",
+    ("method", "route", "status")
+))
+http_requests = registry.register(Counter(
+    "taskflow_http_requests_total", "HTTP requests, including streamed responses", ("method", "route", "status")
+))
+stage_duration = registry.register(Histogram(
+    "taskflow_stage_duration_seconds", "Time spent in instrumented stages of request handling", ("stage",)
+))
+stage_errors = registry.register(Counter(
+    "taskflow_stage_errors_total", "Instrumented stages that raised", ("stage",)
+))
+db_request_duration = registry.register(Histogram(
+    "taskflow_db_request_duration_seconds", "PostgREST round-trip time", ("method", "table")
+))
+db_requests = registry.register(Counter(
+    "taskflow_db_requests_total", "PostgREST round trips", ("method", "table", "status")
+))
+llm_tokens = registry.register(Counter(
+    "taskflow_llm_tokens_total", "LLM tokens used", ("model", "kind")
+))
+llm_requests = registry.register(Counter(
+    "taskflow_llm_requests_total", "LLM requests", ("model", "outcome")
+))
+
+# Optional OpenTelemetry tracing; spans are only created when OTEL_TRACES_ENABLED is set
+_trace_api = None
+_tracer = None
+if settings.OTEL_TRACES_ENABLED:
+    try:
+        from opentelemetry import trace as _trace_api
+        _tracer = _trace_api.get_tracer("taskflow-ai")
+    except ImportError:
+        print("OTEL_TRACES_ENABLED is set but opentelemetry is not installed; traces are disabled")
+
+def start_trace_span(name: str):
+    """Start an OpenTelemetry span that the caller ends, or None when tracing is off"""
+    return _tracer.start_span(name) if _tracer is not None else None
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a stage into taskflow_stage_duration_seconds (and an OpenTelemetry span if enabled)"""
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    trace_span = start_trace_span(stage)
+    started = time.perf_counter()
+    try:
+        if trace_span is not None:
+            with _trace_api.use_span(trace_span, end_on_exit=True):
+                yield
+        else:
+            yield
+    except BaseException:
+        stage_errors.inc(stage)
+        raise
+    finally:
+        stage_duration.observe(time.perf_counter() - started, stage)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request latency and counts"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        response: Dict[str, Any] = {"status": "500", "streamed": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = str(message["status"])
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        response["streamed"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; use its template to bound cardinality
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            labels = (scope["method"], route_path, response["status"])
+            http_requests.inc(*labels)
+            if not response["streamed"]:
+                http_request_duration.observe(time.perf_counter() - started, *labels)
+
+def _db_table(path: str) -> str:
+    """Table or rpc name of a PostgREST URL path such as /rest/v1/tasks or /rest/v1/rpc/fn"""
+    parts = [part for part in path.split("/") if part]
+    if "rpc" in parts and parts[-1] != "rpc":
+        return f"rpc:{parts[-1]}"
+    return parts[-1] if parts else "unknown"
+
+async def observe_db_request(request) -> None:
+    """httpx request hook: stamp the start time of a PostgREST round trip"""
+    request.extensions["taskflow_started"] = time.perf_counter()
+
+async def observe_db_response(response) -> None:
+    """httpx response hook: record the PostgREST round trip"""
+    if not settings.METRICS_ENABLED:
+        return
+    started = response.request.extensions.get("taskflow_started")
+    table = _db_table(response.request.url.path)
+    method = response.request.method
+    db_requests.inc(method, table, str(response.status_code))
+    if started is not None:
+        db_request_duration.observe(time.perf_counter() - started, method, table)
+
+def render_metrics() -> Optional[str]:
+    return registry.render() if settings.METRICS_ENABLED else None
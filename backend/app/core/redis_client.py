@@ -0,0 +1,35 @@
+import importlib.util
+from typing import Optional
+from app.core.config import settings
+
+# Shared connection pool to the optional Redis-compatible server (REDIS_URL)
+_client = None
+_unavailable = False
+
+def get_redis():
+    """
+    Return the shared async Redis client, or None when REDIS_URL is not set
+    or the optional redis package is not installed.
+    """
+    global _client, _unavailable
+    if _client is not None or _unavailable or not settings.REDIS_URL:
+        return _client
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        print("REDIS_URL is set but the redis package is not installed; shared caches are disabled")
+        _unavailable = True
+        return None
+    _client = redis.from_url(settings.REDIS_URL)
+    return _client
+
+def redis_configured() -> bool:
+    """Whether get_redis() will return a client (REDIS_URL set, redis installed), without creating one"""
+    return bool(settings.REDIS_URL) and importlib.util.find_spec("redis") is not None
+
+async def close_redis() -> None:
+    """Close the shared Redis connection pool (called on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
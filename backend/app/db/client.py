@@ -0,0 +1,71 @@
+import httpx
+from postgrest import AsyncPostgrestClient
+from typing import Dict, Optional, Union
+from app.core.config import settings
+from app.core.metrics import observe_db_request, observe_db_response
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient backed by a bounded keep-alive connection pool"""
+
+    def create_session(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: Union[int, float, httpx.Timeout],
+        verify: bool = True,
+        proxy: Optional[str] = None,
+    ) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=True,
+            event_hooks={"request": [observe_db_request], "response": [observe_db_response]},
+            limits=httpx.Limits(
+                max_connections=settings.DB_POOL_SIZE,
+                max_keepalive_connections=settings.DB_POOL_KEEPALIVE,
+                keepalive_expiry=settings.DB_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+# Shared client, opened and closed by the FastAPI lifespan hook
+_client: Optional[PooledPostgrestClient] = None
+
+def _build_client() -> PooledPostgrestClient:
+    return PooledPostgrestClient(
+        f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1",
+        headers={
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
+        },
+        timeout=httpx.Timeout(settings.DB_TIMEOUT, connect=settings.DB_CONNECT_TIMEOUT),
+    )
+
+async def open_db_client() -> PooledPostgrestClient:
+    """Create the shared PostgREST client (called on application startup)"""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+async def close_db_client() -> None:
+    """Close the shared PostgREST client and release pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_db() -> PooledPostgrestClient:
+    """
+    Return the shared PostgREST client.
+    Falls back to creating it lazily when used outside the application lifespan (e.g. scripts).
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+# Keyset pagination over (created_at DESC, id DESC).
+# A cursor is an opaque, URL-safe encoding of the sort key of the last row of a page.
+Cursor = Tuple[str, str]
+
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Encode the sort key of a row as an opaque cursor"""
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        # Validate both parts, they are interpolated into the PostgREST filter
+        datetime.fromisoformat(created_at)
+        return created_at, str(UUID(row_id))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def apply_keyset(query, after: Optional[Cursor], limit: Optional[int]):
+    """
+    Order a PostgREST query by (created_at DESC, id DESC) and, when a cursor is given,
+    only return rows that sort after it.
+    """
+    if after is not None:
+        created_at, row_id = after
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})'
+        )
+    query = query.order("created_at", desc=True).order("id", desc=True)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def next_cursor(rows: list, limit: Optional[int]) -> Optional[str]:
+    """Cursor for the page after rows, or None if this was the last page"""
+    if limit is None or len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1])
@@ -1,26 +1,42 @@
-from supabase import create_client, Client
 from uuid import UUID
-from typing import List, Dict, Any, Optional
+import heapq
+import logging
+from postgrest.exceptions import APIError
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import date, timedelta, datetime
-from app.core.config import settings
+from app.db.client import get_db
+from app.db.pagination import Cursor, apply_keyset
+from app.db.task_events import publish_task_change, publish_note_change
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    settings.SUPABASE_URL, 
-    settings.SUPABASE_SERVICE_ROLE_KEY
-)
+logger = logging.getLogger(__name__)
+
+TASK_COLUMNS = "id, description, due_date, status, created_at, note_id, is_important, user_id"
+
+def _apply_task_filters(query, status: Optional[str] = None, is_important: Optional[bool] = None,
+                        due_from: Optional[date] = None, due_to: Optional[date] = None):
+    """Apply the optional task list filters to a PostgREST query"""
+    if status is not None:
+        query = query.eq("status", status)
+    if is_important is not None:
+        query = query.eq("is_important", str(is_important).lower())
+    if due_from is not None:
+        query = query.gte("due_date", due_from.isoformat())
+    if due_to is not None:
+        query = query.lte("due_date", due_to.isoformat())
+    return query
 
 # Meeting Notes Operations
 async def create_meeting_note(user_id: UUID, original_text: str, summary: str) -> Dict[str, Any]:
     """Create a new meeting note in the database"""
     try:
-        response = supabase.table("meeting_notes").insert({
+        response = await get_db().table("meeting_notes").insert({
             "user_id": str(user_id),
             "original_text": original_text,
             "summary": summary
         }).execute()
         
         if response.data and len(response.data) > 0:
+            await publish_note_change(str(user_id), "created", response.data)
             return response.data[0]
         raise Exception("Failed to create meeting note")
     except Exception as e:
@@ -30,7 +46,7 @@ async def create_meeting_note(user_id: UUID, original_text: str, summary: str) -
 async def get_meeting_note_by_id(note_id: UUID, user_id: UUID) -> Optional[Dict[str, Any]]:
     """Get a meeting note by ID, ensuring it belongs to the specified user"""
     try:
-        response = supabase.table("meeting_notes").select(
+        response = await get_db().table("meeting_notes").select(
             "id, original_text, summary, created_at"
         ).eq("id", str(note_id)).eq("user_id", str(user_id)).limit(1).execute()
         
@@ -42,46 +58,93 @@ async def get_meeting_note_by_id(note_id: UUID, user_id: UUID) -> Optional[Dict[
         raise e
 
 # Tasks Operations
+def _task_record(user_id: UUID, note_id: UUID, task: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the row inserted for an extracted or user-provided task"""
+    task_record = {
+        "user_id": str(user_id),
+        "note_id": str(note_id),
+        "description": task["description"],
+        "status": "open",  # Default status
+        "is_important": task.get("is_important", False)  # Default to False if not provided
+    }
+    
+    # Add due_date if provided, converting to string if it's a date object
+    if "due_date" in task and task["due_date"]:
+        due_date = task["due_date"]
+        if isinstance(due_date, date):
+            task_record["due_date"] = due_date.isoformat()
+        else:
+            task_record["due_date"] = due_date
+    return task_record
+
 async def create_tasks_batch(user_id: UUID, note_id: UUID, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Create multiple tasks in a batch operation"""
     try:
         # Prepare tasks with user_id and note_id
-        task_records = []
-        for task in tasks:
-            task_record = {
-                "user_id": str(user_id),
-                "note_id": str(note_id),
-                "description": task["description"],
-                "status": "open",  # Default status
-                "is_important": task.get("is_important", False)  # Default to False if not provided
-            }
-            
-            # Add due_date if provided, converting to string if it's a date object
-            if "due_date" in task and task["due_date"]:
-                due_date = task["due_date"]
-                if isinstance(due_date, date):
-                    task_record["due_date"] = due_date.isoformat()
-                else:
-                    task_record["due_date"] = due_date
-                
-            task_records.append(task_record)
+        task_records = [_task_record(user_id, note_id, task) for task in tasks]
         
         # Insert tasks in batch
-        response = supabase.table("tasks").insert(task_records).execute()
+        response = await get_db().table("tasks").insert(task_records).execute()
         
         if response.data:
+            await publish_task_change(str(user_id), "created", response.data)
             return response.data
         raise Exception("Failed to create tasks")
     except Exception as e:
         print(f"Error in create_tasks_batch: {e}")
         raise e
 
-async def get_tasks_for_user(user_id: UUID) -> List[Dict[str, Any]]:
-    """Get all tasks for a specific user"""
+async def create_notes_with_tasks_batch(
+    user_id: UUID,
+    notes: List[Tuple[str, str, List[Dict[str, Any]]]]
+) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Create many meeting notes and their tasks with two bulk inserts.
+    notes holds (original_text, summary, tasks) triples; returns (note row, task rows)
+    pairs in the same order.
+    """
+    try:
+        response = await get_db().table("meeting_notes").insert([
+            {"user_id": str(user_id), "original_text": original_text, "summary": summary}
+            for original_text, summary, _ in notes
+        ]).execute()
+        note_rows = response.data or []
+        if len(note_rows) != len(notes):
+            raise Exception("Failed to create meeting notes")
+        await publish_note_change(str(user_id), "created", note_rows)
+        
+        task_records = [
+            _task_record(user_id, note_row["id"], task)
+            for note_row, (_, _, tasks) in zip(note_rows, notes)
+            for task in tasks
+        ]
+        tasks_by_note: Dict[str, List[Dict[str, Any]]] = {note_row["id"]: [] for note_row in note_rows}
+        if task_records:
+            response = await get_db().table("tasks").insert(task_records).execute()
+            for task_row in response.data or []:
+                tasks_by_note[task_row["note_id"]].append(task_row)
+            await publish_task_change(str(user_id), "created", response.data or [])
+        
+        return [(note_row, tasks_by_note[note_row["id"]]) for note_row in note_rows]
+    except Exception as e:
+        print(f"Error in create_notes_with_tasks_batch: {e}")
+        raise e
+
+async def get_tasks_for_user(
+    user_id: UUID,
+    limit: Optional[int] = None,
+    after: Optional[Cursor] = None,
+    **filters: Any
+) -> List[Dict[str, Any]]:
+    """
+    Get tasks for a specific user, newest first.
+    Pass limit and the cursor of the previous page to paginate; filters are
+    status, is_important, due_from and due_to.
+    """
     try:
-        response = supabase.table("tasks").select(
-            "id, description, due_date, status, created_at, note_id, is_important, user_id"
-        ).eq("user_id", str(user_id)).order("created_at", desc=True).execute()
+        query = get_db().table("tasks").select(TASK_COLUMNS).eq("user_id", str(user_id))
+        query = _apply_task_filters(query, **filters)
+        response = await apply_keyset(query, after, limit).execute()
         
         return response.data
     except Exception as e:
@@ -92,48 +155,56 @@ async def update_task_status_by_id(task_id: UUID, user_id: UUID, status: str) ->
     """Update the status of a specific task"""
     try:
         # Ensure the task belongs to the user before updating
-        response = supabase.table("tasks").update(
+        response = await get_db().table("tasks").update(
             {"status": status}
         ).eq("id", str(task_id)).eq("user_id", str(user_id)).execute()
         
         if response.data and len(response.data) > 0:
+            await publish_task_change(str(user_id), "updated", response.data)
             return response.data[0]
         raise Exception(f"Failed to update task status or task not found for ID: {task_id}")
     except Exception as e:
         print(f"Error in update_task_status_by_id: {e}")
         raise e
 
-async def get_tasks_by_note_id(user_id: UUID, note_id: UUID) -> List[Dict[str, Any]]:
-    """Get all tasks for a specific note and user"""
+async def get_tasks_by_note_id(
+    user_id: UUID,
+    note_id: UUID,
+    limit: Optional[int] = None,
+    after: Optional[Cursor] = None,
+    **filters: Any
+) -> List[Dict[str, Any]]:
+    """Get tasks for a specific note and user, newest first, optionally paginated and filtered"""
     try:
-        response = supabase.table("tasks").select(
-            "id, description, due_date, status, created_at, note_id, is_important, user_id"
-        ).eq("user_id", str(user_id)).eq("note_id", str(note_id)).order("created_at", desc=True).execute()
+        query = get_db().table("tasks").select(TASK_COLUMNS) \
+            .eq("user_id", str(user_id)) \
+            .eq("note_id", str(note_id))
+        query = _apply_task_filters(query, **filters)
+        response = await apply_keyset(query, after, limit).execute()
         
         return response.data
     except Exception as e:
         print(f"Error in get_tasks_by_note_id: {e}")
         raise e
 
-async def get_notes_with_tasks(user_id: UUID) -> List[Dict[str, Any]]:
-    """Get all notes that have tasks for a specific user"""
+async def get_notes_with_tasks(
+    user_id: UUID,
+    limit: Optional[int] = None,
+    after: Optional[Cursor] = None,
+    include_text: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Get notes that have tasks for a specific user, newest first, optionally paginated.
+    The original note text is only returned when include_text is set.
+    """
     try:
-        # First get all unique note_ids from tasks
-        tasks_response = supabase.table("tasks").select(
-            "note_id"
-        ).eq("user_id", str(user_id)).execute()
+        columns = "id, original_text, summary, created_at" if include_text else "id, summary, created_at"
+        # The empty inner embed keeps only notes with at least one task, without returning the tasks
+        query = get_db().table("meeting_notes").select(f"{columns}, tasks!inner()") \
+            .eq("user_id", str(user_id))
+        response = await apply_keyset(query, after, limit).execute()
         
-        note_ids = list(set(task["note_id"] for task in tasks_response.data))
-        
-        if not note_ids:
-            return []
-            
-        # Then get the notes details
-        notes_response = supabase.table("meeting_notes").select(
-            "id, original_text, summary, created_at"
-        ).eq("user_id", str(user_id)).in_("id", note_ids).order("created_at", desc=True).execute()
-        
-        return notes_response.data
+        return response.data
     except Exception as e:
         print(f"Error in get_notes_with_tasks: {e}")
         raise e
@@ -141,7 +212,7 @@ async def get_notes_with_tasks(user_id: UUID) -> List[Dict[str, Any]]:
 async def get_task_by_id_and_user(task_id: UUID, user_id: UUID) -> Dict[str, Any]:
     """Get a specific task by ID and user ID"""
     try:
-        response = supabase.table("tasks").select(
+        response = await get_db().table("tasks").select(
             "id, description, due_date, status, created_at, note_id"
         ).eq("id", str(task_id)).eq("user_id", str(user_id)).execute()
         
@@ -157,57 +228,85 @@ async def update_task_importance_by_id(task_id: UUID, user_id: UUID, is_importan
     Update the importance of a task.
     """
     try:
-        response = supabase.table("tasks") \
+        response = await get_db().table("tasks") \
             .update({"is_important": is_important}) \
             .eq("id", str(task_id)) \
             .eq("user_id", str(user_id)) \
             .execute()
         
         if response.data:
-            print(f"Updated task importance: {response.data[0]}")
+            logger.debug("Updated task importance: %s", response.data[0])
+            await publish_task_change(str(user_id), "updated", response.data)
             return response.data[0]
         return None
     except Exception as e:
         print(f"Error in update_task_importance_by_id: {e}")
         raise
 
-async def get_daily_digest_tasks(user_id: UUID) -> List[Dict[str, Any]]:
+def digest_bucket(task: Dict[str, Any], today: date, week_start: date, week_end: date) -> int:
+    """Priority bucket of a task in the daily digest (lower comes first)"""
+    if task.get("is_important"):
+        return 0
+    due_date = task.get("due_date")
+    if due_date:
+        due = date.fromisoformat(due_date[:10])
+        if due == today:
+            return 1
+        if week_start <= due <= week_end:
+            return 2
+    return 3
+
+def rank_digest_tasks(tasks: List[Dict[str, Any]], today: date, limit: int) -> List[Dict[str, Any]]:
+    """
+    Single-pass ranking of tasks (already ordered newest first) into the daily digest.
+    Each task is bucketed once, so a task that is both important and due today appears once.
+    """
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+    # heapq.nsmallest is stable, so ties keep the newest-first order
+    return heapq.nsmallest(
+        limit,
+        tasks,
+        key=lambda t: (digest_bucket(t, today, week_start, week_end), t.get("due_date") or "9999-12-31")
+    )
+
+async def get_daily_digest_tasks(user_id: UUID, today: Optional[date] = None, limit: int = 20) -> List[Dict[str, Any]]:
     """
     Get a smart digest of tasks for the user, prioritizing:
     1. Important tasks
     2. Tasks due today
     3. Tasks due this week
     4. Recently created tasks
+    
+    The ranking runs in the database through the get_daily_digest function. If that
+    function has not been deployed yet, the tasks are ranked here in a single pass.
     """
+    today = today or datetime.now().date()
     try:
-        today = datetime.now().date()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-
-        # Get all tasks for the user
-        response = supabase.table("tasks") \
-            .select("id, description, status, is_important, created_at, due_date, note_id, user_id") \
+        response = await get_db().rpc("get_daily_digest", {
+            "p_user_id": str(user_id),
+            "p_today": today.isoformat(),
+            "p_limit": limit
+        }).execute()
+        
+        return response.data or []
+    except APIError as e:
+        # PGRST202: the function does not exist (migration not applied yet)
+        if e.code != "PGRST202":
+            print(f"Error in get_daily_digest_tasks: {e}")
+            raise
+    except Exception as e:
+        print(f"Error in get_daily_digest_tasks: {e}")
+        raise
+    
+    try:
+        response = await get_db().table("tasks") \
+            .select(TASK_COLUMNS) \
             .eq("user_id", str(user_id)) \
-            .order("is_important", desc=True) \
-            .order("due_date", desc=False) \
-            .order("created_at", desc=False) \
+            .order("created_at", desc=True) \
             .execute()
-
-        if not response.data:
-            return []
-
-        tasks = response.data
-
-        # Filter and sort tasks
-        important_tasks = [t for t in tasks if t.get("is_important")]
-        due_today = [t for t in tasks if t.get("due_date") and datetime.fromisoformat(t["due_date"]).date() == today]
-        due_this_week = [t for t in tasks if t.get("due_date") and week_start <= datetime.fromisoformat(t["due_date"]).date() <= week_end]
-        recent_tasks = [t for t in tasks if t not in important_tasks + due_today + due_this_week]
-
-        # Combine all tasks in priority order
-        digest_tasks = important_tasks + due_today + due_this_week + recent_tasks
-
-        return digest_tasks
+        
+        return rank_digest_tasks(response.data or [], today, limit)
     except Exception as e:
         print(f"Error in get_daily_digest_tasks: {e}")
         raise
@@ -218,13 +317,278 @@ async def delete_task_by_id(task_id: UUID, user_id: UUID) -> bool:
     Returns True if deletion was successful, False otherwise.
     """
     try:
-        response = supabase.table("tasks") \
+        response = await get_db().table("tasks") \
             .delete() \
             .eq("id", str(task_id)) \
             .eq("user_id", str(user_id)) \
             .execute()
         
+        await publish_task_change(str(user_id), "deleted", response.data)
         return bool(response.data)
     except Exception as e:
         print(f"Error in delete_task_by_id: {e}")
-        raise
\ No newline at end of file
+        raise
+
+async def _bulk_mutate_tasks_fallback(user_id: UUID, operations: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """bulk_mutate_tasks without the database function: one statement per status, importance value and for deletes"""
+    # Later operations on the same task win, like in the database function
+    statuses: Dict[str, Dict[str, str]] = {"update_status": {}, "update_importance": {}}
+    deletes: List[str] = []
+    for op in operations:
+        if op["op"] == "delete":
+            deletes.append(op["task_id"])
+        else:
+            value = op["status"] if op["op"] == "update_status" else op["is_important"]
+            statuses[op["op"]][op["task_id"]] = value
+    
+    results: List[Tuple[str, Dict[str, Any]]] = []
+    for op_name, column in (("update_status", "status"), ("update_importance", "is_important")):
+        groups: Dict[Any, List[str]] = {}
+        for task_id, value in statuses[op_name].items():
+            groups.setdefault(value, []).append(task_id)
+        for value, task_ids in groups.items():
+            response = await get_db().table("tasks") \
+                .update({column: value}) \
+                .in_("id", task_ids) \
+                .eq("user_id", str(user_id)) \
+                .execute()
+            results.extend((op_name, row) for row in response.data)
+    if deletes:
+        response = await get_db().table("tasks") \
+            .delete() \
+            .in_("id", deletes) \
+            .eq("user_id", str(user_id)) \
+            .execute()
+        results.extend(("delete", row) for row in response.data)
+    return results
+
+async def bulk_mutate_tasks(user_id: UUID, operations: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Apply status, importance and delete operations to many tasks of a user at once.
+    Each operation is {"op": ..., "task_id": ..., "status" | "is_important": ...}.
+    Returns (op, task row) for every task changed; operations on tasks that do not
+    exist or belong to someone else have no result.
+    
+    Runs in one transaction through the bulk_mutate_tasks database function. If that
+    function has not been deployed yet, falls back to a few set-based statements,
+    which are not atomic as a whole.
+    """
+    try:
+        try:
+            response = await get_db().rpc("bulk_mutate_tasks", {
+                "p_user_id": str(user_id),
+                "p_ops": operations
+            }).execute()
+            results = [(row["op_name"], row["task"]) for row in response.data or []]
+        except APIError as e:
+            # PGRST202: the function does not exist (migration not applied yet)
+            if e.code != "PGRST202":
+                raise
+            results = await _bulk_mutate_tasks_fallback(user_id, operations)
+        
+        updated = {row["id"]: row for op_name, row in results if op_name != "delete"}
+        deleted = [row for op_name, row in results if op_name == "delete"]
+        # Tasks that were updated and then deleted are only published as deleted
+        deleted_ids = {row["id"] for row in deleted}
+        await publish_task_change(str(user_id), "updated", [row for row in updated.values() if row["id"] not in deleted_ids])
+        await publish_task_change(str(user_id), "deleted", deleted)
+        return results
+    except Exception as e:
+        print(f"Error in bulk_mutate_tasks: {e}")
+        raise
+
+async def update_meeting_note_summary(note_id: UUID, summary: str) -> Optional[Dict[str, Any]]:
+    """Set the summary of a meeting note once background processing has finished"""
+    try:
+        response = await get_db().table("meeting_notes") \
+            .update({"summary": summary}) \
+            .eq("id", str(note_id)) \
+            .execute()
+        
+        if response.data:
+            await publish_note_change(response.data[0]["user_id"], "updated", response.data)
+            return response.data[0]
+        return None
+    except Exception as e:
+        print(f"Error in update_meeting_note_summary: {e}")
+        raise
+
+# Delta Sync Operations
+SYNC_NOTE_COLUMNS = "id, summary, created_at, updated_at"
+
+async def _get_changed_rows(table: str, columns: str, time_column: str, user_id: UUID, since: Optional[datetime],
+                            limit: Optional[int], until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    query = get_db().table(table).select(columns).eq("user_id", str(user_id))
+    if since is not None:
+        query = query.gt(time_column, since.isoformat())
+    if until is not None:
+        query = query.lte(time_column, until.isoformat())
+    query = query.order(time_column).order("id")
+    if limit is not None:
+        query = query.limit(limit)
+    response = await query.execute()
+    return response.data
+
+async def get_changed_tasks(user_id: UUID, since: Optional[datetime], limit: Optional[int],
+                            until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Get tasks created or updated after since (and up to until), oldest change first"""
+    try:
+        return await _get_changed_rows(
+            "tasks", f"{TASK_COLUMNS}, updated_at", "updated_at", user_id, since, limit, until
+        )
+    except Exception as e:
+        print(f"Error in get_changed_tasks: {e}")
+        raise e
+
+async def get_changed_notes(user_id: UUID, since: Optional[datetime], limit: Optional[int],
+                            until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Get meeting notes created or updated after since (and up to until), oldest change first"""
+    try:
+        return await _get_changed_rows("meeting_notes", SYNC_NOTE_COLUMNS, "updated_at", user_id, since, limit, until)
+    except Exception as e:
+        print(f"Error in get_changed_notes: {e}")
+        raise e
+
+async def get_tombstones(user_id: UUID, since: Optional[datetime], limit: Optional[int],
+                         until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Get tasks and meeting notes deleted after since (and up to until), oldest deletion first"""
+    try:
+        return await _get_changed_rows(
+            "sync_tombstones", "id, table_name, record_id, deleted_at", "deleted_at", user_id, since, limit, until
+        )
+    except Exception as e:
+        print(f"Error in get_tombstones: {e}")
+        raise e
+
+# Processing Jobs Operations
+async def create_processing_job(user_id: UUID, note_id: UUID, timezone: Optional[str] = None) -> Dict[str, Any]:
+    """Create a queued background processing job for a note, processed in the given time zone"""
+    try:
+        response = await get_db().table("processing_jobs").insert({
+            "user_id": str(user_id),
+            "note_id": str(note_id),
+            "status": "queued",
+            "timezone": timezone
+        }).execute()
+        
+        if response.data and len(response.data) > 0:
+            return response.data[0]
+        raise Exception("Failed to create processing job")
+    except Exception as e:
+        print(f"Error in create_processing_job: {e}")
+        raise e
+
+async def get_processing_job(job_id: UUID, user_id: Optional[UUID] = None) -> Optional[Dict[str, Any]]:
+    """Get a processing job by ID, optionally ensuring it belongs to the specified user"""
+    try:
+        query = get_db().table("processing_jobs").select(
+            "id, user_id, note_id, status, result, error, attempts, created_at, updated_at"
+        ).eq("id", str(job_id))
+        if user_id is not None:
+            query = query.eq("user_id", str(user_id))
+        response = await query.limit(1).execute()
+        
+        if response.data and len(response.data) > 0:
+            return response.data[0]
+        return None
+    except Exception as e:
+        print(f"Error in get_processing_job: {e}")
+        raise e
+
+async def claim_processing_job(job_id: UUID, attempts: int) -> Optional[Dict[str, Any]]:
+    """
+    Atomically move a queued job to running.
+    Returns None if another worker already claimed the job.
+    """
+    try:
+        response = await get_db().table("processing_jobs") \
+            .update({"status": "running", "attempts": attempts + 1, "updated_at": datetime.utcnow().isoformat()}) \
+            .eq("id", str(job_id)) \
+            .eq("status", "queued") \
+            .execute()
+        
+        if response.data:
+            return response.data[0]
+        return None
+    except Exception as e:
+        print(f"Error in claim_processing_job: {e}")
+        raise
+
+async def update_processing_job(job_id: UUID, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Update the status, and optionally the result or error, of a processing job"""
+    try:
+        fields: Dict[str, Any] = {"status": status, "updated_at": datetime.utcnow().isoformat()}
+        if result is not None:
+            fields["result"] = result
+        if error is not None:
+            fields["error"] = error
+        
+        response = await get_db().table("processing_jobs") \
+            .update(fields) \
+            .eq("id", str(job_id)) \
+            .execute()
+        
+        if response.data:
+            return response.data[0]
+        return None
+    except Exception as e:
+        print(f"Error in update_processing_job: {e}")
+        raise
+
+async def get_pending_processing_jobs(limit: int = 100) -> List[Dict[str, Any]]:
+    """Get queued and running jobs in creation order, used to recover work after a restart"""
+    try:
+        response = await get_db().table("processing_jobs") \
+            .select("id, user_id, note_id, status, attempts, updated_at") \
+            .in_("status", ["queued", "running"]) \
+            .order("created_at", desc=False) \
+            .limit(limit) \
+            .execute()
+        
+        return response.data
+    except Exception as e:
+        print(f"Error in get_pending_processing_jobs: {e}")
+        raise
+
+async def count_queued_processing_jobs() -> int:
+    """Count jobs waiting to be processed"""
+    try:
+        response = await get_db().table("processing_jobs") \
+            .select("id", count="exact", head=True) \
+            .eq("status", "queued") \
+            .execute()
+        
+        return response.count or 0
+    except Exception as e:
+        print(f"Error in count_queued_processing_jobs: {e}")
+        raise
+
+# LLM Token Usage Operations
+async def get_llm_token_usage(user_id: UUID, usage_date: date) -> int:
+    """Get the prompt plus completion tokens a user has used on a (UTC) day"""
+    try:
+        response = await get_db().table("llm_token_usage") \
+            .select("prompt_tokens, completion_tokens") \
+            .eq("user_id", str(user_id)) \
+            .eq("usage_date", usage_date.isoformat()) \
+            .limit(1) \
+            .execute()
+        
+        if response.data:
+            return response.data[0]["prompt_tokens"] + response.data[0]["completion_tokens"]
+        return 0
+    except Exception as e:
+        print(f"Error in get_llm_token_usage: {e}")
+        raise
+
+async def record_llm_token_usage(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add a batch of per-user, per-day usage deltas in one round trip.
+    Returns the new total tokens of every (user_id, usage_date) touched.
+    """
+    try:
+        response = await get_db().rpc("record_llm_token_usage", {"p_rows": rows}).execute()
+        return response.data or []
+    except Exception as e:
+        print(f"Error in record_llm_token_usage: {e}")
+        raise
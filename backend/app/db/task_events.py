@@ -0,0 +1,36 @@
+from typing import Any, Awaitable, Callable, Dict, List
+
+# Listeners are called after every successful write in supabase_ops with
+# (user_id, action, rows), where action is "created", "updated" or "deleted" and
+# rows are the affected rows as returned by PostgREST.
+ChangeListener = Callable[[str, str, List[Dict[str, Any]]], Awaitable[None]]
+
+_task_listeners: List[ChangeListener] = []
+_note_listeners: List[ChangeListener] = []
+
+def add_task_listener(listener: ChangeListener) -> ChangeListener:
+    """Register a listener for task writes (usable as a decorator)"""
+    _task_listeners.append(listener)
+    return listener
+
+def add_note_listener(listener: ChangeListener) -> ChangeListener:
+    """Register a listener for meeting note writes (usable as a decorator)"""
+    _note_listeners.append(listener)
+    return listener
+
+async def _publish(listeners: List[ChangeListener], user_id: str, action: str, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    for listener in listeners:
+        try:
+            await listener(user_id, action, rows)
+        except Exception as e:
+            print(f"Error in change listener {getattr(listener, '__name__', listener)}: {e}")
+
+async def publish_task_change(user_id: str, action: str, rows: List[Dict[str, Any]]) -> None:
+    """Notify all task listeners of a task write. Listener errors are logged, never raised to the writer."""
+    await _publish(_task_listeners, user_id, action, rows)
+
+async def publish_note_change(user_id: str, action: str, rows: List[Dict[str, Any]]) -> None:
+    """Notify all note listeners of a meeting note write. Listener errors are logged, never raised to the writer."""
+    await _publish(_note_listeners, user_id, action, rows)
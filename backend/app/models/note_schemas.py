@@ -1,12 +1,13 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
 from .task_schemas import ExtractedTaskSchema, TaskResponseSchema
 
 # Note Processing Request Schema
 class ProcessNoteRequest(BaseModel):
     text: str = Field(..., description="The text content of the meeting notes to process")
+    timezone: Optional[str] = Field(None, description="IANA time zone relative due dates are resolved in, e.g. Europe/Berlin")
 
 # Note Response Schema
 class NoteBase(BaseModel):
@@ -25,4 +26,25 @@ class NoteResponse(NoteBase):
 class NoteWithTasks(NoteBase):
     note_id: UUID
     created_at: str
-    tasks: List[TaskResponseSchema]
\ No newline at end of file
+    tasks: List[TaskResponseSchema]
+
+# Background Processing Job Schemas
+class ProcessNoteJobAccepted(BaseModel):
+    job_id: UUID
+    note_id: UUID
+    status: str
+
+class ProcessingJobResponse(BaseModel):
+    job_id: UUID
+    note_id: UUID
+    status: str
+    result: Optional[NoteResponse] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+# Batch Import Schemas
+MAX_IMPORT_NOTES = 1000
+
+class BatchProcessNotesRequest(BaseModel):
+    notes: List[ProcessNoteRequest] = Field(..., min_length=1, max_length=MAX_IMPORT_NOTES)
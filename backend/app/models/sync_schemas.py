@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from uuid import UUID
+from .task_schemas import TaskResponseSchema
+
+# Meeting note as returned by the sync endpoint (without the original text)
+class SyncNoteSchema(BaseModel):
+    id: UUID
+    summary: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class SyncDeletions(BaseModel):
+    tasks: List[UUID] = Field(default_factory=list)
+    notes: List[UUID] = Field(default_factory=list)
+
+# Delta Sync Response Schema
+class SyncResponse(BaseModel):
+    tasks: List[TaskResponseSchema] = Field(..., description="Tasks created or updated since the cursor")
+    notes: List[SyncNoteSchema] = Field(..., description="Meeting notes created or updated since the cursor")
+    deleted: SyncDeletions = Field(..., description="IDs of tasks and notes deleted since the cursor")
+    cursor: str = Field(..., description="Pass as since on the next sync")
+    has_more: bool = Field(..., description="More changes are waiting; sync again right away with the new cursor")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Literal
 from datetime import date, datetime
 from uuid import UUID
@@ -24,6 +24,7 @@ class TaskResponseSchema(BaseModel):
     status: str
     is_important: bool = False
     created_at: datetime
+    updated_at: Optional[datetime] = None
     due_date: Optional[date] = None
     note_id: Optional[UUID] = None
     user_id: UUID
@@ -41,4 +42,34 @@ class UpdateTaskStatusRequest(BaseModel):
 
 # Request Schema for updating task importance
 class UpdateTaskImportanceRequest(BaseModel):
-    is_important: bool = Field(..., description="Whether the task is important or not")
\ No newline at end of file
+    is_important: bool = Field(..., description="Whether the task is important or not")
+
+# Bulk Task Mutation Schemas
+MAX_BULK_OPERATIONS = 500
+
+class BulkTaskOperation(BaseModel):
+    op: Literal["update_status", "update_importance", "delete"]
+    task_id: UUID
+    status: Optional[str] = Field(None, description="New status, for update_status")
+    is_important: Optional[bool] = Field(None, description="New importance, for update_importance")
+
+    @model_validator(mode="after")
+    def check_value(self):
+        if self.op == "update_status" and self.status is None:
+            raise ValueError("update_status requires status")
+        if self.op == "update_importance" and self.is_important is None:
+            raise ValueError("update_importance requires is_important")
+        return self
+
+class BulkTaskRequest(BaseModel):
+    operations: List[BulkTaskOperation] = Field(..., min_length=1, max_length=MAX_BULK_OPERATIONS)
+
+class BulkTaskResult(BaseModel):
+    op: str
+    task_id: UUID
+    ok: bool
+    task: Optional[TaskResponseSchema] = None
+    error: Optional[str] = None
+
+class BulkTaskResponse(BaseModel):
+    results: List[BulkTaskResult] = Field(..., description="One result per operation, in request order")
@@ -1,14 +1,30 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.output_parsers import StrOutputParser, PydanticOutputParser
-from langchain_core.runnables import RunnableParallel, RunnableLambda
-from pydantic import BaseModel, Field
-from typing import List, Optional, Tuple, Dict, Any
+import httpx
+from pydantic import BaseModel, Field, ValidationError
+from typing import TYPE_CHECKING, List, Optional, Tuple, Dict, Any, AsyncIterator
 from datetime import date
+import asyncio
 import os
 import json
+import threading
+import time
 from app.core.config import settings
+from app.core.metrics import span
+from app.services.text_chunker import count_tokens, chunk_text, merge_task_dicts
+from app.services.llm_cache import llm_cache
+from app.services.llm_resilience import llm_breaker, llm_caller
+from app.services.llm_scheduler import INTERACTIVE, llm_scheduler
+from app.services.model_router import model_router
+from app.services.pre_extractor import PreExtraction, pre_extract, reference_date_for
+from app.services.rate_limiter import llm_rate_limiter
+from app.services.token_usage import billed_to, token_usage
+
+# LangChain's chat model and runnable modules and the OpenAI SDK take about a second to
+# import, so they are imported when the chains are first built (see warm_up_llm), not here
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+# Bump whenever a prompt changes so cached results from older prompts are not reused
+PROMPT_VERSION = "2"
 
 # Define Pydantic models for structured output
 class ExtractedTaskItem(BaseModel):
@@ -18,19 +34,70 @@ class ExtractedTaskItem(BaseModel):
 class ExtractedTaskList(BaseModel):
     tasks: List[ExtractedTaskItem]
 
+class MeetingAnalysis(BaseModel):
+    summary: str = Field(description="Concise summary of the meeting notes")
+    tasks: List[ExtractedTaskItem]
+
+async def _observe_rate_limits(response: httpx.Response) -> None:
+    llm_rate_limiter.observe_response(response.status_code, response.headers)
+
+_llm_http_client: Optional[httpx.AsyncClient] = None
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """HTTP client shared by all chains; every OpenAI response feeds its rate-limit headers to the limiter"""
+    global _llm_http_client
+    if _llm_http_client is None:
+        import openai
+        _llm_http_client = openai.DefaultAsyncHttpxClient(event_hooks={"response": [_observe_rate_limits]})
+    return _llm_http_client
+
+async def close_llm_client() -> None:
+    """
+    Close the shared OpenAI HTTP client (called on application shutdown).
+    The models and chains built on it are dropped too, so later use rebuilds them on a new client.
+    """
+    global _llm_http_client
+    with _model_chains_lock:
+        _model_chains.clear()
+        _chat_models.clear()
+    if _llm_http_client is not None:
+        client, _llm_http_client = _llm_http_client, None
+        await client.aclose()
+
+def instrument(chain, name: str):
+    """Name a chain for the stage latency metrics"""
+    from app.services.llm_callbacks import stage_timing_callback
+
+    return chain.with_config(run_name=name, callbacks=[stage_timing_callback])
+
+_chat_models: Dict[str, "ChatOpenAI"] = {}
+
 # Initialize the LLM
-def get_llm():
-    """Initialize and return the OpenAI LLM with environment settings"""
-    return ChatOpenAI(
-        model_name=settings.OPENAI_MODEL_NAME, 
-        temperature=0.2,
-        api_key=settings.OPENAI_API_KEY
-    )
+def get_llm(model_name: Optional[str] = None) -> "ChatOpenAI":
+    """Return the shared OpenAI chat model client for a model (the standard model by default)"""
+    from langchain_openai import ChatOpenAI
+    
+    model_name = model_name or settings.OPENAI_MODEL_NAME
+    if model_name not in _chat_models:
+        _chat_models[model_name] = ChatOpenAI(
+            model_name=model_name, 
+            temperature=0.2,
+            api_key=settings.OPENAI_API_KEY,
+            http_async_client=get_llm_http_client(),
+            # Retries are done by llm_caller, around the whole workflow
+            max_retries=0,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            # Streamed responses report token usage too, for the per-model cost counters
+            stream_usage=True,
+            callbacks=[model_router.usage_callback(model_name)]
+        )
+    return _chat_models[model_name]
 
 # Summarization chain
-def create_summarization_chain():
+def create_summarization_chain(llm: "ChatOpenAI"):
     """Create a chain for summarizing meeting notes"""
-    llm = get_llm()
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
     
     summarize_prompt_template = ChatPromptTemplate.from_messages([
         ("system", "You are a helpful assistant that summarizes meeting notes concisely."),
@@ -38,14 +105,13 @@ def create_summarization_chain():
     ])
     
     summarization_chain = summarize_prompt_template | llm | StrOutputParser()
-    return summarization_chain
+    return instrument(summarization_chain, "summarize")
 
-# Task extraction chain
-def create_task_extraction_chain():
-    """Create a chain for extracting tasks from meeting notes"""
-    llm = get_llm()
+# Task extraction prompt
+def create_task_extraction_prompt():
+    """Create the prompt used to extract tasks from meeting notes"""
+    from langchain_core.prompts import ChatPromptTemplate
     
-    # Task extraction prompt
     task_extraction_prompt_text = """
     Extract all distinct action items from the provided meeting notes. For each action item:
     1. Provide a clear and concise "description" of the task.
@@ -61,20 +127,84 @@ def create_task_extraction_chain():
       ]
     }}
 
+    {context}
+
     Meeting Notes:
     {notes_text}
     """
     
-    task_extraction_prompt_template = ChatPromptTemplate.from_messages([
+    return ChatPromptTemplate.from_messages([
         ("system", "You are an expert assistant skilled in extracting structured task information from text."),
         ("user", task_extraction_prompt_text)
     ])
+
+# Task extraction chain
+def create_task_extraction_chain(llm: "ChatOpenAI"):
+    """Create a chain for extracting tasks from meeting notes"""
+    from langchain_core.output_parsers import PydanticOutputParser
     
-    # Using JsonOutputParser
     output_parser = PydanticOutputParser(pydantic_object=ExtractedTaskList)
-    task_extraction_chain = task_extraction_prompt_template | llm | output_parser
+    task_extraction_chain = create_task_extraction_prompt() | llm | output_parser.with_config(run_name="parse_tasks")
+    
+    return instrument(task_extraction_chain, "extract_tasks")
+
+# Summary merge chain (reduce step for chunked notes)
+def create_summary_merge_chain(llm: "ChatOpenAI"):
+    """Create a chain that merges partial summaries of consecutive note sections"""
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    
+    merge_prompt_template = ChatPromptTemplate.from_messages([
+        ("system", "You are a helpful assistant that summarizes meeting notes concisely."),
+        ("user", "The following are summaries of consecutive sections of the same meeting. "
+                 "Combine them into a single concise summary of the whole meeting:\n\n{partial_summaries}")
+    ])
     
-    return task_extraction_chain
+    return instrument(merge_prompt_template | llm | StrOutputParser(), "merge_summaries")
+
+# Single-pass chain (summary and tasks in one model call)
+def create_combined_chain(llm: "ChatOpenAI"):
+    """Create a chain that summarizes notes and extracts tasks with a single model call"""
+    from langchain_core.output_parsers import PydanticOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    
+    combined_prompt_text = """
+    Analyze the provided meeting notes and respond with:
+    1. A concise "summary" of the meeting notes.
+    2. A list of all distinct action items as "tasks". For each action item provide a clear and concise "description" and, if a specific "due_date" is mentioned, provide it in YYYY-MM-DD format. If no due date is explicitly mentioned, set due_date to null.
+
+    Respond ONLY with a valid JSON object containing the keys "summary" and "tasks". If no action items are found, return an empty list for "tasks".
+
+    Example:
+    {{
+      "summary": "The team reviewed the Q3 roadmap and agreed on budget priorities.",
+      "tasks": [
+        {{"description": "Send follow-up email to John Doe", "due_date": "2025-06-15"}},
+        {{"description": "Prepare Q3 budget report", "due_date": null}}
+      ]
+    }}
+
+    {context}
+
+    Meeting Notes:
+    {notes_text}
+    """
+    
+    combined_prompt_template = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert assistant that summarizes meeting notes and extracts structured task information from them."),
+        ("user", combined_prompt_text)
+    ])
+    
+    output_parser = PydanticOutputParser(pydantic_object=MeetingAnalysis)
+    combined_chain = combined_prompt_template | llm | output_parser.with_config(run_name="parse_analysis")
+    
+    return instrument(combined_chain, "analyze")
+
+def split_combined_output(analysis: MeetingAnalysis) -> Dict[str, Any]:
+    """
+    Reshape the single-pass output into the same structure produced by processing_pipeline.
+    """
+    return {"summary": analysis.summary, "tasks": ExtractedTaskList(tasks=analysis.tasks)}
 
 def format_final_output(processed_output: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
     """
@@ -89,31 +219,356 @@ def format_final_output(processed_output: Dict[str, Any]) -> Tuple[str, List[Dic
     
     return summary, tasks_as_dict
 
-processing_pipeline = RunnableParallel(
-    summary = create_summarization_chain(),
-    tasks = create_task_extraction_chain()
-)
+class ModelChains:
+    """The chains and workflows of one chat model, all sharing its client"""
+
+    def __init__(self, model_name: str):
+        from langchain_core.output_parsers import JsonOutputParser
+        from langchain_core.runnables import RunnableLambda, RunnableParallel
+        
+        llm = get_llm(model_name)
+        self.summarization_chain = create_summarization_chain(llm)
+        
+        processing_pipeline = RunnableParallel(
+            summary = self.summarization_chain,
+            tasks = create_task_extraction_chain(llm)
+        )
+        
+        # Streaming task extraction: JsonOutputParser yields the partially parsed document as tokens arrive
+        self.task_extraction_stream_chain = instrument(
+            create_task_extraction_prompt() | llm | JsonOutputParser(), "extract_tasks_stream"
+        )
+        
+        self.agentic_workflow = processing_pipeline | RunnableLambda(format_final_output)
+        
+        # Single-pass workflow, falling back to the two-chain workflow if the combined output cannot be used
+        self.single_pass_workflow = (
+            create_combined_chain(llm) | RunnableLambda(split_combined_output) | RunnableLambda(format_final_output)
+        ).with_fallbacks([self.agentic_workflow])
+        
+        self.summary_merge_chain = create_summary_merge_chain(llm)
+    
+    @property
+    def workflow(self):
+        """The workflow for the configured AI processing mode"""
+        if settings.AI_PROCESSING_MODE == "single":
+            return self.single_pass_workflow
+        return self.agentic_workflow
+
+_model_chains: Dict[str, ModelChains] = {}
+# Chains may be built by the warm-up thread and a request at the same time
+_model_chains_lock = threading.Lock()
+
+def get_model_chains(model_name: Optional[str] = None) -> ModelChains:
+    """
+    Return the chains of a model (the standard model by default), building them on first use.
+    The first build imports LangChain; from the event loop use aget_model_chains.
+    """
+    model_name = model_name or settings.OPENAI_MODEL_NAME
+    chains = _model_chains.get(model_name)
+    if chains is None:
+        with _model_chains_lock:
+            if model_name not in _model_chains:
+                _model_chains[model_name] = ModelChains(model_name)
+            chains = _model_chains[model_name]
+    return chains
+
+async def aget_model_chains(model_name: Optional[str] = None) -> ModelChains:
+    """get_model_chains that builds missing chains in a worker thread instead of blocking the event loop"""
+    chains = _model_chains.get(model_name or settings.OPENAI_MODEL_NAME)
+    if chains is not None:
+        return chains
+    return await asyncio.to_thread(get_model_chains, model_name)
+
+def get_workflow(model_name: Optional[str] = None):
+    """Return the workflow for the configured AI processing mode"""
+    return get_model_chains(model_name).workflow
+
+def preload_llm_stack() -> None:
+    """
+    Import LangChain and the OpenAI SDK without creating any client or chain, e.g. in a
+    server process before it forks its workers.
+    """
+    import httpcore
+    import langchain_core.output_parsers
+    import langchain_core.prompts.chat
+    import langchain_core.runnables
+    import langchain_openai
+    import openai.resources.chat
+
+def warm_up_llm() -> None:
+    """Build the chains of the routed models ahead of the first notes (blocking; run it in a thread)"""
+    started = time.perf_counter()
+    try:
+        get_model_chains(model_router.standard_model)
+        if model_router.fast_model is not None:
+            get_model_chains(model_router.fast_model)
+    except Exception as e:
+        print(f"Error in warm_up_llm: {e}")
+        raise
+    print(f"LLM chains ready in {time.perf_counter() - started:.2f}s")
+
+async def process_chunked_notes(
+    chunks: List[str],
+    model_name: Optional[str] = None,
+    context: str = ""
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Map-reduce processing for long notes: run the workflow on every chunk with bounded
+    parallelism, then merge the partial summaries and deduplicate the extracted tasks.
+    """
+    chains = await aget_model_chains(model_name)
+    partial_results = await chains.workflow.abatch(
+        [{"notes_text": chunk, "context": context} for chunk in chunks],
+        config={"max_concurrency": settings.AI_CHUNK_CONCURRENCY}
+    )
+    
+    partial_summaries = [summary for summary, _ in partial_results]
+    tasks = merge_task_dicts([chunk_tasks for _, chunk_tasks in partial_results])
+    
+    summary = await chains.summary_merge_chain.ainvoke({
+        "partial_summaries": "\n\n".join(
+            f"Section {i}:\n{summary}" for i, summary in enumerate(partial_summaries, start=1)
+        )
+    })
+    return summary, tasks
+
+async def analyze_routed(text: str, model_name: str, context: str = "") -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Run the workflow on the model the router chose; a fast-model result that fails
+    validation or the confidence check is redone on the standard model.
+    """
+    if model_name != model_router.standard_model:
+        from langchain_core.exceptions import OutputParserException
+
+        try:
+            chains = await aget_model_chains(model_name)
+            summary, tasks = await chains.workflow.ainvoke({"notes_text": text, "context": context})
+            if model_router.is_confident(text, summary, tasks):
+                return summary, tasks
+            model_router.record_escalation("low_confidence")
+        except (OutputParserException, ValidationError) as e:
+            print(f"Escalating notes from {model_name}: {e}")
+            model_router.record_escalation("invalid")
+    chains = await aget_model_chains(model_router.standard_model)
+    return await chains.workflow.ainvoke({"notes_text": text, "context": context})
+
+def get_cache_namespace(pre: Optional[PreExtraction] = None) -> str:
+    """
+    Cache namespace for results of the current model routing, prompts and processing mode.
+    Results of notes with relative dates are only valid for the date they were resolved against.
+    """
+    namespace = f"{model_router.routing_key}:{PROMPT_VERSION}:{settings.AI_PROCESSING_MODE}"
+    if pre is not None and pre.has_relative_dates:
+        namespace += f":{pre.reference_date.isoformat()}"
+    return namespace
 
-agentic_workflow = processing_pipeline | RunnableLambda(format_final_output)
+def run_pre_extraction(text: str, timezone: Optional[str] = None) -> PreExtraction:
+    """Rule-based pass over the notes, before any model call"""
+    reference = reference_date_for(timezone)
+    if not settings.AI_PRE_EXTRACT_ENABLED:
+        return PreExtraction(reference_date=reference)
+    with span("pre_extract"):
+        return pre_extract(text, reference)
 
-async def generate_summary_and_extract_tasks(text: str) -> Tuple[str, List[Dict[str, Any]]]:
+def llm_calls_per_note() -> int:
+    """LLM requests the configured workflow makes for notes that fit in one chunk"""
+    return 1 if settings.AI_PROCESSING_MODE == "single" else 2
+
+def estimate_note_tokens(text: str) -> int:
+    """Rough number of LLM tokens (prompt and completion) processing the notes will use"""
+    return llm_calls_per_note() * (count_tokens(text) + 500)
+
+async def generate_summary_and_extract_tasks(
+    text: str,
+    user_id: Optional[str] = None,
+    priority: str = INTERACTIVE,
+    timezone: Optional[str] = None
+) -> Tuple[str, List[Dict[str, Any]]]:
     """
     Process meeting notes to generate a summary and extract tasks.
     
+    A rule-based pass runs first: notes made only of action items are handled without a
+    model call, otherwise its candidate tasks and today's date are passed to the prompts.
+    Users over their daily token quota are rejected before any LLM work is queued.
+    LLM work is admitted by the shared scheduler under the user's fair share and priority,
+    and retried with backoff (and optionally hedged) by llm_caller; its token usage is
+    billed to the user.
+    
     Args:
         text (str): The meeting notes text to process
+        user_id (str): The user the work is scheduled for
+        priority (str): "interactive" or "batch"
+        timezone (str): IANA time zone relative due dates are resolved in
         
     Returns:
         Tuple containing:
         - summary (str): A concise summary of the meeting notes
         - tasks (List[dict]): List of extracted tasks with description and optional due_date
+    
+    Raises:
+        TokenQuotaExceededError: the user has used up today's token quota
+        LLMUnavailableError: retries are exhausted or the circuit breaker is open
+        SchedulerFullError: too many requests are already waiting for the LLM
     """
-    try:
-        # Initialize chains
-        result = await agentic_workflow.ainvoke({"notes_text": text})
-        return result[0], result[1]
+    pre = run_pre_extraction(text, timezone)
+    if pre.trivial:
+        return pre.summary(), [task.model_dump() for task in pre.tasks]
+    
+    cache_namespace = get_cache_namespace(pre)
+    if settings.LLM_CACHE_ENABLED:
+        with span("llm.cache_lookup"):
+            cached = await llm_cache.get(cache_namespace, text, owner=user_id)
+        if cached is not None:
+            return cached
     
+    await token_usage.check_quota(user_id)
+    
+    # Long notes are split into chunks and processed map-reduce style
+    token_count = count_tokens(text)
+    chunks = chunk_text(text, settings.AI_CHUNK_MAX_TOKENS) if token_count > settings.AI_CHUNK_MAX_TOKENS else [text]
+    model_name = model_router.choose(token_count)
+    calls = llm_calls_per_note()
+    try:
+        with billed_to(user_id):
+            async with llm_scheduler.slot(
+                user_id,
+                priority,
+                tokens=estimate_note_tokens(text),
+                requests=len(chunks) * calls + (1 if len(chunks) > 1 else 0),
+                parallel=min(len(chunks), settings.AI_CHUNK_CONCURRENCY) * calls
+            ):
+                if len(chunks) > 1:
+                    # Candidate tasks of the whole note would be misleading for a single chunk
+                    context = PreExtraction(reference_date=pre.reference_date).prompt_context()
+                    summary, tasks = await llm_caller.call(lambda: process_chunked_notes(chunks, model_name, context))
+                else:
+                    summary, tasks = await llm_caller.call(lambda: analyze_routed(text, model_name, pre.prompt_context()))
     except Exception as e:
         print(f"Error in generate_summary_and_extract_tasks: {e}")
-        # Return minimal results in case of error
-        return "Error generating summary.", []
\ No newline at end of file
+        raise
+    
+    if settings.LLM_CACHE_ENABLED:
+        await llm_cache.set(cache_namespace, text, (summary, tasks), owner=user_id)
+    return summary, tasks
+
+def _validate_streamed_task(task: Any) -> Optional[Dict[str, Any]]:
+    """Validate one streamed task object, returning None if it is malformed"""
+    try:
+        return ExtractedTaskItem.model_validate(task).model_dump()
+    except Exception:
+        return None
+
+async def stream_summary_and_extract_tasks(
+    text: str,
+    user_id: Optional[str] = None,
+    timezone: Optional[str] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream the processing of meeting notes.
+    
+    Yields (event, data) pairs:
+        - ("summary_token", str): a piece of the summary as the model produces it
+        - ("task", dict): an extracted task, as soon as its JSON object is complete
+        - ("result", (summary, tasks)): the final summary and task list
+    
+    Cached results, notes handled by the rule-based pass and long notes that need
+    map-reduce processing are not streamed token by token; their summary is emitted as
+    a single piece.
+    """
+    pre = run_pre_extraction(text, timezone)
+    cache_namespace = get_cache_namespace(pre)
+    result = None
+    if pre.trivial:
+        result = pre.summary(), [task.model_dump() for task in pre.tasks]
+    elif settings.LLM_CACHE_ENABLED:
+        result = await llm_cache.get(cache_namespace, text, owner=user_id)
+    token_count = count_tokens(text)
+    if result is None and token_count > settings.AI_CHUNK_MAX_TOKENS:
+        result = await generate_summary_and_extract_tasks(text, user_id, timezone=timezone)
+    if result is not None:
+        summary, tasks = result
+        yield "summary_token", summary
+        for task in tasks:
+            yield "task", task
+        yield "result", (summary, tasks)
+        return
+    
+    await token_usage.check_quota(user_id)
+    
+    # Streamed output reaches the client as it is produced, so it is never escalated
+    chains = await aget_model_chains(model_router.choose(token_count))
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    summary_parts: List[str] = []
+    tasks: List[Dict[str, Any]] = []
+    
+    async def produce_summary():
+        try:
+            async for token in chains.summarization_chain.astream({"notes_text": text}):
+                if not token:
+                    continue
+                summary_parts.append(token)
+                await queue.put(("summary_token", token))
+        finally:
+            await queue.put(done)
+    
+    async def produce_tasks():
+        try:
+            raw_tasks: List[Any] = []
+            emitted = 0
+            async for partial in chains.task_extraction_stream_chain.astream({"notes_text": text, "context": pre.prompt_context()}):
+                raw_tasks = partial.get("tasks") if isinstance(partial, dict) else None
+                if not isinstance(raw_tasks, list):
+                    raw_tasks = []
+                # Every task except the last one in the partial document is complete
+                while emitted < len(raw_tasks) - 1:
+                    task = _validate_streamed_task(raw_tasks[emitted])
+                    emitted += 1
+                    if task:
+                        tasks.append(task)
+                        await queue.put(("task", task))
+            for raw_task in raw_tasks[emitted:]:
+                task = _validate_streamed_task(raw_task)
+                if task:
+                    tasks.append(task)
+                    await queue.put(("task", task))
+        finally:
+            await queue.put(done)
+    
+    # Tokens are sent to the client as they arrive, so a failed stream is not retried;
+    # it still counts towards the circuit breaker
+    # The summary and the task list stream from two parallel requests
+    calls = 2
+    async with llm_scheduler.slot(user_id, INTERACTIVE, tokens=calls * (token_count + 500), requests=calls):
+        # Checked once the slot is held, so a half-open trial is only claimed by a call
+        # that reaches the try below and reports its outcome
+        llm_breaker.before_call()
+        # The producer tasks copy the context, and with it the user their tokens are billed to
+        with billed_to(user_id):
+            producers = [asyncio.create_task(produce_summary()), asyncio.create_task(produce_tasks())]
+        try:
+            remaining = len(producers)
+            while remaining:
+                item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                    continue
+                yield item
+            # Surface any producer error
+            await asyncio.gather(*producers)
+        except (asyncio.CancelledError, GeneratorExit):
+            llm_breaker.cancel_trial()
+            raise
+        except Exception as e:
+            llm_breaker.record_failure(e)
+            raise
+        finally:
+            for producer in producers:
+                producer.cancel()
+    
+    llm_breaker.record_success()
+    summary = "".join(summary_parts)
+    if settings.LLM_CACHE_ENABLED:
+        await llm_cache.set(cache_namespace, text, (summary, tasks), owner=user_id)
+    yield "result", (summary, tasks)
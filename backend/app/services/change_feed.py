@@ -0,0 +1,198 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.db.task_events import add_task_listener
+
+# A feed message: {"user_id": ..., "action": "created" | "updated" | "deleted", "tasks": [...]}
+Deliver = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class ChangeFeedFullError(Exception):
+    """Raised when this worker already holds CHANGE_FEED_MAX_CONNECTIONS feed connections"""
+
+class LocalBroker:
+    """Delivers messages to this process only (single worker, or a stand-in for a real broker)"""
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        await self._deliver(message)
+
+    async def stop(self) -> None:
+        pass
+
+class RedisBroker:
+    """
+    Fans messages out to every worker through Redis pub/sub.
+    Each worker receives its own publishes back and delivers them to its local subscribers.
+    """
+
+    def __init__(self, client, channel: str = "taskflow:task-changes"):
+        self.client = client
+        self.channel = channel
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message["type"] == "message":
+                        await self._deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in change feed listener: {e}")
+                await asyncio.sleep(1)
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        try:
+            await self.client.publish(self.channel, json.dumps(message))
+        except Exception as e:
+            # Other workers miss this change, but this worker's subscribers still get it
+            print(f"Error publishing task change: {e}")
+            await self._deliver(message)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+class Subscription:
+    """One feed connection: a bounded buffer of pre-formatted SSE frames"""
+
+    __slots__ = ("user_id", "max_buffer", "evicted", "closed", "_buffer", "_wakeup")
+
+    def __init__(self, user_id: str, max_buffer: int):
+        self.user_id = user_id
+        self.max_buffer = max_buffer
+        self.evicted = False
+        self.closed = False
+        self._buffer: deque = deque()
+        self._wakeup = asyncio.Event()
+
+    def push(self, frame: str) -> bool:
+        """Queue a frame without blocking. Returns False, and evicts, if the consumer has fallen behind."""
+        if len(self._buffer) >= self.max_buffer:
+            self.evicted = True
+            self._buffer.clear()
+            self._wakeup.set()
+            return False
+        self._buffer.append(frame)
+        self._wakeup.set()
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    async def next_frames(self, timeout: float) -> List[str]:
+        """Wait up to timeout for frames and return everything buffered"""
+        if not self._buffer and not (self.evicted or self.closed):
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._wakeup.clear()
+        frames = list(self._buffer)
+        self._buffer.clear()
+        return frames
+
+class ChangeFeed:
+    """
+    In-process pub/sub of task changes for the real-time feed.
+
+    supabase_ops writes publish through the broker; the broker delivers each message
+    to the subscribers of that user on this worker. Every message is serialized once,
+    however many connections receive it. A connection whose buffer fills up is evicted
+    instead of holding memory or slowing down delivery to the others.
+    """
+
+    def __init__(self, broker, max_buffer: int, max_connections: int):
+        self.broker = broker
+        self.max_buffer = max_buffer
+        self.max_connections = max_connections
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._connections = 0
+        self.stats = {"published": 0, "delivered": 0, "evictions": 0}
+
+    async def start(self) -> None:
+        await self.broker.start(self._deliver)
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+        # End all open streams so the server can shut down
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.close()
+
+    def subscribe(self, user_id: str) -> Subscription:
+        if self._connections >= self.max_connections:
+            raise ChangeFeedFullError("Too many open change feed connections")
+        subscription = Subscription(user_id, self.max_buffer)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        self._connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.discard(subscription)
+            self._connections -= 1
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+    async def _deliver(self, message: Dict[str, Any]) -> None:
+        subscriptions = self._subscribers.get(message["user_id"])
+        if not subscriptions:
+            return
+        frame = f"event: {message['action']}\ndata: {json.dumps({'tasks': message['tasks']})}\n\n"
+        for subscription in list(subscriptions):
+            if subscription.push(frame):
+                self.stats["delivered"] += 1
+            else:
+                self.stats["evictions"] += 1
+                self.unsubscribe(subscription)
+
+    async def on_task_change(self, user_id: str, action: str, rows: List[Dict[str, Any]]) -> None:
+        """Task listener publishing every write to the feed"""
+        self.stats["published"] += 1
+        await self.broker.publish({"user_id": user_id, "action": action, "tasks": rows})
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "broker": type(self.broker).__name__,
+            "connections": self._connections,
+            "users": len(self._subscribers)
+        }
+
+def _create_broker():
+    if settings.CHANGE_FEED_BROKER == "redis":
+        client = get_redis()
+        if client is not None:
+            return RedisBroker(client)
+        print("CHANGE_FEED_BROKER is redis but Redis is unavailable; using the local broker")
+    return LocalBroker()
+
+change_feed = ChangeFeed(
+    broker=_create_broker(),
+    max_buffer=settings.CHANGE_FEED_BUFFER_SIZE,
+    max_connections=settings.CHANGE_FEED_MAX_CONNECTIONS
+)
+
+add_task_listener(change_feed.on_task_change)
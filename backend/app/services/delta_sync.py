@@ -0,0 +1,120 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.db.supabase_ops import get_changed_tasks, get_changed_notes, get_tombstones
+
+# A sync cursor is an opaque encoding of (watermark, caught_up).
+# The watermark is the newest change timestamp the client has seen. Once a client
+# is caught up, the next sync re-reads SYNC_OVERLAP_SECONDS before the watermark,
+# so rows committed late with an earlier timestamp are not missed; the extra rows
+# are idempotent upserts. Cursors handed out mid-backlog (has_more) skip the overlap
+# so paging always moves forward.
+SyncCursor = Tuple[datetime, bool]
+
+class SyncCursorExpiredError(Exception):
+    """The cursor is older than the tombstone retention; the client must resync from scratch"""
+
+def encode_sync_cursor(watermark: datetime, caught_up: bool) -> str:
+    raw = json.dumps([watermark.isoformat(), int(caught_up)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_sync_cursor(cursor: Optional[str]) -> Optional[SyncCursor]:
+    """Decode a cursor produced by encode_sync_cursor. Raises ValueError if it is malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        watermark, caught_up = json.loads(raw)
+        watermark = datetime.fromisoformat(watermark)
+        if watermark.tzinfo is None:
+            raise ValueError
+        return watermark, bool(caught_up)
+    except Exception:
+        raise ValueError("Invalid sync cursor")
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def _page_cut(rows: List[Dict[str, Any]], column: str, limit: int) -> Optional[datetime]:
+    """
+    Latest timestamp that can be returned from limit + 1 fetched rows, or None if all
+    rows fit. Rows tied with the first row left out are deferred to the next page too,
+    unless every row shares that timestamp: then the page ends at it, and the rest of
+    that group has to be fetched (see _overflows_at).
+    """
+    if len(rows) <= limit:
+        return None
+    first_left_out = _parse_time(rows[limit][column])
+    for row in reversed(rows[:limit]):
+        changed_at = _parse_time(row[column])
+        if changed_at < first_left_out:
+            return changed_at
+    return first_left_out
+
+def _overflows_at(rows: List[Dict[str, Any]], column: str, limit: int, boundary: datetime) -> bool:
+    """Whether rows at the boundary timestamp may be missing from the limit + 1 fetched rows"""
+    return len(rows) > limit and _parse_time(rows[limit][column]) == boundary
+
+async def get_sync_changes(user_id: UUID, since: Optional[SyncCursor], limit: int) -> Dict[str, Any]:
+    """
+    Collect the user's task and note upserts and deletions after the cursor.
+    Without a cursor this is a full snapshot (paged like any other sync).
+    """
+    lower = None
+    if since is not None:
+        watermark, caught_up = since
+        if watermark < datetime.now(timezone.utc) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            raise SyncCursorExpiredError("Sync cursor has expired, resync without since")
+        lower = watermark - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS) if caught_up else watermark
+
+    # One extra row per stream tells whether there is more after this page
+    tasks, notes, tombstones = await asyncio.gather(
+        get_changed_tasks(user_id, lower, limit + 1),
+        get_changed_notes(user_id, lower, limit + 1),
+        # A full snapshot has nothing to delete on the client
+        get_tombstones(user_id, lower, limit + 1) if since is not None else asyncio.sleep(0, [])
+    )
+    streams = [(tasks, "updated_at"), (notes, "updated_at"), (tombstones, "deleted_at")]
+    fetchers = (get_changed_tasks, get_changed_notes, get_tombstones)
+
+    # The page ends at the earliest cut of any stream that overflowed
+    cuts = [cut for rows, column in streams if (cut := _page_cut(rows, column, limit)) is not None]
+    boundary = min(cuts) if cuts else None
+    if boundary is not None:
+        # The next page starts after the boundary, so a group of more than limit rows
+        # sharing it is returned whole, even though that makes this page longer
+        streams = [
+            (await fetch(user_id, lower, None, until=boundary) if _overflows_at(rows, column, limit, boundary) else rows,
+             column)
+            for fetch, (rows, column) in zip(fetchers, streams)
+        ]
+        streams = [
+            ([row for row in rows if _parse_time(row[column]) <= boundary], column)
+            for rows, column in streams
+        ]
+
+    if boundary is not None:
+        cursor = encode_sync_cursor(boundary, caught_up=False)
+    else:
+        seen = [_parse_time(row[column]) for rows, column in streams for row in rows]
+        if since is not None:
+            seen.append(since[0])
+        watermark = max(seen) if seen else datetime.fromtimestamp(0, timezone.utc)
+        cursor = encode_sync_cursor(watermark, caught_up=True)
+
+    (tasks, _), (notes, _), (tombstones, _) = streams
+    return {
+        "tasks": tasks,
+        "notes": notes,
+        "deleted": {
+            "tasks": [row["record_id"] for row in tombstones if row["table_name"] == "tasks"],
+            "notes": [row["record_id"] for row in tombstones if row["table_name"] == "meeting_notes"],
+        },
+        "cursor": cursor,
+        "has_more": boundary is not None,
+    }
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+from app.db.supabase_ops import get_daily_digest_tasks, digest_bucket
+from app.db.task_events import add_task_listener
+
+def digest_sort_key(task: Dict[str, Any], today: date) -> Tuple[int, str, float]:
+    """Digest ordering: priority bucket, earliest due date, then newest first (same as get_daily_digest)"""
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+    created_at = task.get("created_at")
+    created_ts = datetime.fromisoformat(created_at.replace("Z", "+00:00")).timestamp() if created_at else 0.0
+    return digest_bucket(task, today, week_start, week_end), task.get("due_date") or "9999-12-31", -created_ts
+
+@dataclass
+class DigestEntry:
+    today: date
+    limit: int
+    tasks: List[Dict[str, Any]]
+    computed_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def is_full(self) -> bool:
+        """A full entry may be hiding lower-ranked tasks; a non-full entry holds all of the user's tasks"""
+        return len(self.tasks) >= self.limit
+
+class DigestStore:
+    """
+    Materialized daily digests, per user and per (time zone, digest size).
+
+    Reads are dictionary lookups. Task writes published by supabase_ops update the
+    stored digests in place; when a write removes a task from a full digest, the
+    replacement is unknown, so that entry is dropped and recomputed on the next read.
+    Entries are also recomputed once they are older than DIGEST_MAX_STALENESS_SECONDS
+    (which bounds staleness from writes made by other processes) and when the date
+    rolls over in their time zone.
+    """
+
+    def __init__(self, max_users: int, max_staleness: float):
+        self.max_users = max_users
+        self.max_staleness = max_staleness
+        self._entries: "OrderedDict[str, Dict[Tuple[str, int], DigestEntry]]" = OrderedDict()
+        self._rollover_task: Optional[asyncio.Task] = None
+        # Incremented on every task write, so a digest computed concurrently with a write is not stored
+        self._write_version = 0
+        self.stats = {"hits": 0, "misses": 0, "incremental_updates": 0, "invalidations": 0, "rollovers": 0}
+
+    def _is_fresh(self, entry: DigestEntry, today: date) -> bool:
+        return entry.today == today and time.monotonic() - entry.computed_at <= self.max_staleness
+
+    def _store(self, user_id: str, tz: str, entry: DigestEntry) -> None:
+        self._entries.setdefault(user_id, {})[(tz, entry.limit)] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    async def get_digest(self, user_id: UUID, tz: str, today: date, limit: int) -> List[Dict[str, Any]]:
+        """Return the user's digest, computing it only if no fresh materialized copy exists"""
+        key = str(user_id)
+        entry = self._entries.get(key, {}).get((tz, limit))
+        if entry is not None and self._is_fresh(entry, today):
+            self.stats["hits"] += 1
+            self._entries.move_to_end(key)
+            return list(entry.tasks)
+
+        self.stats["misses"] += 1
+        write_version = self._write_version
+        tasks = await get_daily_digest_tasks(user_id, today, limit)
+        if write_version == self._write_version:
+            self._store(key, tz, DigestEntry(today=today, limit=limit, tasks=list(tasks)))
+        return tasks
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop every materialized digest of a user"""
+        if self._entries.pop(user_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def _apply(self, entry: DigestEntry, action: str, rows: List[Dict[str, Any]]) -> bool:
+        """Apply a task write to one entry. Returns False if the entry can no longer be kept exact."""
+        for row in rows:
+            was_full = entry.is_full
+            before = len(entry.tasks)
+            entry.tasks = [task for task in entry.tasks if task["id"] != row["id"]]
+            removed = len(entry.tasks) < before
+
+            if action == "deleted":
+                if removed and was_full:
+                    return False
+                continue
+
+            key = digest_sort_key(row, entry.today)
+            ranks_in = not was_full or (entry.tasks and key < digest_sort_key(entry.tasks[-1], entry.today))
+            if ranks_in:
+                entry.tasks.append(row)
+                entry.tasks.sort(key=lambda task: digest_sort_key(task, entry.today))
+                del entry.tasks[entry.limit:]
+            elif removed:
+                # The task dropped out of a full digest; the task that replaces it is unknown
+                return False
+        return True
+
+    async def on_task_change(self, user_id: str, action: str, rows: List[Dict[str, Any]]) -> None:
+        """Task listener keeping materialized digests in sync with writes"""
+        self._write_version += 1
+        entries = self._entries.get(user_id)
+        if not entries:
+            return
+        for entry_key, entry in list(entries.items()):
+            if self._apply(entry, action, rows):
+                self.stats["incremental_updates"] += 1
+            else:
+                del entries[entry_key]
+                self.stats["invalidations"] += 1
+
+    async def refresh_rollovers(self) -> int:
+        """Recompute entries whose date has rolled over in their time zone"""
+        refreshed = 0
+        for user_id, entries in list(self._entries.items()):
+            for (tz, limit), entry in list(entries.items()):
+                today = datetime.now(ZoneInfo(tz)).date()
+                if entry.today == today:
+                    continue
+                try:
+                    tasks = await get_daily_digest_tasks(UUID(user_id), today, limit)
+                    self._store(user_id, tz, DigestEntry(today=today, limit=limit, tasks=list(tasks)))
+                    refreshed += 1
+                except Exception as e:
+                    print(f"Error refreshing daily digest for {user_id}: {e}")
+                    entries.pop((tz, limit), None)
+        self.stats["rollovers"] += refreshed
+        return refreshed
+
+    async def _rollover_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh_rollovers()
+
+    def start(self) -> None:
+        """Start the scheduled date-rollover refresh"""
+        if self._rollover_task is None:
+            self._rollover_task = asyncio.create_task(self._rollover_loop(settings.DIGEST_ROLLOVER_CHECK_SECONDS))
+
+    async def stop(self) -> None:
+        if self._rollover_task is not None:
+            self._rollover_task.cancel()
+            await asyncio.gather(self._rollover_task, return_exceptions=True)
+            self._rollover_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "users": len(self._entries)}
+
+digest_store = DigestStore(
+    max_users=settings.DIGEST_CACHE_MAX_USERS,
+    max_staleness=settings.DIGEST_MAX_STALENESS_SECONDS
+)
+
+add_task_listener(digest_store.on_task_change)
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+MAX_KEY_LENGTH = 255
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: bytes
+    expires_at: float
+
+class IdempotencyKeyReusedError(Exception):
+    """The key was already used for a different request"""
+
+class IdempotencyInProgressError(Exception):
+    """Another worker is still executing the request and did not finish in time"""
+
+class IdempotencyStore:
+    """
+    Responses of requests made with an Idempotency-Key, kept for ttl_seconds.
+
+    The first request with a key executes; concurrent duplicates in this worker wait for
+    its outcome (single-flight) and later duplicates replay the stored response. Failed
+    executions are not stored, so the client can retry them. With a shared Redis backend,
+    responses are stored in Redis too and a lock makes duplicates arriving at other
+    workers wait for the stored response instead of executing again. The lock expires
+    after lock_seconds but is extended while the request executes, so it only lapses
+    early when the worker holding it dies.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, lock_seconds: int,
+                 redis_client=None, prefix: str = "taskflow:idem:"):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock_seconds = lock_seconds
+        self.redis = redis_client
+        self.prefix = prefix
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self.stats = {"executed": 0, "replayed": 0, "collapsed": 0, "conflicts": 0, "errors": 0}
+
+    def _put_local(self, key: str, stored: StoredResponse) -> None:
+        self._entries[key] = stored
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get(self, key: str) -> Optional[StoredResponse]:
+        stored = self._entries.get(key)
+        if stored is not None:
+            if stored.expires_at > time.time():
+                return stored
+            del self._entries[key]
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(f"{self.prefix}{key}")
+                if raw is not None:
+                    data = json.loads(raw)
+                    stored = StoredResponse(data["fingerprint"], data["status_code"], data["body"].encode(), data["expires_at"])
+                    self._put_local(key, stored)
+                    return stored
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error reading shared idempotency store: {e}")
+        return None
+
+    async def _put(self, key: str, stored: StoredResponse) -> None:
+        self._put_local(key, stored)
+        if self.redis is not None:
+            try:
+                raw = json.dumps({
+                    "fingerprint": stored.fingerprint,
+                    "status_code": stored.status_code,
+                    "body": stored.body.decode(),
+                    "expires_at": stored.expires_at
+                })
+                await self.redis.set(f"{self.prefix}{key}", raw, ex=self.ttl_seconds)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error writing shared idempotency store: {e}")
+
+    def _check(self, fingerprint: str, stored_fingerprint: str) -> None:
+        if fingerprint != stored_fingerprint:
+            self.stats["conflicts"] += 1
+            raise IdempotencyKeyReusedError("Idempotency-Key was already used with a different request")
+
+    async def _lock(self, key: str, fingerprint: str) -> bool:
+        """Take the cross-worker execution lock; always succeeds without Redis"""
+        if self.redis is None:
+            return True
+        try:
+            return bool(await self.redis.set(f"{self.prefix}lock:{key}", fingerprint, nx=True, ex=self.lock_seconds))
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Error taking idempotency lock: {e}")
+            return True
+
+    async def _keep_locked(self, key: str) -> None:
+        """Extend the execution lock every third of its lifetime until cancelled"""
+        while True:
+            await asyncio.sleep(self.lock_seconds / 3)
+            try:
+                await self.redis.expire(f"{self.prefix}lock:{key}", self.lock_seconds)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error extending idempotency lock: {e}")
+
+    async def _unlock(self, key: str) -> None:
+        if self.redis is not None:
+            try:
+                await self.redis.delete(f"{self.prefix}lock:{key}")
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error releasing idempotency lock: {e}")
+
+    async def _wait_for_other_worker(self, key: str) -> Optional[StoredResponse]:
+        """Wait for another worker's response; None if it released the lock without one"""
+        deadline = time.monotonic() + self.lock_seconds
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+            stored = await self._get(key)
+            if stored is not None:
+                return stored
+            try:
+                if not await self.redis.exists(f"{self.prefix}lock:{key}"):
+                    # The other worker failed; failures are not stored
+                    return None
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error checking idempotency lock: {e}")
+                return None
+        raise IdempotencyInProgressError("A request with this Idempotency-Key is still being processed")
+
+    async def run(self, key: str, fingerprint: str,
+                  execute: Callable[[], Awaitable[Tuple[int, bytes]]]) -> Tuple[StoredResponse, bool]:
+        """Return the response for the key and whether it was replayed rather than executed here"""
+        while True:
+            stored = await self._get(key)
+            if stored is not None:
+                self._check(fingerprint, stored.fingerprint)
+                self.stats["replayed"] += 1
+                return stored, True
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self._check(fingerprint, inflight[0])
+            self.stats["collapsed"] += 1
+            future = inflight[1]
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The executing request was cancelled; try again
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, future)
+        try:
+            while not await self._lock(key, fingerprint):
+                stored = await self._wait_for_other_worker(key)
+                if stored is not None:
+                    self._check(fingerprint, stored.fingerprint)
+                    self.stats["replayed"] += 1
+                    future.set_result(stored)
+                    return stored, True
+            # A request can run for longer than the lock lives (LLM retries, scheduler queueing)
+            keeper = asyncio.create_task(self._keep_locked(key)) if self.redis is not None else None
+            try:
+                self.stats["executed"] += 1
+                status_code, body = await execute()
+                stored = StoredResponse(fingerprint, status_code, body, time.time() + self.ttl_seconds)
+                await self._put(key, stored)
+            finally:
+                if keeper is not None:
+                    keeper.cancel()
+                await self._unlock(key)
+            future.set_result(stored)
+            return stored, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                # Waiters re-raise the error; mark it retrieved in case there are none
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "in_flight": len(self._inflight)}
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+    lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+    redis_client=get_redis()
+)
+
+async def idempotent_response(
+    request: Request,
+    user_id: str,
+    idempotency_key: Optional[str],
+    payload: BaseModel,
+    execute: Callable[[], Awaitable[bytes]],
+    status_code: int = status.HTTP_200_OK
+) -> Response:
+    """
+    Execute a JSON endpoint at most once per Idempotency-Key.
+    execute returns the serialized response body; replayed responses carry an
+    Idempotent-Replayed header. Without a key the request simply executes.
+    """
+    if idempotency_key is None:
+        return Response(content=await execute(), status_code=status_code, media_type="application/json")
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+    # Keys are scoped to the user and the route; the fingerprint covers the path and body
+    key = hashlib.sha256(f"{user_id}\n{request.method} {request.url.path}\n{idempotency_key}".encode()).hexdigest()
+    fingerprint = hashlib.sha256(
+        f"{request.url.path}\n".encode() + payload.model_dump_json().encode()
+    ).hexdigest()
+
+    async def run() -> Tuple[int, bytes]:
+        return status_code, await execute()
+
+    try:
+        stored, replayed = await idempotency_store.run(key, fingerprint, run)
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except IdempotencyInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e), headers={"Retry-After": "1"})
+
+    headers = {"Idempotent-Replayed": "true"} if replayed else {}
+    return Response(content=stored.body, status_code=stored.status_code, media_type="application/json", headers=headers)
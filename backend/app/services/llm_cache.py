@@ -0,0 +1,211 @@
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+CachedResult = Tuple[str, List[Dict[str, Any]]]
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8  # Band matching finds every fingerprint within SIMHASH_BANDS - 1 bits
+SIMHASH_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+SHINGLE_SIZE = 3
+
+def normalize_note_text(text: str) -> str:
+    """Normalize note text so case, punctuation and whitespace edits map to the same key"""
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+def simhash(normalized_text: str) -> int:
+    """64-bit SimHash over word shingles of already normalized text"""
+    words = normalized_text.split()
+    if len(words) >= SHINGLE_SIZE:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    else:
+        shingles = words
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return [(band, (fingerprint >> (band * SIMHASH_BAND_BITS)) & mask) for band in range(SIMHASH_BANDS)]
+
+def _serialize(result: CachedResult) -> str:
+    summary, tasks = result
+    return json.dumps(
+        {"summary": summary, "tasks": tasks},
+        default=lambda o: o.isoformat() if isinstance(o, date) else str(o)
+    )
+
+def _deserialize(raw: str) -> CachedResult:
+    data = json.loads(raw)
+    return data["summary"], data["tasks"]
+
+class RedisCacheBackend:
+    """Shared cache tier on a Redis-compatible server, so several workers reuse each other's results"""
+
+    def __init__(self, client, prefix: str = "taskflow:llm:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        raw = await self.client.get(self.prefix + key)
+        return raw.decode() if isinstance(raw, bytes) else raw
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self.client.set(self.prefix + key, value, ex=ttl)
+
+class LLMResultCache:
+    """
+    Content-addressed cache of (summary, tasks) results.
+
+    Keys combine the normalized note text with a namespace (model, prompt version, mode).
+    An in-process LRU with TTL sits in front of an optional shared backend, and a SimHash
+    index over the LRU catches near-duplicate notes that differ by a few words. An exact
+    hit is a result for the very text the caller sent, while a near-duplicate is a result
+    for someone's different note, so near-duplicates only match the same owner's entries.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, max_distance: int, min_words: int, backend=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self.backend = backend
+        # key -> (expires_at, (namespace, owner), fingerprint, result)
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[str, Optional[str]], Optional[int], CachedResult]]" = OrderedDict()
+        # (namespace, owner, band, value) -> keys
+        self._band_index: Dict[Tuple[str, Optional[str], int, int], Set[str]] = {}
+        self.stats = {"hits": 0, "near_hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0, "errors": 0}
+
+    @staticmethod
+    def make_key(namespace: str, normalized_text: str) -> str:
+        return hashlib.sha256(f"{namespace}\x00{normalized_text}".encode()).hexdigest()
+
+    def _fingerprint(self, normalized_text: str, owner: Optional[str]) -> Optional[int]:
+        if owner is None or self.max_distance <= 0 or len(normalized_text.split()) < self.min_words:
+            return None
+        return simhash(normalized_text)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry and entry[2] is not None:
+            namespace, owner = entry[1]
+            for band, value in _bands(entry[2]):
+                keys = self._band_index.get((namespace, owner, band, value))
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._band_index[(namespace, owner, band, value)]
+
+    def _get_local(self, key: str) -> Optional[CachedResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[3]
+
+    def _find_near_duplicate(self, namespace: str, owner: str, fingerprint: int) -> Optional[CachedResult]:
+        candidates: Set[str] = set()
+        for band, value in _bands(fingerprint):
+            candidates |= self._band_index.get((namespace, owner, band, value), set())
+        for key in candidates:
+            entry = self._entries.get(key)
+            if entry and bin(entry[2] ^ fingerprint).count("1") <= self.max_distance:
+                return self._get_local(key)
+        return None
+
+    def _put_local(self, key: str, namespace: str, owner: Optional[str], fingerprint: Optional[int],
+                   result: CachedResult) -> None:
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, (namespace, owner), fingerprint, result)
+        if fingerprint is not None:
+            for band, value in _bands(fingerprint):
+                self._band_index.setdefault((namespace, owner, band, value), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats["evictions"] += 1
+
+    async def get(self, namespace: str, text: str, owner: Optional[str] = None) -> Optional[CachedResult]:
+        """
+        Look up a cached result for the note text, or None on a miss.
+        Near-duplicates are only looked up among the owner's entries (never without an owner).
+        """
+        normalized = normalize_note_text(text)
+        key = self.make_key(namespace, normalized)
+
+        result = self._get_local(key)
+        if result is not None:
+            self.stats["hits"] += 1
+            return _copy(result)
+
+        fingerprint = self._fingerprint(normalized, owner)
+        if fingerprint is not None:
+            result = self._find_near_duplicate(namespace, owner, fingerprint)
+            if result is not None:
+                self.stats["near_hits"] += 1
+                return _copy(result)
+
+        if self.backend is not None:
+            try:
+                raw = await self.backend.get(key)
+                if raw is not None:
+                    result = _deserialize(raw)
+                    self._put_local(key, namespace, owner, fingerprint, result)
+                    self.stats["shared_hits"] += 1
+                    return _copy(result)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error reading shared LLM cache: {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, namespace: str, text: str, result: CachedResult, owner: Optional[str] = None) -> None:
+        """Store a result for the owner's note text in the local tier and the shared backend"""
+        normalized = normalize_note_text(text)
+        key = self.make_key(namespace, normalized)
+        self._put_local(key, namespace, owner, self._fingerprint(normalized, owner), _copy(result))
+
+        if self.backend is not None:
+            try:
+                await self.backend.set(key, _serialize(result), self.ttl_seconds)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error writing shared LLM cache: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["near_hits"] + self.stats["shared_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {**self.stats, "entries": len(self._entries), "hit_rate": hits / lookups if lookups else 0.0}
+
+def _copy(result: CachedResult) -> CachedResult:
+    summary, tasks = result
+    return summary, [dict(task) for task in tasks]
+
+def _create_cache() -> LLMResultCache:
+    redis_client = get_redis()
+    backend = RedisCacheBackend(redis_client) if redis_client is not None else None
+    return LLMResultCache(
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        max_distance=settings.LLM_CACHE_SIMHASH_DISTANCE,
+        min_words=settings.LLM_CACHE_SIMHASH_MIN_WORDS,
+        backend=backend,
+    )
+
+llm_cache = _create_cache()
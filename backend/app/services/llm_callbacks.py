@@ -0,0 +1,106 @@
+"""
+LangChain callback handlers for the LLM metrics. They subclass LangChain's handler, so this
+module is only imported once the chat models and chains are built.
+"""
+import time
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from app.core.config import settings
+from app.core.metrics import llm_requests, llm_tokens, stage_duration, stage_errors, start_trace_span
+from app.services.token_usage import token_usage
+
+class ModelUsageCallback(BaseCallbackHandler):
+    """Counts calls, tokens, cost and latency of one chat model, and bills tokens to the current user"""
+
+    run_inline = True
+
+    def __init__(self, model: str, prices: Dict[str, Tuple[float, float]]):
+        self.model = model
+        self.prompt_price, self.completion_price = prices.get(model, (0.0, 0.0))
+        self._started: Dict[UUID, float] = {}
+        self.stats = {
+            "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "cost_usd": 0.0, "latency_seconds": 0.0, "max_latency_seconds": 0.0
+        }
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.monotonic()
+
+    def _finish(self, run_id: UUID) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        latency = time.monotonic() - started
+        self.stats["calls"] += 1
+        self.stats["latency_seconds"] += latency
+        self.stats["max_latency_seconds"] = max(self.stats["max_latency_seconds"], latency)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+        llm_requests.inc(self.model, "ok")
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+                cost = (prompt_tokens * self.prompt_price + completion_tokens * self.completion_price) / 1000
+                self.stats["prompt_tokens"] += prompt_tokens
+                self.stats["completion_tokens"] += completion_tokens
+                self.stats["cost_usd"] += cost
+                token_usage.record(prompt_tokens, completion_tokens, cost)
+                llm_tokens.inc(self.model, "prompt", amount=prompt_tokens)
+                llm_tokens.inc(self.model, "completion", amount=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+        self.stats["errors"] += 1
+        llm_requests.inc(self.model, "error")
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "cost_usd": round(self.stats["cost_usd"], 6),
+            "latency_seconds": round(self.stats["latency_seconds"], 3),
+            "max_latency_seconds": round(self.stats["max_latency_seconds"], 3),
+            "avg_latency_seconds": round(self.stats["latency_seconds"] / calls, 3) if calls else None
+        }
+
+class StageTimingCallback(BaseCallbackHandler):
+    """Times the named chains (and their output parsers) into taskflow_stage_duration_seconds"""
+
+    run_inline = True
+    stages = {"summarize", "extract_tasks", "extract_tasks_stream", "analyze", "merge_summaries",
+              "parse_tasks", "parse_analysis"}
+
+    def __init__(self):
+        self._started: Dict[UUID, Tuple[str, float, Any]] = {}
+
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        name = kwargs.get("name")
+        if name in self.stages and settings.METRICS_ENABLED:
+            self._started[run_id] = (f"llm.{name}", time.perf_counter(), start_trace_span(f"llm.{name}"))
+
+    def _finish(self, run_id: UUID, failed: bool) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        stage, started_at, trace_span = started
+        stage_duration.observe(time.perf_counter() - started_at, stage)
+        if failed:
+            stage_errors.inc(stage)
+        if trace_span is not None:
+            trace_span.end()
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, False)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, True)
+
+stage_timing_callback = StageTimingCallback()
@@ -0,0 +1,221 @@
+import asyncio
+import random
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# The OpenAI SDK and langchain_core take most of a second to import, so their error classes are
+# looked up on the first failure instead of at startup (by then the LLM stack has been loaded anyway)
+@lru_cache(maxsize=1)
+def retryable_errors() -> Tuple[type, ...]:
+    """Errors worth another attempt; anything else (bad request, authentication) is raised as is"""
+    import openai
+    from langchain_core.exceptions import OutputParserException
+    return (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+        asyncio.TimeoutError,
+        OutputParserException,
+        ValidationError,
+    )
+
+@lru_cache(maxsize=1)
+def provider_errors() -> Tuple[type, ...]:
+    """Errors that mean the provider itself is degraded and count towards opening the circuit"""
+    import openai
+    return (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+        asyncio.TimeoutError,
+    )
+
+class LLMUnavailableError(Exception):
+    """The AI service could not produce a result (retries exhausted or circuit open)"""
+
+    def __init__(self, message: str, retry_after: float = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Fails fast while the LLM provider is degraded.
+
+    After failure_threshold consecutive provider errors the circuit opens and calls are
+    rejected for reset_seconds. Then a single trial call is let through (half-open):
+    its success closes the circuit, its failure opens it again. A trial that reports no
+    outcome within trial_timeout_seconds is given up on and the next call becomes the trial.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, trial_timeout_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.trial_timeout_seconds = trial_timeout_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def before_call(self) -> None:
+        """Raise LLMUnavailableError if calls are currently not allowed"""
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        remaining = self._opened_at + self.reset_seconds - now
+        if self.state == "open" and remaining <= 0:
+            self.state = "half_open"
+        if self.state == "half_open" and (
+            not self._trial_in_flight or now - self._trial_started_at >= self.trial_timeout_seconds
+        ):
+            self._trial_in_flight = True
+            self._trial_started_at = now
+            return
+        self.stats["rejected"] += 1
+        raise LLMUnavailableError(
+            "The AI service is temporarily unavailable, please retry shortly",
+            retry_after=max(remaining, 1)
+        )
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def cancel_trial(self) -> None:
+        """The caller of a half-open trial went away; let the next call be the trial"""
+        self._trial_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        if not isinstance(error, provider_errors()):
+            # Not the provider's fault; a half-open trial ends without a verdict
+            self._trial_in_flight = False
+            return
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                self.stats["opened"] += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+class LatencyTracker:
+    """Recent successful call latencies, for the hedging threshold"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class ResilientCaller:
+    """
+    Runs LLM work with retries (jittered exponential backoff), optional hedging and a
+    circuit breaker. When hedging is on and an attempt is still running at the
+    LLM_HEDGE_PERCENTILE latency of recent calls, a second identical attempt starts and
+    whichever succeeds first wins; the other is cancelled.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, latencies: LatencyTracker):
+        self.breaker = breaker
+        self.latencies = latencies
+        self.stats = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not settings.LLM_HEDGE_ENABLED or len(self.latencies) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return self.latencies.percentile(settings.LLM_HEDGE_PERCENTILE)
+
+    async def _timed(self, factory: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        result = await factory()
+        self.latencies.record(time.monotonic() - started)
+        return result
+
+    async def _attempt(self, factory: Callable[[], Awaitable[T]]) -> T:
+        first = asyncio.create_task(self._timed(factory))
+        delay = self._hedge_delay()
+        if delay is None:
+            return await first
+
+        attempts = {first}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                self.stats["hedges"] += 1
+                attempts.add(asyncio.create_task(self._timed(factory)))
+            error: Optional[BaseException] = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def call(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run factory() until it succeeds, raising LLMUnavailableError once retries are exhausted"""
+        self.stats["calls"] += 1
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            self.breaker.before_call()
+            try:
+                result = await self._attempt(factory)
+            except retryable_errors() as e:
+                self.breaker.record_failure(e)
+                if attempt == settings.LLM_MAX_RETRIES:
+                    self.stats["failures"] += 1
+                    raise LLMUnavailableError(f"The AI service failed to process the notes: {e}") from e
+                self.stats["retries"] += 1
+                # Full jitter keeps retrying clients from synchronizing
+                await asyncio.sleep(random.uniform(0, min(
+                    settings.LLM_RETRY_MAX_SECONDS, settings.LLM_RETRY_BASE_SECONDS * 2 ** attempt
+                )))
+                continue
+            except asyncio.CancelledError:
+                self.breaker.cancel_trial()
+                raise
+            except Exception as e:
+                self.breaker.record_failure(e)
+                self.stats["failures"] += 1
+                raise
+            self.breaker.record_success()
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "circuit": self.breaker.state,
+            **{f"circuit_{key}": value for key, value in self.breaker.stats.items()},
+            "hedge_after_seconds": self._hedge_delay()
+        }
+
+llm_breaker = CircuitBreaker(
+    failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.LLM_BREAKER_RESET_SECONDS,
+    trial_timeout_seconds=settings.LLM_BREAKER_TRIAL_TIMEOUT_SECONDS
+)
+llm_caller = ResilientCaller(llm_breaker, LatencyTracker())
@@ -0,0 +1,183 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import span
+from app.services.rate_limiter import AdaptiveRateLimiter, llm_rate_limiter
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+class SchedulerFullError(Exception):
+    """Raised when LLM_QUEUE_MAX_DEPTH requests are already waiting for the LLM"""
+
+@dataclass(order=True)
+class _Waiter:
+    finish_tag: float
+    seq: int
+    start_tag: float = field(compare=False)
+    key: Tuple[str, str] = field(compare=False)
+    units: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+class LLMScheduler:
+    """
+    Admission control for LLM work, shared by every request of this worker.
+
+    - At most max_concurrency LLM requests run at once; a piece of work reserves as many
+      units as it issues requests in parallel.
+    - Waiting work is ordered by start-time weighted fair queuing per user: a user's
+      requests are tagged with cumulative virtual finish times, so one user's burst
+      queues behind itself instead of in front of everyone else.
+    - Interactive work is dispatched before batch work, except that batch work waiting
+      longer than batch_max_wait goes first, so batch imports are slowed but never starved.
+    - Admitted work then paces itself through the adaptive rate limiter (requests and
+      tokens per minute, backing off on 429s and exhausted rate-limit headers).
+    """
+
+    def __init__(self, limiter: AdaptiveRateLimiter, max_concurrency: int,
+                 max_queue_depth: int, batch_max_wait: float):
+        self.limiter = limiter
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.batch_max_wait = batch_max_wait
+        self._queues: Dict[str, List[_Waiter]] = {priority: [] for priority in PRIORITIES}
+        self._virtual_time: Dict[str, float] = {priority: 0.0 for priority in PRIORITIES}
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._queued: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self._in_use = 0
+        self._seq = itertools.count()
+        self.stats = {
+            priority: {"admitted": 0, "rejected": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for priority in PRIORITIES
+        }
+
+    def _record_wait(self, priority: str, waited: float) -> None:
+        stats = self.stats[priority]
+        stats["admitted"] += 1
+        stats["wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+    def _head(self, priority: str) -> Optional[_Waiter]:
+        queue = self._queues[priority]
+        # Drop waiters whose caller gave up
+        while queue and queue[0].future.done():
+            heapq.heappop(queue)
+        return queue[0] if queue else None
+
+    def _next_priority(self) -> Optional[str]:
+        interactive, batch = self._head(INTERACTIVE), self._head(BATCH)
+        if batch is not None and (
+            interactive is None or time.monotonic() - batch.enqueued_at >= self.batch_max_wait
+        ):
+            return BATCH
+        return INTERACTIVE if interactive is not None else None
+
+    def _dispatch(self) -> None:
+        while True:
+            priority = self._next_priority()
+            if priority is None:
+                return
+            waiter = self._queues[priority][0]
+            # The head waits for enough free units, so large work cannot be starved by small work
+            if self._in_use + waiter.units > self.max_concurrency:
+                return
+            heapq.heappop(self._queues[priority])
+            self._queued[priority] -= 1
+            self._in_use += waiter.units
+            self._virtual_time[priority] = max(self._virtual_time[priority], waiter.start_tag)
+            self._record_wait(priority, time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    async def _admit(self, user_id: str, priority: str, units: int, weight: float) -> None:
+        if not any(self._queued.values()) and self._in_use + units <= self.max_concurrency:
+            self._in_use += units
+            self._record_wait(priority, 0.0)
+            return
+        if sum(self._queued.values()) >= self.max_queue_depth:
+            self.stats[priority]["rejected"] += 1
+            raise SchedulerFullError("Too many requests are waiting for the AI service, please retry shortly")
+
+        if len(self._last_finish) > 10 * self.max_queue_depth:
+            self._prune_finish_tags()
+        key = (priority, user_id)
+        start_tag = max(self._virtual_time[priority], self._last_finish.get(key, 0.0))
+        finish_tag = start_tag + units / weight
+        self._last_finish[key] = finish_tag
+        waiter = _Waiter(
+            finish_tag=finish_tag,
+            seq=next(self._seq),
+            start_tag=start_tag,
+            key=key,
+            units=units,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future()
+        )
+        heapq.heappush(self._queues[priority], waiter)
+        self._queued[priority] += 1
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                # Still queued: _head discards it lazily
+                self._queued[priority] -= 1
+            else:
+                # Admitted just as the caller was cancelled
+                self._release(units)
+            raise
+
+    def _prune_finish_tags(self) -> None:
+        """Forget users whose last finish tag is behind virtual time; they restart from it anyway"""
+        self._last_finish = {
+            key: finish_tag for key, finish_tag in self._last_finish.items()
+            if finish_tag > self._virtual_time[key[0]]
+        }
+
+    def _release(self, units: int) -> None:
+        self._in_use -= units
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str], priority: str = INTERACTIVE, tokens: int = 0,
+                   requests: int = 1, parallel: Optional[int] = None, weight: float = 1.0) -> AsyncIterator[None]:
+        """
+        Hold LLM capacity for work making `requests` requests (at most `parallel` at once)
+        that use about `tokens` tokens in total. Raises SchedulerFullError if the wait queue is full.
+        """
+        units = max(1, min(parallel or requests, self.max_concurrency))
+        with span("llm.queue"):
+            await self._admit(user_id or "anonymous", priority, units, weight)
+        try:
+            with span("llm.rate_limit"):
+                await self.limiter.acquire(tokens, requests)
+            yield
+            self.limiter.on_success()
+        finally:
+            self._release(units)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_use,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": dict(self._queued),
+            **{
+                priority: {**stats, "wait_seconds": round(stats["wait_seconds"], 3),
+                           "max_wait_seconds": round(stats["max_wait_seconds"], 3)}
+                for priority, stats in self.stats.items()
+            }
+        }
+
+llm_scheduler = LLMScheduler(
+    limiter=llm_rate_limiter,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_queue_depth=settings.LLM_QUEUE_MAX_DEPTH,
+    batch_max_wait=settings.LLM_BATCH_MAX_WAIT_SECONDS
+)
@@ -0,0 +1,106 @@
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.services.llm_callbacks import ModelUsageCallback
+
+# USD per 1K prompt and completion tokens, overridable with AI_MODEL_PRICES
+DEFAULT_MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4.1-nano": (0.0001, 0.0004),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+    "gpt-4.1": (0.002, 0.008),
+}
+
+# Phrases that usually mean the notes contain at least one action item
+_ACTION_CUES = re.compile(
+    r"\b(action items?|todo|to-do|follow[ -]up|will|needs? to|should|must|assign(?:ed)?|owner|"
+    r"deadline|due|by (?:mon|tues|wednes|thurs|fri|satur|sun)day|by (?:tomorrow|eod|end of))\b",
+    re.IGNORECASE
+)
+
+def parse_model_prices(value: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "model=prompt/completion,..." prices per 1K tokens"""
+    prices = dict(DEFAULT_MODEL_PRICES)
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        model, _, rates = entry.partition("=")
+        prompt, _, completion = rates.partition("/")
+        try:
+            prices[model.strip()] = (float(prompt), float(completion or prompt))
+        except ValueError:
+            print(f"Ignoring invalid AI_MODEL_PRICES entry: {entry}")
+    return prices
+
+class ModelRouter:
+    """
+    Chooses the chat model for a piece of notes.
+
+    Notes of at most fast_max_tokens tokens go to the fast model, everything else to the
+    standard model. A fast result is escalated to the standard model when it fails
+    validation or looks incomplete (no summary, or no tasks although the notes contain
+    action phrases). Without a fast model every request uses the standard model.
+    """
+
+    def __init__(self, standard_model: str, fast_model: Optional[str], fast_max_tokens: int,
+                 escalate_on_no_tasks: bool, min_summary_chars: int, prices: Dict[str, Tuple[float, float]]):
+        self.standard_model = standard_model
+        self.fast_model = fast_model if fast_model and fast_model != standard_model else None
+        self.fast_max_tokens = fast_max_tokens
+        self.escalate_on_no_tasks = escalate_on_no_tasks
+        self.min_summary_chars = min_summary_chars
+        self.prices = prices
+        self._usage: Dict[str, "ModelUsageCallback"] = {}
+        self.stats = {"routed_fast": 0, "routed_standard": 0, "escalated_invalid": 0, "escalated_low_confidence": 0}
+
+    @property
+    def routing_key(self) -> str:
+        """Identifies the routing configuration, for cache namespaces"""
+        if self.fast_model is None:
+            return self.standard_model
+        return f"{self.fast_model}<={self.fast_max_tokens}>{self.standard_model}"
+
+    def usage_callback(self, model: str) -> "ModelUsageCallback":
+        from app.services.llm_callbacks import ModelUsageCallback
+
+        if model not in self._usage:
+            self._usage[model] = ModelUsageCallback(model, self.prices)
+        return self._usage[model]
+
+    def choose(self, token_count: int) -> str:
+        if self.fast_model is not None and token_count <= self.fast_max_tokens:
+            self.stats["routed_fast"] += 1
+            return self.fast_model
+        self.stats["routed_standard"] += 1
+        return self.standard_model
+
+    def is_confident(self, text: str, summary: str, tasks: List[Dict[str, Any]]) -> bool:
+        """Cheap plausibility check of a fast-model result"""
+        if len((summary or "").strip()) < self.min_summary_chars:
+            return False
+        if not tasks and self.escalate_on_no_tasks and _ACTION_CUES.search(text):
+            return False
+        return True
+
+    def record_escalation(self, reason: str) -> None:
+        self.stats[f"escalated_{reason}"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "standard_model": self.standard_model,
+            "fast_model": self.fast_model,
+            **self.stats,
+            "models": {model: usage.get_stats() for model, usage in self._usage.items()}
+        }
+
+model_router = ModelRouter(
+    standard_model=settings.OPENAI_MODEL_NAME,
+    fast_model=settings.OPENAI_FAST_MODEL_NAME,
+    fast_max_tokens=settings.AI_ROUTER_FAST_MAX_TOKENS,
+    escalate_on_no_tasks=settings.AI_ROUTER_ESCALATE_ON_NO_TASKS,
+    min_summary_chars=settings.AI_ROUTER_MIN_SUMMARY_CHARS,
+    prices=parse_model_prices(settings.AI_MODEL_PRICES)
+)
@@ -0,0 +1,120 @@
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator, Dict
+from uuid import UUID
+
+from app.core.config import settings
+from app.db.supabase_ops import create_notes_with_tasks_batch
+from app.models.note_schemas import ProcessNoteRequest
+from app.services.ai_processing_service import generate_summary_and_extract_tasks
+from app.services.llm_scheduler import BATCH
+
+_DONE = object()
+
+async def read_ndjson_notes(body: bytes, max_notes: int) -> AsyncIterator[ProcessNoteRequest]:
+    """
+    Parse an NDJSON upload of {"text": ..., "timezone": ...} objects, yielding the notes.
+    Lines are parsed as the import consumes them; raises ValueError on an invalid line
+    or when there are more than max_notes notes.
+    """
+    count = 0
+    for line_number, line in enumerate(body.split(b"\n"), start=1):
+        if not line.strip():
+            continue
+        try:
+            note = ProcessNoteRequest.model_validate_json(line)
+        except Exception:
+            raise ValueError(f"Line {line_number}: expected a JSON object with a text field")
+        count += 1
+        if count > max_notes:
+            raise ValueError(f"Too many notes, at most {max_notes} can be imported at once")
+        yield note
+
+async def import_notes(user_id: UUID, notes: AsyncIterable[ProcessNoteRequest]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Process many meeting notes and save them, yielding one result per note as it finishes.
+
+    Notes are analyzed with at most NOTE_IMPORT_CONCURRENCY in flight, as batch work of
+    the shared LLM scheduler (so interactive requests go first), each in its own time zone;
+    notes are only pulled from the input as slots free up. Analyzed notes are saved in group commits: whatever
+    has finished while the previous insert ran is written with one bulk insert for the
+    notes and one for their tasks (at most NOTE_IMPORT_WRITE_BATCH_SIZE notes each).
+
+    Results are {"index", "status": "completed", "note_id", "summary", "tasks"} or
+    {"index", "status": "failed", "error"}, followed by a final {"status": "done"} summary.
+    An unreadable input ends the import with {"status": "error", "error"} before the summary.
+    """
+    semaphore = asyncio.Semaphore(settings.NOTE_IMPORT_CONCURRENCY)
+    analyzed: asyncio.Queue = asyncio.Queue()
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def analyze(index: int, note: ProcessNoteRequest) -> None:
+        try:
+            summary, tasks = await generate_summary_and_extract_tasks(
+                note.text, str(user_id), BATCH, timezone=note.timezone
+            )
+            await analyzed.put((index, note.text, summary, tasks))
+        except Exception as e:
+            print(f"Error importing note {index}: {e}")
+            await results.put({"index": index, "status": "failed", "error": str(e)})
+        finally:
+            semaphore.release()
+
+    async def produce() -> None:
+        pending = []
+        try:
+            index = 0
+            async for note in notes:
+                await semaphore.acquire()
+                pending.append(asyncio.create_task(analyze(index, note)))
+                index += 1
+        except Exception as e:
+            await results.put({"status": "error", "error": str(e)})
+        finally:
+            await asyncio.gather(*pending, return_exceptions=True)
+            await analyzed.put(_DONE)
+
+    async def write() -> None:
+        done = False
+        while not done:
+            batch = [await analyzed.get()]
+            while len(batch) < settings.NOTE_IMPORT_WRITE_BATCH_SIZE and not analyzed.empty():
+                batch.append(analyzed.get_nowait())
+            # The producer only signals completion after every note was analyzed
+            if batch[-1] is _DONE:
+                done = True
+                batch.pop()
+            if not batch:
+                continue
+            try:
+                saved = await create_notes_with_tasks_batch(
+                    user_id, [(text, summary, tasks) for _, text, summary, tasks in batch]
+                )
+                for (index, _, summary, _), (note_row, task_rows) in zip(batch, saved):
+                    await results.put({
+                        "index": index,
+                        "status": "completed",
+                        "note_id": note_row["id"],
+                        "summary": summary,
+                        "tasks": task_rows
+                    })
+            except Exception as e:
+                for index, _, _, _ in batch:
+                    await results.put({"index": index, "status": "failed", "error": f"Error saving note: {str(e)}"})
+        await results.put(_DONE)
+
+    workers = [asyncio.create_task(produce()), asyncio.create_task(write())]
+    counts = {"completed": 0, "failed": 0}
+    try:
+        while True:
+            result = await results.get()
+            if result is _DONE:
+                break
+            if result["status"] in counts:
+                counts[result["status"]] += 1
+            yield result
+        yield {"status": "done", **counts}
+    finally:
+        # The client may disconnect mid-import
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
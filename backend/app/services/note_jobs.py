@@ -0,0 +1,221 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.db.supabase_ops import (
+    get_meeting_note_by_id,
+    update_meeting_note_summary,
+    get_processing_job,
+    claim_processing_job,
+    update_processing_job,
+    get_pending_processing_jobs,
+    count_queued_processing_jobs
+)
+from app.services.ai_processing_service import generate_summary_and_extract_tasks
+from app.services.llm_scheduler import BATCH
+
+TERMINAL_JOB_STATUSES = ("completed", "failed")
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at its maximum depth"""
+
+async def run_note_job(job_id: str) -> None:
+    """
+    Process the note attached to a queued job and record the outcome.
+    Jobs already claimed by another worker are skipped.
+    """
+    job = await get_processing_job(UUID(job_id))
+    if not job or job["status"] != "queued":
+        return
+
+    job = await claim_processing_job(UUID(job_id), job.get("attempts", 0))
+    if not job:
+        return
+    note_jobs.notify(job_id)
+
+    try:
+        note = await get_meeting_note_by_id(UUID(job["note_id"]), UUID(job["user_id"]))
+        if not note:
+            raise Exception(f"Note {job['note_id']} no longer exists")
+
+        summary, extracted_tasks = await generate_summary_and_extract_tasks(
+            note["original_text"], job["user_id"], BATCH, timezone=job.get("timezone")
+        )
+        await update_meeting_note_summary(UUID(job["note_id"]), summary)
+
+        result = jsonable_encoder({
+            "note_id": job["note_id"],
+            "original_text": note["original_text"],
+            "summary": summary,
+            "extracted_tasks": extracted_tasks,
+            "created_at": note.get("created_at")
+        })
+        await update_processing_job(UUID(job_id), "completed", result=result)
+    except Exception as e:
+        print(f"Error in run_note_job {job_id}: {e}")
+        await update_processing_job(UUID(job_id), "failed", error=str(e))
+    finally:
+        note_jobs.notify(job_id)
+
+class NoteJobQueue:
+    """
+    Bounded queue of note processing jobs.
+
+    Job state lives in the processing_jobs table, so queued and interrupted jobs are
+    recovered on startup. With NOTE_JOB_EXECUTOR="inprocess" jobs run on a pool of
+    asyncio workers in the API process; with "external" the API only records the job
+    and a separate `python -m app.services.note_jobs` process runs it.
+    """
+
+    def __init__(self, executor: str, concurrency: int, max_depth: int):
+        self.executor = executor
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_depth)
+        self._workers: List[asyncio.Task] = []
+        self._updates: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+
+    @property
+    def runs_in_process(self) -> bool:
+        return self.executor == "inprocess"
+
+    async def start(self) -> None:
+        """Start the worker pool and re-enqueue jobs left over from a previous run"""
+        if not self.runs_in_process:
+            return
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await recover_pending_jobs(self._queue.put)
+        except Exception as e:
+            print(f"Error recovering pending note jobs: {e}")
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs they were running are recovered on the next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await run_note_job(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def check_capacity(self) -> None:
+        """Raise QueueFullError if a new job would exceed the maximum queue depth"""
+        if self.runs_in_process:
+            depth = self._queue.qsize()
+        else:
+            depth = await count_queued_processing_jobs()
+        if depth >= self.max_depth:
+            raise QueueFullError(f"Note processing queue is full ({depth} jobs waiting)")
+
+    def enqueue(self, job_id: str) -> None:
+        """Hand a persisted job to the in-process workers (a no-op for external workers)"""
+        if not self.runs_in_process:
+            return
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise QueueFullError("Note processing queue is full")
+
+    def notify(self, job_id: str) -> None:
+        """Wake up anyone waiting for a status change of the job"""
+        event = self._updates.pop(job_id, None)
+        if event:
+            event.set()
+
+    async def wait_for_update(self, job_id: str, timeout: float) -> None:
+        """Wait until the job changes state in this process, or until timeout"""
+        event = self._updates.setdefault(job_id, asyncio.Event())
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # Jobs run by an external worker are never notified here; drop the event with its last waiter
+            self._waiters[job_id] -= 1
+            if not self._waiters[job_id]:
+                del self._waiters[job_id]
+                self._updates.pop(job_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor,
+            "depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "workers": len(self._workers)
+        }
+
+async def recover_pending_jobs(enqueue: Optional[Callable[[str], Awaitable[None]]] = None) -> int:
+    """
+    Re-enqueue queued jobs, and reset running jobs whose worker has not reported back
+    within NOTE_JOB_STALE_SECONDS (e.g. because the process was restarted).
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.NOTE_JOB_STALE_SECONDS)
+    recovered = 0
+    for job in await get_pending_processing_jobs(limit=settings.NOTE_JOB_QUEUE_MAX_DEPTH):
+        if job["status"] == "running":
+            updated_at = datetime.fromisoformat(job["updated_at"])
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            if updated_at > stale_before:
+                continue
+            await update_processing_job(UUID(job["id"]), "queued")
+        if enqueue is not None:
+            await enqueue(job["id"])
+        recovered += 1
+    if recovered:
+        print(f"Recovered {recovered} pending note processing jobs")
+    return recovered
+
+note_jobs = NoteJobQueue(
+    executor=settings.NOTE_JOB_EXECUTOR,
+    concurrency=settings.NOTE_JOB_CONCURRENCY,
+    max_depth=settings.NOTE_JOB_QUEUE_MAX_DEPTH
+)
+
+async def run_external_worker(poll_interval: float) -> None:
+    """Standalone worker loop: poll the processing_jobs table and run jobs with bounded concurrency"""
+    semaphore = asyncio.Semaphore(settings.NOTE_JOB_CONCURRENCY)
+    running: Dict[str, asyncio.Task] = {}
+
+    async def run(job_id: str) -> None:
+        async with semaphore:
+            await run_note_job(job_id)
+
+    while True:
+        jobs = await get_pending_processing_jobs(limit=settings.NOTE_JOB_CONCURRENCY * 2)
+        for job in jobs:
+            if job["status"] == "queued" and job["id"] not in running:
+                running[job["id"]] = asyncio.create_task(run(job["id"]))
+        for job_id in [job_id for job_id, task in running.items() if task.done()]:
+            running.pop(job_id)
+        await asyncio.sleep(poll_interval)
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from app.db.client import open_db_client
+    from app.services.token_usage import token_usage
+
+    load_dotenv()
+
+    async def main() -> None:
+        await open_db_client()
+        await recover_pending_jobs()
+        token_usage.start()
+        print("Note processing worker started")
+        try:
+            await run_external_worker(settings.NOTE_JOB_POLL_SECONDS)
+        finally:
+            await token_usage.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,240 @@
+import calendar
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.core.config import settings
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# "sat" and "sun" are too common as plain words to be read as abbreviations, and the others
+# ("Mon team", "wed the datasets") only count where they read as dates (see _stands_as_date)
+_WEEKDAY_PATTERN = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tues?|wed|thu(?:rs?)?|fri)"
+# Full names and abbreviations only, so words such as "Decide" or "market" are not months
+_MONTH_PATTERN = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?"
+)
+_NUMBER_WORDS = {
+    "a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10
+}
+
+# Date expressions, each optionally introduced by "by", "on", "for", "due", "before", "until"
+# (and "the", as in "on the 3rd of May")
+DATE_EXPRESSION = re.compile(
+    r"(?:\b(?P<preposition>by|on|for|due(?: date)?:?|before|until|no later than)\s+(?:the\s+)?)?"
+    r"\b(?:"
+    r"(?P<iso>\d{4}-\d{2}-\d{2})"
+    r"|(?P<md>\d{1,2})/(?P<md_day>\d{1,2})(?:/(?P<md_year>\d{2,4}))?"
+    r"|(?P<month_name>" + _MONTH_PATTERN + r")\s+(?P<month_day>\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(?P<month_year>\d{4}))?"
+    r"|(?P<day_month>\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<day_month_name>" + _MONTH_PATTERN + r")(?:,?\s+(?P<day_month_year>\d{4}))?"
+    r"|(?P<today>today|tonight|eod|end of (?:the )?day)"
+    r"|(?P<tomorrow>tomorrow|tmrw)"
+    r"|(?P<end_of_week>eow|end of (?:the )?week|this week)"
+    r"|(?P<next_week>next week)"
+    r"|(?P<end_of_month>eom|end of (?:the )?month)"
+    r"|in\s+(?P<in_amount>\d+|" + "|".join(_NUMBER_WORDS) + r")\s+(?P<in_unit>days?|weeks?)"
+    r"|(?P<weekday_prefix>next|this|coming)?\s*(?P<weekday>" + _WEEKDAY_PATTERN + r")"
+    r")\b",
+    re.IGNORECASE
+)
+
+# Explicit action-item markers; a dash only counts with spaces around it, so "AI-powered"
+# or "Task-level" do not start an action item
+_MARKER = re.compile(
+    r"^\s*(?:[-*•]\s*)?(?:\[\s?\]\s*|(?:todo|to-do|action(?: item)?|ai|task)(?:\s*:\s*|\s+-\s+))",
+    re.IGNORECASE
+)
+_MENTION = re.compile(r"^\s*(?:[-*•]\s*)?@(?P<name>[\w.-]+)\s+(?P<rest>(?:will|to|should|needs? to|must)\b.*)", re.IGNORECASE)
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d{1,2}[.)])\s+")
+_COMMITMENT = re.compile(r"\b(?:will|needs? to|should|must|to do|follow up|assigned)\b", re.IGNORECASE)
+_HEADING = re.compile(r"^\s*(?:#+\s*\S.*|[^.!?]{1,40}:)\s*$")
+# Words left dangling in a description once the date after them is cut out
+_DANGLING_CONNECTORS = re.compile(r"(?:\s+(?:on|by|for|due|before|until|at|of|the))+\s*$", re.IGNORECASE)
+
+stats = {"notes": 0, "handled_locally": 0}
+
+@dataclass
+class CandidateTask:
+    description: str
+    due_date: Optional[date]
+    line: str
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {"description": self.description, "due_date": self.due_date}
+
+@dataclass
+class PreExtraction:
+    """Result of the rule-based pass over a note"""
+    reference_date: date
+    tasks: List[CandidateTask] = field(default_factory=list)
+    has_relative_dates: bool = False
+    # Every line is an action item or a heading: the note needs no model call
+    trivial: bool = False
+
+    def prompt_context(self) -> str:
+        """Extra context for the extraction prompts: the reference date and the rule-based candidates"""
+        lines = [
+            f"Today's date is {self.reference_date.isoformat()} ({WEEKDAYS[self.reference_date.weekday()].capitalize()}). "
+            "Resolve relative due dates such as \"Friday\" or \"next week\" against it."
+        ]
+        if self.tasks:
+            lines.append("A rule-based pass found these candidate action items; verify them against the notes:")
+            lines.extend(
+                f"- {task.description} (due {task.due_date.isoformat() if task.due_date else 'not specified'})"
+                for task in self.tasks
+            )
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        """Deterministic summary for trivial notes"""
+        count = len(self.tasks)
+        items = "; ".join(task.description for task in self.tasks)
+        return f"{count} action item{'s' if count != 1 else ''}: {items}."
+
+def reference_date_for(timezone: Optional[str] = None) -> date:
+    """Today's date in the given IANA time zone (DEFAULT_TIMEZONE if missing or unknown)"""
+    try:
+        zone = ZoneInfo(timezone or settings.DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = ZoneInfo(settings.DEFAULT_TIMEZONE)
+    return datetime.now(zone).date()
+
+def _month_number(name: str) -> int:
+    return [month.lower() for month in calendar.month_abbr].index(name.lower().rstrip(".")[:3])
+
+def _weekday_number(name: str) -> int:
+    name = name.lower()
+    return next(i for i, weekday in enumerate(WEEKDAYS) if weekday.startswith(name[:3]))
+
+def _upcoming(reference: date, month: int, day: int, year: Optional[int]) -> Optional[date]:
+    """A day and month without a year is the next such date on or after the reference date"""
+    try:
+        if year is not None:
+            return date(year + 2000 if year < 100 else year, month, day)
+        candidate = date(reference.year, month, day)
+        return candidate if candidate >= reference else date(reference.year + 1, month, day)
+    except ValueError:
+        return None
+
+def _stands_as_date(match: re.Match) -> bool:
+    """
+    Whether an ambiguous word ("Mon", "fri", "3 may") is meant as a date: after a date
+    preposition, or followed by punctuation or the end of the line
+    """
+    if match.group("preposition") or match.group("weekday_prefix"):
+        return True
+    following = match.string[match.end():].lstrip(" \t")
+    return not following or following[0] in ".,;)\n"
+
+def _resolve(match: re.Match, reference: date) -> Tuple[Optional[date], bool]:
+    """Resolve a DATE_EXPRESSION match, returning the date and whether it was relative"""
+    groups = match.groupdict()
+    if groups["iso"]:
+        try:
+            return date.fromisoformat(groups["iso"]), False
+        except ValueError:
+            return None, False
+    if groups["md"]:
+        year = int(groups["md_year"]) if groups["md_year"] else None
+        return _upcoming(reference, int(groups["md"]), int(groups["md_day"]), year), False
+    if groups["month_name"]:
+        year = int(groups["month_year"]) if groups["month_year"] else None
+        return _upcoming(reference, _month_number(groups["month_name"]), int(groups["month_day"]), year), False
+    if groups["day_month"]:
+        year = int(groups["day_month_year"]) if groups["day_month_year"] else None
+        if groups["day_month_name"].lower() == "may" and year is None and not _stands_as_date(match):
+            # "these 3 may need review"
+            return None, False
+        return _upcoming(reference, _month_number(groups["day_month_name"]), int(groups["day_month"]), year), False
+    if groups["today"]:
+        return reference, True
+    if groups["tomorrow"]:
+        return reference + timedelta(days=1), True
+    if groups["end_of_week"]:
+        # The coming Friday (today on a Friday)
+        return reference + timedelta(days=(4 - reference.weekday()) % 7), True
+    if groups["next_week"]:
+        return reference + timedelta(days=7 - reference.weekday()), True
+    if groups["end_of_month"]:
+        return reference.replace(day=calendar.monthrange(reference.year, reference.month)[1]), True
+    if groups["in_amount"]:
+        amount = groups["in_amount"].lower()
+        amount = int(amount) if amount.isdigit() else _NUMBER_WORDS[amount]
+        days = amount * 7 if groups["in_unit"].lower().startswith("week") else amount
+        return reference + timedelta(days=days), True
+    if groups["weekday"]:
+        if groups["weekday"].lower() not in WEEKDAYS and not _stands_as_date(match):
+            return None, False
+        weekday = _weekday_number(groups["weekday"])
+        if (groups["weekday_prefix"] or "").lower() == "next":
+            # A day of the following calendar week
+            return reference + timedelta(days=7 - reference.weekday() + weekday), True
+        return reference + timedelta(days=(weekday - reference.weekday()) % 7), True
+    return None, False
+
+def find_due_date(text: str, reference: date) -> Tuple[Optional[date], Optional[re.Match], bool]:
+    """The first date expression in text, resolved against the reference date"""
+    for match in DATE_EXPRESSION.finditer(text):
+        due_date, relative = _resolve(match, reference)
+        if due_date is not None:
+            return due_date, match, relative
+    return None, None, False
+
+def _clean_description(text: str, match: Optional[re.Match]) -> str:
+    if match is not None:
+        text = _DANGLING_CONNECTORS.sub("", text[:match.start()]) + " " + text[match.end():]
+    text = re.sub(r"\(\s*\)|\s+([,.;:!?])", r"\1", text)
+    text = re.sub(r"\s{2,}", " ", text).strip(" -–—,;:.")
+    return text[:1].upper() + text[1:]
+
+def _action_text(line: str) -> Optional[str]:
+    """The action item of a line, or None if the line is not one"""
+    mention = _MENTION.match(line)
+    if mention:
+        return f"{mention.group('name').capitalize()} {mention.group('rest')}"
+    marker = _MARKER.match(line)
+    if marker and marker.end() < len(line.rstrip()):
+        return line[marker.end():]
+    # Plain bullets are often just discussion points; only commitments count
+    bullet = _BULLET.match(line)
+    if bullet and _COMMITMENT.search(line):
+        return line[bullet.end():]
+    return None
+
+def pre_extract(text: str, reference: date) -> PreExtraction:
+    """Detect action-item lines and resolve their due dates without a model call"""
+    stats["notes"] += 1
+    result = PreExtraction(reference_date=reference)
+    lines = [line for line in text.splitlines() if line.strip()]
+    other_lines = 0
+    for line in lines:
+        action = _action_text(line)
+        if action is None:
+            if not _HEADING.match(line):
+                other_lines += 1
+            if find_due_date(line, reference)[2]:
+                result.has_relative_dates = True
+            continue
+        due_date, match, relative = find_due_date(action, reference)
+        result.has_relative_dates = result.has_relative_dates or relative
+        description = _clean_description(action, match)
+        if description:
+            result.tasks.append(CandidateTask(description=description, due_date=due_date, line=line.strip()))
+
+    result.trivial = (
+        bool(result.tasks)
+        and other_lines == 0
+        and len(lines) <= settings.AI_PRE_EXTRACT_MAX_TRIVIAL_LINES
+    )
+    if result.trivial:
+        stats["handled_locally"] += 1
+    return result
+
+def get_stats() -> Dict[str, Any]:
+    return {
+        **stats,
+        "handled_locally_rate": round(stats["handled_locally"] / stats["notes"], 3) if stats["notes"] else None
+    }
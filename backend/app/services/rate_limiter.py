@@ -0,0 +1,128 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from app.core.config import settings
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse an OpenAI x-ratelimit-reset-* value such as "20ms", "1s" or "6m0s" into seconds"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+class AdaptiveRateLimiter:
+    """
+    Client-side requests-per-minute and tokens-per-minute limiter for LLM calls.
+
+    Two token buckets refill at the current rates. The rates adapt AIMD style: a 429
+    from the provider halves them (down to min_fraction of the configured limits) and
+    pauses all callers for the Retry-After delay; every success raises them again by
+    recovery_step of the configured limits. When the rate-limit headers of a response
+    show the remaining allowance is used up, callers wait for its reset. This converges
+    on the throughput the provider actually grants instead of hammering it with retries.
+    """
+
+    def __init__(self, rpm: int, tpm: int, burst_seconds: float = 5.0,
+                 min_fraction: float = 0.1, recovery_step: float = 0.02, min_remaining_tokens: int = 1000):
+        self.max_rpm = rpm
+        self.max_tpm = tpm
+        self.burst_seconds = burst_seconds
+        self.min_fraction = min_fraction
+        self.recovery_step = recovery_step
+        self.min_remaining_tokens = min_remaining_tokens
+        self.fraction = 1.0
+        self._requests = self._capacity(rpm)
+        self._tokens = self._capacity(tpm)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.stats = {"acquired": 0, "rate_limited": 0, "header_pauses": 0, "waited_seconds": 0.0}
+
+    def _capacity(self, per_minute: float) -> float:
+        return max(1.0, per_minute * self.fraction * self.burst_seconds / 60)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._requests = min(self._capacity(self.max_rpm), self._requests + elapsed * self.max_rpm * self.fraction / 60)
+        self._tokens = min(self._capacity(self.max_tpm), self._tokens + elapsed * self.max_tpm * self.fraction / 60)
+
+    async def acquire(self, tokens: int, requests: int = 1) -> None:
+        """Wait until `requests` requests using about `tokens` tokens in total fit in the current rates"""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill()
+                # Requests larger than the bucket would never fit; let them through when it is full
+                tokens = min(tokens, self._capacity(self.max_tpm))
+                requests = min(requests, self._capacity(self.max_rpm))
+                if self._requests >= requests and self._tokens >= tokens:
+                    self._requests -= requests
+                    self._tokens -= tokens
+                    break
+                wait = max(
+                    (requests - self._requests) * 60 / (self.max_rpm * self.fraction),
+                    (tokens - self._tokens) * 60 / (self.max_tpm * self.fraction)
+                )
+                await asyncio.sleep(max(wait, 0.01))
+        self.stats["acquired"] += 1
+        self.stats["waited_seconds"] += time.monotonic() - started
+
+    def on_success(self) -> None:
+        self.fraction = min(1.0, self.fraction + self.recovery_step)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given time without lowering the rates"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe_response(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """
+        Adapt to the provider's rate-limit headers: back off on a 429 and, when the
+        remaining request or token allowance is exhausted, wait for its reset.
+        """
+        if status_code == 429:
+            retry_after = headers.get("retry-after")
+            try:
+                delay = float(retry_after) if retry_after else None
+            except ValueError:
+                delay = None
+            self.on_rate_limited(delay or parse_reset_duration(headers.get("x-ratelimit-reset-requests")))
+            return
+        for kind, threshold in (("requests", 1), ("tokens", self.min_remaining_tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None or not remaining.isdigit() or int(remaining) >= threshold:
+                continue
+            reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if reset:
+                self.stats["header_pauses"] += 1
+                self.pause(reset)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Back off after a 429: halve the rates and pause everyone for retry_after seconds"""
+        self.stats["rate_limited"] += 1
+        self.fraction = max(self.min_fraction, self.fraction / 2)
+        self._requests = min(self._requests, self._capacity(self.max_rpm))
+        self._tokens = min(self._tokens, self._capacity(self.max_tpm))
+        self.pause(retry_after or 1.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "waited_seconds": round(self.stats["waited_seconds"], 3),
+            "rpm": round(self.max_rpm * self.fraction),
+            "tpm": round(self.max_tpm * self.fraction)
+        }
+
+llm_rate_limiter = AdaptiveRateLimiter(rpm=settings.LLM_RATE_LIMIT_RPM, tpm=settings.LLM_RATE_LIMIT_TPM)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.compression import compress_async, encoded_etag, negotiate_encoding, should_compress
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.db.task_events import add_task_listener, add_note_listener
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+class ResponseCache:
+    """
+    Per-user, versioned cache of serialized list responses.
+
+    Every write to a user's tasks or notes bumps the user's version, so responses
+    cached under an older version are never served again. With a shared Redis backend
+    the versions (and a copy of the bodies) live in Redis, keeping all workers coherent;
+    bodies are also kept in an in-process LRU bounded by RESPONSE_CACHE_MAX_BYTES, along
+    with their compressed copies, so a body is compressed once per encoding and worker.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: int, redis_client=None, prefix: str = "taskflow:resp:"):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self.prefix = prefix
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[Tuple[str, int, str], CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {
+            "hits": 0, "shared_hits": 0, "misses": 0, "not_modified": 0, "evictions": 0, "errors": 0, "compressed": 0
+        }
+
+    async def get_version(self, user_id: str) -> int:
+        if self.redis is not None:
+            try:
+                version = await self.redis.get(f"{self.prefix}ver:{user_id}")
+                return int(version or 0)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error reading response cache version: {e}")
+                # Without a reliable version, fall through to an uncacheable version
+                return -1
+        return self._versions.get(user_id, 0)
+
+    async def bump(self, user_id: str) -> None:
+        """Invalidate every cached response of the user"""
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        if self.redis is not None:
+            try:
+                await self.redis.incr(f"{self.prefix}ver:{user_id}")
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error bumping response cache version: {e}")
+
+    def _put_local(self, key: Tuple[str, int, str], entry: CachedResponse) -> None:
+        if entry.size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.stats["evictions"] += 1
+
+    async def get(self, user_id: str, version: int, route_key: str) -> Optional[CachedResponse]:
+        key = (user_id, version, route_key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(f"{self.prefix}{user_id}:{version}:{route_key}")
+                if raw is not None:
+                    data = json.loads(raw)
+                    entry = CachedResponse(data["body"].encode(), data["etag"], data["headers"])
+                    self._put_local(key, entry)
+                    self.stats["shared_hits"] += 1
+                    return entry
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error reading shared response cache: {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, user_id: str, version: int, route_key: str, entry: CachedResponse) -> None:
+        self._put_local((user_id, version, route_key), entry)
+        if self.redis is not None:
+            try:
+                raw = json.dumps({"body": entry.body.decode(), "etag": entry.etag, "headers": entry.headers})
+                await self.redis.set(f"{self.prefix}{user_id}:{version}:{route_key}", raw, ex=self.ttl_seconds)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error writing shared response cache: {e}")
+
+    def get_encoded(self, user_id: str, version: int, route_key: str, encoding: str) -> Optional[CachedResponse]:
+        """Compressed copy of a cached response, if this worker has one"""
+        key = (user_id, version, f"{route_key}#{encoding}")
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put_encoded(self, user_id: str, version: int, route_key: str, encoding: str, entry: CachedResponse) -> None:
+        self._put_local((user_id, version, f"{route_key}#{encoding}"), entry)
+
+    async def on_change(self, user_id: str, action: str, rows: List[Dict[str, Any]]) -> None:
+        """Change listener: any task or note write invalidates the user's cached responses"""
+        await self.bump(user_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "bytes": self._bytes}
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    redis_client=get_redis()
+)
+
+add_task_listener(response_cache.on_change)
+add_note_listener(response_cache.on_change)
+
+def _route_key(request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+async def cached_response(
+    request: Request,
+    user_id: str,
+    build: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+) -> Response:
+    """
+    Serve a user's JSON response from the cache, building and storing it on a miss.
+    build returns the serialized body and any extra headers to cache with it.
+    Large bodies are compressed as negotiated with Accept-Encoding, under their own ETag.
+    Answers If-None-Match with 304 when the ETag still matches.
+    """
+    entry = None
+    version = await response_cache.get_version(user_id)
+    route_key = _route_key(request)
+    cacheable = settings.RESPONSE_CACHE_ENABLED and version >= 0
+    if cacheable:
+        entry = await response_cache.get(user_id, version, route_key)
+
+    if entry is None:
+        body, headers = await build()
+        entry = CachedResponse(body, make_etag(body), headers)
+        if cacheable:
+            await response_cache.put(user_id, version, route_key, entry)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding")) if should_compress(entry.body) else None
+    if encoding is not None:
+        encoded = response_cache.get_encoded(user_id, version, route_key, encoding) if cacheable else None
+        if encoded is None:
+            encoded = CachedResponse(
+                await compress_async(entry.body, encoding),
+                encoded_etag(entry.etag, encoding),
+                {**entry.headers, "Content-Encoding": encoding}
+            )
+            response_cache.stats["compressed"] += 1
+            if cacheable:
+                response_cache.put_encoded(user_id, version, route_key, encoding, encoded)
+        entry = encoded
+
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if settings.RESPONSE_COMPRESSION_MIN_BYTES > 0:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers={**entry.headers, **headers})
@@ -0,0 +1,115 @@
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+# A line that starts a new speaker turn, e.g. "Alice:" or "[10:32] Bob Smith:"
+SPEAKER_LINE = re.compile(r"^\s*(\[[\d:]+\]\s*)?[A-Z][\w .'-]{0,40}:\s")
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tokenizer once, on first use"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # tiktoken missing or encoding files unavailable offline
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count model tokens in text, approximating with ~4 characters per token if tiktoken is unavailable"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def _split_blocks(text: str) -> List[str]:
+    """Split text into paragraphs and speaker turns"""
+    blocks: List[str] = []
+    current: List[str] = []
+    for line in text.splitlines():
+        if not line.strip() or SPEAKER_LINE.match(line):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            if not line.strip():
+                continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """Split a single block that is larger than max_tokens, first by line, then by size"""
+    pieces: List[str] = []
+    for line in block.splitlines():
+        if count_tokens(line) <= max_tokens:
+            pieces.append(line)
+            continue
+        # Hard split of a very long line, keeping word boundaries where possible
+        words = line.split(" ")
+        current = ""
+        for word in words:
+            candidate = f"{current} {word}" if current else word
+            if current and count_tokens(candidate) > max_tokens:
+                pieces.append(current)
+                current = word
+            else:
+                current = candidate
+        if current:
+            pieces.append(current)
+    return pieces
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split meeting notes into chunks of at most max_tokens tokens.
+    Chunks break on speaker and paragraph boundaries; a single oversized block is split by line.
+
+    Args:
+        text (str): The meeting notes text
+        max_tokens (int): Maximum number of tokens per chunk
+
+    Returns:
+        List of chunk strings (a single chunk if the text already fits)
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text]
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for block in _split_blocks(text):
+        block_tokens = count_tokens(block)
+        parts = [block] if block_tokens <= max_tokens else _split_oversized(block, max_tokens)
+        for part in parts:
+            part_tokens = count_tokens(part)
+            if current and current_tokens + part_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def normalize_task_description(description: str) -> str:
+    """Normalize a task description for duplicate detection"""
+    return re.sub(r"[\W_]+", " ", description.lower()).strip()
+
+def merge_task_dicts(task_lists: List[List[dict]]) -> List[dict]:
+    """
+    Merge task lists extracted from separate chunks, dropping duplicates.
+    When duplicates disagree on the due date, the first non-null due date wins.
+    """
+    merged: dict = {}
+    for tasks in task_lists:
+        for task in tasks:
+            key = normalize_task_description(task.get("description", ""))
+            if not key:
+                continue
+            existing: Optional[dict] = merged.get(key)
+            if existing is None:
+                merged[key] = dict(task)
+            elif not existing.get("due_date") and task.get("due_date"):
+                existing["due_date"] = task["due_date"]
+    return list(merged.values())
@@ -0,0 +1,222 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.db.supabase_ops import get_llm_token_usage, record_llm_token_usage
+
+# The user LLM calls made in the current context are billed to
+_billed_user: ContextVar[Optional[str]] = ContextVar("llm_billed_user", default=None)
+
+class TokenQuotaExceededError(Exception):
+    """Raised before LLM work for a user who has used up their daily token quota"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+@dataclass
+class DailyUsage:
+    """Token usage of one user on one UTC day, as far as this worker knows it"""
+    # Total in the database when last read or flushed (includes other workers' usage)
+    synced_tokens: int = 0
+    synced_at: Optional[float] = None
+    # Counted here and not yet in the database
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    requests: int = 0
+    cost_usd: float = 0.0
+    # Being written by the current flush
+    flushing_tokens: int = 0
+
+    @property
+    def pending_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def total_tokens(self) -> int:
+        return self.synced_tokens + self.flushing_tokens + self.pending_tokens
+
+def usage_day() -> date:
+    return datetime.now(timezone.utc).date()
+
+def seconds_until_next_day() -> float:
+    now = datetime.now(timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return (midnight - now).total_seconds()
+
+@contextmanager
+def billed_to(user_id: Optional[str]) -> Iterator[None]:
+    """Attribute the token usage of LLM calls made inside the block to a user"""
+    token = _billed_user.set(user_id)
+    try:
+        yield
+    finally:
+        _billed_user.reset(token)
+
+class TokenUsageStore:
+    """
+    Per-user, per-UTC-day LLM token counters with an optional daily quota.
+
+    Usage reported by the model callbacks is added to in-memory counters and written to
+    the llm_token_usage table in batches every flush_seconds, one round trip for all
+    users with new usage. Quota checks compare the user's total (database total plus
+    what this worker has not flushed yet) with the quota, re-reading the database total
+    at most every sync_seconds; usage of other workers is therefore seen with that delay.
+    Checks fail open when the database cannot be read.
+    """
+
+    def __init__(self, enabled: bool, daily_quota: int, flush_seconds: float,
+                 flush_batch_size: int, sync_seconds: float):
+        self.enabled = enabled
+        self.daily_quota = daily_quota
+        self.flush_seconds = flush_seconds
+        self.flush_batch_size = flush_batch_size
+        self.sync_seconds = sync_seconds
+        self._usage: Dict[Tuple[str, date], DailyUsage] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.stats = {
+            "recorded_tokens": 0, "unattributed_tokens": 0, "quota_rejections": 0,
+            "flushes": 0, "flushed_rows": 0, "flush_errors": 0, "sync_errors": 0
+        }
+
+    def record(self, prompt_tokens: int, completion_tokens: int, cost_usd: float = 0.0) -> None:
+        """Count the usage of one LLM response for the user of the current context"""
+        if not self.enabled:
+            return
+        user_id = _billed_user.get()
+        if user_id is None:
+            self.stats["unattributed_tokens"] += prompt_tokens + completion_tokens
+            return
+        usage = self._usage.setdefault((user_id, usage_day()), DailyUsage())
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
+        usage.requests += 1
+        usage.cost_usd += cost_usd
+        self.stats["recorded_tokens"] += prompt_tokens + completion_tokens
+
+    async def _sync(self, user_id: str, usage: DailyUsage, day: date) -> None:
+        try:
+            usage.synced_tokens = await get_llm_token_usage(UUID(user_id), day)
+            usage.synced_at = time.monotonic()
+        except Exception as e:
+            self.stats["sync_errors"] += 1
+            print(f"Error reading token usage of {user_id}: {e}")
+
+    async def check_quota(self, user_id: Optional[str]) -> None:
+        """Raise TokenQuotaExceededError if the user has used up today's quota"""
+        if not self.enabled or self.daily_quota <= 0 or user_id is None:
+            return
+        day = usage_day()
+        usage = self._usage.setdefault((user_id, day), DailyUsage())
+        if usage.synced_at is None or time.monotonic() - usage.synced_at > self.sync_seconds:
+            await self._sync(user_id, usage, day)
+        if usage.total_tokens >= self.daily_quota:
+            self.stats["quota_rejections"] += 1
+            raise TokenQuotaExceededError(
+                f"Daily LLM token quota of {self.daily_quota} tokens is used up",
+                retry_after=seconds_until_next_day()
+            )
+
+    def get_usage(self, user_id: str) -> int:
+        """Tokens the user has used today, as far as this worker knows"""
+        usage = self._usage.get((user_id, usage_day()))
+        return usage.total_tokens if usage is not None else 0
+
+    async def flush(self) -> int:
+        """Write the pending usage to the database; returns the number of rows written"""
+        async with self._flush_lock:
+            batch: List[Tuple[Tuple[str, date], DailyUsage, Dict[str, Any]]] = []
+            for key, usage in self._usage.items():
+                if not usage.requests:
+                    continue
+                row = {
+                    "user_id": key[0],
+                    "usage_date": key[1].isoformat(),
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "requests": usage.requests,
+                    "cost_usd": round(usage.cost_usd, 6)
+                }
+                usage.flushing_tokens = usage.pending_tokens
+                usage.prompt_tokens = usage.completion_tokens = usage.requests = 0
+                usage.cost_usd = 0.0
+                batch.append((key, usage, row))
+
+            written = 0
+            for start in range(0, len(batch), self.flush_batch_size):
+                chunk = batch[start:start + self.flush_batch_size]
+                try:
+                    totals = await record_llm_token_usage([row for _, _, row in chunk])
+                except Exception as e:
+                    self.stats["flush_errors"] += 1
+                    print(f"Error flushing token usage: {e}")
+                    # Keep the usage for the next flush
+                    for _, usage, row in chunk:
+                        usage.prompt_tokens += row["prompt_tokens"]
+                        usage.completion_tokens += row["completion_tokens"]
+                        usage.requests += row["requests"]
+                        usage.cost_usd += row["cost_usd"]
+                        usage.flushing_tokens = 0
+                    continue
+                synced = {(row["user_id"], date.fromisoformat(row["usage_date"])): row["total_tokens"] for row in totals}
+                now = time.monotonic()
+                for key, usage, _ in chunk:
+                    usage.flushing_tokens = 0
+                    if key in synced:
+                        usage.synced_tokens = synced[key]
+                        usage.synced_at = now
+                written += len(chunk)
+
+            self._prune()
+            if written:
+                self.stats["flushes"] += 1
+                self.stats["flushed_rows"] += written
+            return written
+
+    def _prune(self) -> None:
+        """Drop counters of past days once they are flushed"""
+        today = usage_day()
+        for key in [key for key, usage in self._usage.items() if key[1] < today and not usage.requests]:
+            del self._usage[key]
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush"""
+        if self.enabled and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write what is still pending"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        if self.enabled:
+            await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "daily_quota": self.daily_quota or None,
+            "tracked_users": len(self._usage),
+            "pending_rows": sum(1 for usage in self._usage.values() if usage.requests)
+        }
+
+token_usage = TokenUsageStore(
+    enabled=settings.TOKEN_USAGE_ENABLED,
+    daily_quota=settings.LLM_DAILY_TOKEN_QUOTA,
+    flush_seconds=settings.TOKEN_USAGE_FLUSH_SECONDS,
+    flush_batch_size=settings.TOKEN_USAGE_FLUSH_BATCH_SIZE,
+    sync_seconds=settings.TOKEN_USAGE_SYNC_SECONDS
+)
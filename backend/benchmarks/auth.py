@@ -0,0 +1,70 @@
+"""
+Time the authentication of one request, per path.
+
+    cd backend && python -m benchmarks.auth [--calls 20000] [--tokens 1000]
+
+Paths, with HS256 tokens signed by SUPABASE_JWT_SECRET:
+  unverified  jwt.decode without signature verification, what get_current_user did before
+              signatures were checked (shown for reference; it accepts forged tokens)
+  verified    verify_token: signature, audience, exp and sub, as on a token cache miss
+  cached      get_current_user for tokens already verified, served from the token cache
+--tokens distinct tokens are used round-robin (sessions), all fitting the token cache.
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, List
+
+# The HS256 key is parsed when app.auth.security is imported; any secret will do offline
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-jwt-secret")
+
+import jwt
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.auth.security import get_current_user, token_cache, verify_token
+from app.core.config import settings
+
+def make_tokens(count: int) -> List[str]:
+    expires = int(time.time()) + 3600
+    return [
+        jwt.encode({"sub": f"00000000-0000-0000-0000-{i:012d}", "aud": settings.SUPABASE_JWT_AUDIENCE, "exp": expires},
+                   settings.SUPABASE_JWT_SECRET, algorithm="HS256")
+        for i in range(count)
+    ]
+
+async def per_call(function: Callable[[str], Awaitable[object]], tokens: List[str], calls: int) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        await function(tokens[i % len(tokens)])
+    return (time.perf_counter() - started) / calls
+
+async def unverified(token: str):
+    return jwt.decode(token, options={"verify_signature": False})
+
+async def cached(token: str):
+    return await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+async def run(calls: int, token_count: int) -> None:
+    tokens = make_tokens(token_count)
+    assert token_count <= token_cache.max_size, "use at most AUTH_TOKEN_CACHE_SIZE tokens"
+    # Fill the token cache, so the cached path measures hits only
+    for token in tokens:
+        await cached(token)
+    baseline = None
+    for name, function in (("unverified", unverified), ("verified", verify_token), ("cached", cached)):
+        seconds = await per_call(function, tokens, calls)
+        baseline = baseline or seconds
+        print(f"  {name:<11} {seconds * 1e6:8.2f} us/request  {baseline / seconds:6.2f}x")
+    print(f"token cache: {token_cache.stats}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=1000, help="distinct tokens (sessions)")
+    args = parser.parse_args()
+    print(f"{args.calls} requests over {args.tokens} tokens")
+    asyncio.run(run(args.calls, args.tokens))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measure what idle change feed connections cost a worker.
+
+    cd backend && python -m benchmarks.change_feed [--connections 1000,10000] [--publishes 10000]
+
+For each connection count, subscribes that many idle connections (one per user, each
+with a task waiting for frames like the SSE endpoint does) and reports the memory they
+hold (tracemalloc) and the time to publish a change to one user with all of them open.
+The full HTTP path, with sockets and heartbeats, is the tasks.events profile of
+python -m benchmarks.run.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.services.change_feed import ChangeFeed, LocalBroker
+
+TASKS = [{"id": "00000000-0000-0000-0000-000000000001", "description": "Send the report", "status": "open"}]
+
+async def measure(connections: int, publishes: int) -> None:
+    feed = ChangeFeed(LocalBroker(), max_buffer=256, max_connections=connections + 1)
+    await feed.start()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    subscriptions = [feed.subscribe(f"user-{i}") for i in range(connections)]
+    waiting = [asyncio.create_task(subscription.next_frames(3600)) for subscription in subscriptions]
+    # Let every waiter reach its wait
+    await asyncio.sleep(0)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    target = feed.subscribe("user-target")
+    started = time.perf_counter()
+    for _ in range(publishes):
+        await feed.on_task_change("user-target", "updated", TASKS)
+        await target.next_frames(0)
+    publish_seconds = (time.perf_counter() - started) / publishes
+
+    await feed.stop()
+    await asyncio.gather(*waiting)
+    print(f"{connections:>7} idle connections: {(held - before) / connections:7.0f} B each "
+          f"({(held - before) / 2 ** 20:6.1f} MiB), {publish_seconds * 1e6:6.2f} us per change to one user")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=lambda value: [int(count) for count in value.split(",")],
+                        default=[1000, 10000])
+    parser.add_argument("--publishes", type=int, default=10000, help="changes published per measurement")
+    args = parser.parse_args()
+    for connections in args.connections:
+        asyncio.run(measure(connections, args.publishes))
+
+if __name__ == "__main__":
+    main()
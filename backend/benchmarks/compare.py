@@ -0,0 +1,85 @@
+"""
+Compare two benchmark result files, e.g. from the commits before and after a change.
+
+    cd backend && python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 10] [--fail-on-regression]
+
+Prints throughput, latency percentiles and event-loop lag per profile with the relative
+change. A profile regresses when its throughput drops, or its p95/p99 latency grows, by
+more than --threshold percent. With --fail-on-regression the exit status is 1 if any does.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# (label, path into a profile result, whether higher is better)
+METRICS: List[Tuple[str, Tuple[str, ...], bool]] = [
+    ("rps", ("rps",), True),
+    ("p50 ms", ("latency_ms", "p50"), False),
+    ("p95 ms", ("latency_ms", "p95"), False),
+    ("p99 ms", ("latency_ms", "p99"), False),
+    ("errors", ("errors",), False),
+    ("lag p99 ms", ("event_loop_lag_ms", "p99"), False),
+    ("rss MB", ("memory_mb", "rss"), False),
+]
+REGRESSION_METRICS = ("rps", "p95 ms", "p99 ms")
+
+def _value(result: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    return result
+
+def _change(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    if old is None or new is None or old == 0:
+        return None
+    return (new - old) / old * 100
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[str]:
+    """Print the comparison and return the regressions found"""
+    old_profiles = {p["name"]: p for p in baseline["profiles"]}
+    regressions = []
+    print(f"baseline:  {baseline['git'].get('commit')}{' (dirty)' if baseline['git'].get('dirty') else ''}")
+    print(f"candidate: {candidate['git'].get('commit')}{' (dirty)' if candidate['git'].get('dirty') else ''}")
+    old_startup, new_startup = baseline.get("api_startup_seconds"), candidate.get("api_startup_seconds")
+    change = _change(old_startup, new_startup)
+    print(f"api startup s {old_startup!s:>8} -> {new_startup!s:>10}  {f'{change:+7.1f}%' if change is not None else ''}")
+    for new in candidate["profiles"]:
+        old = old_profiles.get(new["name"])
+        if old is None:
+            print(f"\n{new['name']}: not in the baseline")
+            continue
+        print(f"\n{new['name']}")
+        for label, path, higher_is_better in METRICS:
+            old_value, new_value = _value(old, path), _value(new, path)
+            change = _change(old_value, new_value)
+            marker = ""
+            if change is not None and label in REGRESSION_METRICS:
+                worse = -change if higher_is_better else change
+                if worse > threshold:
+                    marker = "  REGRESSION"
+                    regressions.append(f"{new['name']} {label} {change:+.1f}%")
+                elif -worse > threshold:
+                    marker = "  improved"
+            change_text = f"{change:+7.1f}%" if change is not None else "       "
+            print(f"  {label:<11} {old_value!s:>10} -> {new_value!s:>10}  {change_text}{marker}")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    regressions = compare(json.loads(args.baseline.read_text()), json.loads(args.candidate.read_text()), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): " + "; ".join(regressions))
+        if args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
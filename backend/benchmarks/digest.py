@@ -0,0 +1,65 @@
+"""
+Time the daily digest ranking at several task counts.
+
+    cd backend && python -m benchmarks.digest [--sizes 1000,10000,100000] [--limit 20] [--legacy-max 10000]
+
+Paths, all from PostgREST-shaped rows of one user:
+  legacy  the ranking before the digest was bounded: four passes over every task and a
+          membership scan of the earlier buckets per task (quadratic), returning every task
+  ranked  rank_digest_tasks, the single-pass top --limit ranking used when the
+          get_daily_digest database function is not deployed (the function ranks the same way)
+The legacy path is skipped above --legacy-max tasks. The ranked digest is checked to hold
+each task once, in bucket order.
+"""
+import argparse
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from app.db.supabase_ops import digest_bucket, rank_digest_tasks
+from benchmarks.serialization import best_time, make_rows
+
+def legacy_digest(tasks: List[Dict[str, Any]], today: date) -> List[Dict[str, Any]]:
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+    important_tasks = [t for t in tasks if t.get("is_important")]
+    due_today = [t for t in tasks if t.get("due_date") and datetime.fromisoformat(t["due_date"]).date() == today]
+    due_this_week = [t for t in tasks if t.get("due_date")
+                     and week_start <= datetime.fromisoformat(t["due_date"]).date() <= week_end]
+    recent_tasks = [t for t in tasks if t not in important_tasks + due_today + due_this_week]
+    return important_tasks + due_today + due_this_week + recent_tasks
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[1000, 10000, 100000])
+    parser.add_argument("--limit", type=int, default=20, help="digest size")
+    parser.add_argument("--legacy-max", type=int, default=10000, help="largest task count to run the legacy path on")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to repeat each measurement for")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # make_rows spreads due dates over 2026; rank against a day in the middle of them
+    today = date(2026, 7, 1)
+    for size in args.sizes:
+        rows = make_rows(size, rng)
+        rows.sort(key=lambda row: row["created_at"], reverse=True)
+        ranked = rank_digest_tasks(rows, today, args.limit)
+        week_start = today - timedelta(days=today.weekday())
+        buckets = [digest_bucket(task, today, week_start, week_start + timedelta(days=6)) for task in ranked]
+        assert buckets == sorted(buckets) and len({task["id"] for task in ranked}) == len(ranked)
+
+        print(f"\n{size} tasks")
+        seconds = best_time(lambda: rank_digest_tasks(rows, today, args.limit), args.min_time)
+        print(f"  {'ranked':<8} {seconds * 1000:10.3f} ms  {seconds / size * 1e6:7.2f} us/task  {len(ranked):7} rows")
+        if size > args.legacy_max:
+            print(f"  {'legacy':<8} skipped (more than --legacy-max tasks)")
+            continue
+        # The legacy path lists a task once per bucket it matches, hence more rows than tasks
+        legacy = legacy_digest(rows, today)
+        legacy_seconds = best_time(lambda: legacy_digest(rows, today), args.min_time)
+        print(f"  {'legacy':<8} {legacy_seconds * 1000:10.3f} ms  {legacy_seconds / size * 1e6:7.2f} us/task  "
+              f"{len(legacy):7} rows  ({legacy_seconds / seconds:.1f}x slower)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+OpenAI-compatible chat completions stand-in for benchmarks.
+
+    cd backend && python -m benchmarks.fake_openai --port 54322 --ttft 0.4 --tokens-per-second 60
+
+Answers the backend's prompts with plausible output derived from the notes: plain-text
+summaries, {"tasks": [...]} for task extraction and {"summary", "tasks"} for the single-pass
+prompt. Latency is modelled as a time to first token (--ttft, with optional lognormal
+jitter) plus the completion tokens at --tokens-per-second; streamed responses emit their
+tokens at that rate. Errors can be injected at fixed rates (429 with Retry-After, 500,
+requests that never answer), and --rpm/--tpm enforce a per-minute rate limit that is
+reported in x-ratelimit-* headers like the real API does.
+
+GET /__bench__/stats reports calls, tokens and injected errors (POST /__bench__/stats/reset clears them).
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import orjson
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+_ACTION = re.compile(r"\b(will|should|needs? to|must|todo|action item|follow up)\b", re.IGNORECASE)
+_ISO_DATE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+
+def count_tokens(text: str) -> int:
+    """Rough token count, about four characters per token"""
+    return max(1, len(text) // 4)
+
+def _notes_of(prompt: str) -> str:
+    for marker in ("Meeting Notes:", "meeting notes:", "same meeting."):
+        if marker in prompt:
+            return prompt.rsplit(marker, 1)[1]
+    return prompt
+
+def _summary(notes: str, tokens: int) -> str:
+    words = notes.split() or ["notes"]
+    count = max(8, int(tokens * 0.75))
+    return "The meeting covered " + " ".join(words[i % len(words)] for i in range(count)) + "."
+
+def _tasks(notes: str) -> List[Dict[str, Any]]:
+    tasks = []
+    for line in notes.splitlines():
+        line = line.strip(" -*•\t")
+        if line and _ACTION.search(line):
+            due = _ISO_DATE.search(line)
+            tasks.append({"description": line[:200], "due_date": due.group(0) if due else None})
+    return tasks
+
+def answer(prompt: str, summary_tokens: int) -> str:
+    notes = _notes_of(prompt)
+    if '"summary"' in prompt and '"tasks"' in prompt:
+        return json.dumps({"summary": _summary(notes, summary_tokens), "tasks": _tasks(notes)})
+    if '"tasks"' in prompt:
+        return json.dumps({"tasks": _tasks(notes)})
+    return _summary(notes, summary_tokens)
+
+class RateWindow:
+    """Requests and tokens of the last minute"""
+
+    def __init__(self):
+        self.events: Deque[Tuple[float, int]] = deque()
+        self.tokens = 0
+
+    def trim(self, now: float) -> None:
+        while self.events and now - self.events[0][0] >= 60:
+            self.tokens -= self.events.popleft()[1]
+
+    def add(self, now: float, tokens: int) -> None:
+        self.events.append((now, tokens))
+        self.tokens += tokens
+
+    def reset_after(self, now: float) -> float:
+        return max(0.0, 60 - (now - self.events[0][0])) if self.events else 0.0
+
+class FakeOpenAI:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.window = RateWindow()
+        self.stats: Counter = Counter()
+
+    def latency(self) -> float:
+        ttft = self.args.ttft
+        if self.args.jitter > 0:
+            ttft *= self.rng.lognormvariate(0, self.args.jitter)
+        return ttft
+
+    def rate_headers(self, now: float) -> Dict[str, str]:
+        headers = {}
+        reset = f"{self.window.reset_after(now):.3f}s"
+        if self.args.rpm:
+            headers.update({
+                "x-ratelimit-limit-requests": str(self.args.rpm),
+                "x-ratelimit-remaining-requests": str(max(0, self.args.rpm - len(self.window.events))),
+                "x-ratelimit-reset-requests": reset
+            })
+        if self.args.tpm:
+            headers.update({
+                "x-ratelimit-limit-tokens": str(self.args.tpm),
+                "x-ratelimit-remaining-tokens": str(max(0, self.args.tpm - self.window.tokens)),
+                "x-ratelimit-reset-tokens": reset
+            })
+        return headers
+
+    def injected_error(self, now: float, prompt_tokens: int) -> Optional[Response]:
+        self.window.trim(now)
+        over_limit = (
+            (self.args.rpm and len(self.window.events) >= self.args.rpm)
+            or (self.args.tpm and self.window.tokens + prompt_tokens > self.args.tpm)
+        )
+        if over_limit or self.rng.random() < self.args.error_rate_429:
+            self.stats["errors_429"] += 1
+            retry_after = self.window.reset_after(now) if over_limit else 1.0
+            return Response(
+                orjson.dumps({"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}),
+                status_code=429,
+                media_type="application/json",
+                headers={**self.rate_headers(now), "retry-after": f"{max(retry_after, 0.1):.3f}"}
+            )
+        if self.rng.random() < self.args.error_rate_500:
+            self.stats["errors_500"] += 1
+            return Response(
+                orjson.dumps({"error": {"message": "The server had an error", "type": "server_error"}}),
+                status_code=500,
+                media_type="application/json"
+            )
+        return None
+
+    async def chat(self, request: Request) -> Response:
+        body = orjson.loads(await request.body())
+        self.stats["calls"] += 1
+        prompt = "\n".join(
+            message["content"] if isinstance(message.get("content"), str) else str(message.get("content"))
+            for message in body["messages"]
+        )
+        prompt_tokens = count_tokens(prompt)
+        now = time.monotonic()
+
+        if self.rng.random() < self.args.hang_rate:
+            self.stats["hangs"] += 1
+            await asyncio.sleep(3600)
+        error = self.injected_error(now, prompt_tokens)
+        if error is not None:
+            await asyncio.sleep(self.args.error_latency)
+            return error
+
+        text = answer(prompt, self.args.summary_tokens)
+        completion_tokens = count_tokens(text)
+        self.window.add(now, prompt_tokens + completion_tokens)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        headers = self.rate_headers(now)
+        model = body.get("model", "fake")
+        generation_time = completion_tokens / self.args.tokens_per_second if self.args.tokens_per_second > 0 else 0.0
+
+        if body.get("stream"):
+            self.stats["streams"] += 1
+            # About four characters per token, a few tokens per chunk
+            step = 16
+            pieces = [text[i:i + step] for i in range(0, len(text), step)] or [""]
+            pause = generation_time / len(pieces)
+
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> bytes:
+                return b"data: " + orjson.dumps({
+                    "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }) + b"\n\n"
+
+            async def stream():
+                await asyncio.sleep(self.latency())
+                yield chunk({"role": "assistant", "content": ""})
+                for piece in pieces:
+                    if pause:
+                        await asyncio.sleep(pause)
+                    yield chunk({"content": piece})
+                yield chunk({}, "stop")
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    yield b"data: " + orjson.dumps({
+                        "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": model, "choices": [], "usage": usage
+                    }) + b"\n\n"
+                yield b"data: [DONE]\n\n"
+
+            return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+        await asyncio.sleep(self.latency() + generation_time)
+        return Response(orjson.dumps({
+            "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage
+        }), media_type="application/json", headers=headers)
+
+    async def stats_endpoint(self, request: Request) -> Response:
+        if request.method == "POST":
+            self.stats.clear()
+            return Response(b"{}", media_type="application/json")
+        return Response(orjson.dumps(dict(self.stats)), media_type="application/json")
+
+def create_app(fake: FakeOpenAI) -> Starlette:
+    return Starlette(routes=[
+        Route("/v1/chat/completions", fake.chat, methods=["POST"]),
+        Route("/__bench__/stats", fake.stats_endpoint, methods=["GET"]),
+        Route("/__bench__/stats/reset", fake.stats_endpoint, methods=["POST"])
+    ])
+
+# Latency and error options: (name, type, default, help). benchmarks.run accepts them prefixed with llm-
+OPTIONS = (
+    ("ttft", float, 0.4, "seconds to the first token"),
+    ("jitter", float, 0.0, "sigma of lognormal jitter on the time to first token"),
+    ("tokens-per-second", float, 60.0, "completion tokens per second, 0 for instant"),
+    ("summary-tokens", int, 120, "length of generated summaries"),
+    ("error-rate-429", float, 0.0, "fraction of requests answered with 429"),
+    ("error-rate-500", float, 0.0, "fraction of requests answered with 500"),
+    ("hang-rate", float, 0.0, "fraction of requests that never answer"),
+    ("error-latency", float, 0.05, "seconds before an injected error is returned"),
+    ("rpm", int, 0, "requests per minute limit, 0 for none"),
+    ("tpm", int, 0, "tokens per minute limit, 0 for none"),
+)
+
+def add_arguments(parser: argparse.ArgumentParser, prefix: str = "") -> None:
+    for name, kind, default, help_text in OPTIONS:
+        parser.add_argument(f"--{prefix}{name}", type=kind, default=default, help=help_text)
+
+def forward_arguments(args: argparse.Namespace, prefix: str = "") -> List[str]:
+    """Command-line arguments for this server from options parsed with add_arguments(parser, prefix)"""
+    argv = []
+    for name, _, _, _ in OPTIONS:
+        argv += [f"--{name}", str(getattr(args, f"{prefix}{name}".replace("-", "_")))]
+    return argv
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54322)
+    parser.add_argument("--seed", type=int, default=1)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(FakeOpenAI(args)), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
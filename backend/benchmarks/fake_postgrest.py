@@ -0,0 +1,468 @@
+"""
+PostgREST stand-in for benchmarks: an in-memory store that speaks the part of the
+PostgREST API the backend uses, seeded with synthetic users, notes and tasks.
+
+    cd backend && python -m benchmarks.fake_postgrest --port 54321 --users 100 --notes-per-user 20 --tasks-per-note 4
+
+Supported: column lists and `table!inner()` embeds in select, eq/neq/gt/gte/lt/lte/in/is
+filters (with `not.` and nested `or=(...)`/`and(...)` groups), order, limit, offset,
+`Prefer: count=exact` and HEAD, insert/update/delete returning rows, the updated_at and
+sync tombstone triggers, ON DELETE CASCADE from notes, and the get_daily_digest,
+bulk_mutate_tasks and record_llm_token_usage functions. Other functions answer PGRST202
+like a migration that has not been applied. --latency adds a fixed delay per request to
+model the network round trip to the database.
+
+GET /__bench__/users lists the seeded users with some of their note and task ids,
+GET /__bench__/stats counts requests per table (POST /__bench__/stats/reset clears it).
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.db.supabase_ops import rank_digest_tasks
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+# Child table, foreign key column and parent table of the embeds and cascades the backend relies on
+RELATIONS = {("meeting_notes", "tasks"): "note_id", ("meeting_notes", "processing_jobs"): "note_id"}
+SYNCED_TABLES = ("tasks", "meeting_notes")
+
+def json_response(data: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(orjson.dumps(data), status_code=status_code, media_type="application/json", headers=headers)
+
+def error_response(status_code: int, code: str, message: str) -> Response:
+    return json_response({"code": code, "message": message, "details": None, "hint": None}, status_code)
+
+class Clock:
+    """clock_timestamp(): distinct, increasing timestamps even within one statement"""
+
+    def __init__(self):
+        self._last = datetime.min.replace(tzinfo=timezone.utc)
+
+    def now(self) -> str:
+        current = max(datetime.now(timezone.utc), self._last + timedelta(microseconds=1))
+        self._last = current
+        return current.isoformat()
+
+class Table:
+    """Rows by id, indexed by user_id"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: Dict[str, Row] = {}
+        self.by_user: Dict[str, Dict[str, Row]] = {}
+
+    def add(self, row: Row) -> None:
+        self.rows[str(row["id"])] = row
+        if row.get("user_id") is not None:
+            self.by_user.setdefault(row["user_id"], {})[str(row["id"])] = row
+
+    def remove(self, row: Row) -> None:
+        self.rows.pop(str(row["id"]), None)
+        if row.get("user_id") is not None:
+            self.by_user.get(row["user_id"], {}).pop(str(row["id"]), None)
+
+    def candidates(self, params: List[Tuple[str, str]]) -> Iterable[Row]:
+        """Rows that can match the filters, narrowed with the id and user_id indexes"""
+        for column, expression in params:
+            if column == "id" and expression.startswith("eq."):
+                row = self.rows.get(_unquote(expression[3:]))
+                return [row] if row is not None else []
+        for column, expression in params:
+            if column == "user_id" and expression.startswith("eq."):
+                return list(self.by_user.get(_unquote(expression[3:]), {}).values())
+        return list(self.rows.values())
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+def _split_top_level(value: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in value:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+def _comparable(row_value: Any, value: str) -> Tuple[Any, Any]:
+    """Compare a column value with a filter literal the way Postgres would for its type"""
+    if isinstance(row_value, bool):
+        return str(row_value).lower(), value.lower()
+    if isinstance(row_value, (int, float)):
+        try:
+            return row_value, float(value)
+        except ValueError:
+            return str(row_value), value
+    return str(row_value), value
+
+def parse_filter(column: str, expression: str) -> Predicate:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, value = expression.partition(".")
+
+    if op == "in":
+        values = {_unquote(item) for item in _split_top_level(value.strip("()"))}
+        def test(row: Row) -> bool:
+            row_value = row.get(column)
+            if row_value is None:
+                return False
+            return (str(row_value).lower() if isinstance(row_value, bool) else str(row_value)) in values
+    elif op == "is":
+        expected = {"null": None, "true": True, "false": False}[value.lower()]
+        def test(row: Row) -> bool:
+            return row.get(column) is expected
+    else:
+        value = _unquote(value)
+        compare = {
+            "eq": lambda a, b: a == b, "neq": lambda a, b: a != b,
+            "gt": lambda a, b: a > b, "gte": lambda a, b: a >= b,
+            "lt": lambda a, b: a < b, "lte": lambda a, b: a <= b
+        }[op]
+        def test(row: Row) -> bool:
+            row_value = row.get(column)
+            if row_value is None:
+                return False
+            return compare(*_comparable(row_value, value))
+
+    return (lambda row: not test(row)) if negate else test
+
+def parse_group(kind: str, body: str) -> Predicate:
+    """An or=(...) / and(...) group of conditions"""
+    conditions = []
+    for item in _split_top_level(body):
+        if item.startswith(("and(", "or(")):
+            nested_kind, _, rest = item.partition("(")
+            conditions.append(parse_group(nested_kind, rest[:-1]))
+        else:
+            column, _, expression = item.partition(".")
+            conditions.append(parse_filter(column, expression))
+    if kind == "or":
+        return lambda row: any(condition(row) for condition in conditions)
+    return lambda row: all(condition(row) for condition in conditions)
+
+def sort_rows(rows: List[Row], order: str) -> List[Row]:
+    """ORDER BY, with Postgres' default NULLS LAST for ascending and NULLS FIRST for descending"""
+    for term in reversed(_split_top_level(order)):
+        parts = term.split(".")
+        column, descending = parts[0], "desc" in parts[1:]
+        nulls_first = "nullsfirst" in parts[1:] or (descending and "nullslast" not in parts[1:])
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+class Database:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.clock = Clock()
+        self.tables: Dict[str, Table] = {}
+        self.stats: Counter = Counter()
+        self._serial = 0
+        self.functions = {
+            "get_daily_digest": self.get_daily_digest,
+            "bulk_mutate_tasks": self.bulk_mutate_tasks,
+            "record_llm_token_usage": self.record_llm_token_usage
+        }
+
+    def table(self, name: str) -> Table:
+        if name not in self.tables:
+            self.tables[name] = Table(name)
+        return self.tables[name]
+
+    def defaults(self, table: str) -> Row:
+        now = self.clock.now()
+        if table == "sync_tombstones":
+            self._serial += 1
+            return {"id": self._serial, "deleted_at": now}
+        row = {"id": str(uuid.uuid4()), "created_at": now}
+        if table in SYNCED_TABLES or table == "processing_jobs":
+            row["updated_at"] = now
+        if table == "tasks":
+            row.update({"status": "open", "is_important": False, "due_date": None, "note_id": None})
+        if table == "processing_jobs":
+            row.update({"status": "queued", "result": None, "error": None, "attempts": 0, "timezone": None})
+        return row
+
+    def insert(self, table: str, values: Row) -> Row:
+        row = {**self.defaults(table), **values}
+        self.table(table).add(row)
+        return row
+
+    def delete(self, table: str, row: Row) -> None:
+        self.table(table).remove(row)
+        for (parent, child), column in RELATIONS.items():
+            if parent == table:
+                for child_row in [r for r in self.table(child).candidates([("user_id", f"eq.{row.get('user_id')}")])
+                                  if r.get(column) == row["id"]]:
+                    self.delete(child, child_row)
+        if table in SYNCED_TABLES:
+            self.insert("sync_tombstones", {"user_id": row["user_id"], "table_name": table, "record_id": row["id"]})
+
+    def select(self, table: str, params: List[Tuple[str, str]]) -> Tuple[List[Row], int]:
+        """Rows matching the query and the count before limit/offset"""
+        filters: List[Predicate] = []
+        embeds: List[Tuple[str, bool, str]] = []
+        columns: Optional[List[str]] = None
+        order = limit = offset = None
+        for key, value in params:
+            if key == "select":
+                columns = []
+                for item in _split_top_level(value):
+                    if "(" in item:
+                        name, _, embed_columns = item.partition("(")
+                        child, _, hint = name.partition("!")
+                        embeds.append((child, hint == "inner", embed_columns.rstrip(")")))
+                    else:
+                        columns.append(item)
+            elif key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key == "or":
+                filters.append(parse_group("or", value.strip()[1:-1]))
+            elif key != "columns":
+                filters.append(parse_filter(key, value))
+
+        rows = [row for row in self.table(table).candidates(params) if all(f(row) for f in filters)]
+        embedded: Dict[str, Dict[str, List[Row]]] = {}
+        for child, inner, _ in embeds:
+            column = RELATIONS[(table, child)]
+            children: Dict[str, List[Row]] = {}
+            users = {row.get("user_id") for row in rows}
+            for user_id in users:
+                for child_row in self.table(child).by_user.get(user_id, {}).values():
+                    children.setdefault(child_row.get(column), []).append(child_row)
+            embedded[child] = children
+            if inner:
+                rows = [row for row in rows if children.get(row["id"])]
+
+        total = len(rows)
+        if order:
+            rows = sort_rows(rows, order)
+        if offset:
+            rows = rows[offset:]
+        if limit is not None:
+            rows = rows[:limit]
+
+        def project(row: Row) -> Row:
+            out = dict(row) if columns is None or "*" in columns else {c: row.get(c) for c in columns}
+            for child, _, embed_columns in embeds:
+                if embed_columns:
+                    names = _split_top_level(embed_columns)
+                    out[child] = [
+                        dict(r) if "*" in names else {c: r.get(c) for c in names}
+                        for r in embedded[child].get(row["id"], [])
+                    ]
+            return out
+
+        return [project(row) for row in rows], total
+
+    # Database functions
+    def get_daily_digest(self, args: Row) -> Any:
+        tasks = sort_rows(list(self.table("tasks").by_user.get(args["p_user_id"], {}).values()), "created_at.desc")
+        return rank_digest_tasks(tasks, date.fromisoformat(args["p_today"]), int(args["p_limit"]))
+
+    def bulk_mutate_tasks(self, args: Row) -> Any:
+        tasks = self.table("tasks")
+        results = []
+        for op_name, column in (("update_status", "status"), ("update_importance", "is_important")):
+            latest = {op["task_id"]: op[column] for op in args["p_ops"] if op["op"] == op_name}
+            for task_id, value in latest.items():
+                row = tasks.rows.get(task_id)
+                if row is not None and row["user_id"] == args["p_user_id"]:
+                    row[column] = value
+                    row["updated_at"] = self.clock.now()
+                    results.append({"op_name": op_name, "row_id": task_id, "task": dict(row)})
+        for op in args["p_ops"]:
+            row = tasks.rows.get(op["task_id"]) if op["op"] == "delete" else None
+            if row is not None and row["user_id"] == args["p_user_id"]:
+                self.delete("tasks", row)
+                results.append({"op_name": "delete", "row_id": op["task_id"], "task": row})
+        return results
+
+    def record_llm_token_usage(self, args: Row) -> Any:
+        usage = self.table("llm_token_usage")
+        totals = {}
+        for delta in args["p_rows"]:
+            key = f"{delta['user_id']}:{delta['usage_date']}"
+            row = usage.rows.get(key)
+            if row is None:
+                row = {"id": key, "user_id": delta["user_id"], "usage_date": delta["usage_date"],
+                       "prompt_tokens": 0, "completion_tokens": 0, "requests": 0, "cost_usd": 0.0}
+                usage.add(row)
+            for column in ("prompt_tokens", "completion_tokens", "requests", "cost_usd"):
+                row[column] += delta[column]
+            row["updated_at"] = self.clock.now()
+            totals[key] = {"user_id": row["user_id"], "usage_date": row["usage_date"],
+                           "total_tokens": row["prompt_tokens"] + row["completion_tokens"]}
+        return list(totals.values())
+
+    # Seeding
+    def seed(self, users: int, notes_per_user: int, tasks_per_note: int, seed: int) -> None:
+        rng = random.Random(seed)
+        today = datetime.now(timezone.utc)
+        words = ("budget roadmap launch review hiring design release customer migration security "
+                 "pricing onboarding metrics incident contract partner training survey").split()
+        for _ in range(users):
+            user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            created = sorted(today - timedelta(days=rng.uniform(0, 90)) for _ in range(notes_per_user))
+            for note_created in created:
+                topic = " ".join(rng.sample(words, 3))
+                stamp = note_created.isoformat()
+                note = self.insert("meeting_notes", {
+                    "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                    "user_id": user_id,
+                    "original_text": f"Meeting about {topic}.\n" + "\n".join(
+                        f"- {rng.choice(words).capitalize()} will {rng.choice(words)} the {rng.choice(words)}"
+                        for _ in range(tasks_per_note)
+                    ),
+                    "summary": f"The team discussed {topic}.",
+                    "created_at": stamp,
+                    "updated_at": stamp
+                })
+                for i in range(tasks_per_note):
+                    due = today.date() + timedelta(days=rng.randint(-14, 30)) if rng.random() < 0.7 else None
+                    task_stamp = (note_created + timedelta(microseconds=i + 1)).isoformat()
+                    self.insert("tasks", {
+                        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                        "user_id": user_id,
+                        "note_id": note["id"],
+                        "description": f"{rng.choice(words).capitalize()} {rng.choice(words)} follow-up",
+                        "due_date": due.isoformat() if due else None,
+                        "status": "completed" if rng.random() < 0.3 else "open",
+                        "is_important": rng.random() < 0.1,
+                        "created_at": task_stamp,
+                        "updated_at": task_stamp
+                    })
+
+def create_app(db: Database) -> Starlette:
+    async def delay() -> None:
+        if db.latency > 0:
+            await asyncio.sleep(db.latency)
+
+    async def table_endpoint(request: Request) -> Response:
+        name = request.path_params["table"]
+        db.stats[f"{request.method} {name}"] += 1
+        await delay()
+        params = list(request.query_params.multi_items())
+        prefer = request.headers.get("prefer", "")
+        returning = "return=minimal" not in prefer
+
+        if request.method == "POST":
+            body = orjson.loads(await request.body())
+            rows = [db.insert(name, values) for values in (body if isinstance(body, list) else [body])]
+            return json_response(rows if returning else [], 201)
+
+        if request.method in ("PATCH", "DELETE"):
+            matched, _ = db.select(name, [(k, v) for k, v in params if k != "select"])
+            table = db.table(name)
+            changed = []
+            if request.method == "PATCH":
+                values = orjson.loads(await request.body())
+                for row in matched:
+                    original = table.rows[str(row["id"])]
+                    original.update(values)
+                    if name in SYNCED_TABLES:
+                        original["updated_at"] = db.clock.now()
+                    changed.append(dict(original))
+            else:
+                for row in matched:
+                    original = table.rows[str(row["id"])]
+                    db.delete(name, original)
+                    changed.append(original)
+            return json_response(changed if returning else [])
+
+        rows, total = db.select(name, params)
+        headers = {}
+        if "count=exact" in prefer:
+            headers["Content-Range"] = f"0-{max(len(rows) - 1, 0)}/{total}" if rows else f"*/{total}"
+        if request.method == "HEAD":
+            return Response(status_code=200, headers=headers)
+        return json_response(rows, headers=headers)
+
+    async def rpc_endpoint(request: Request) -> Response:
+        name = request.path_params["function"]
+        db.stats[f"RPC {name}"] += 1
+        await delay()
+        function = db.functions.get(name)
+        if function is None:
+            return error_response(404, "PGRST202", f"Could not find the function public.{name}")
+        return json_response(function(orjson.loads(await request.body() or b"{}")))
+
+    async def users_endpoint(request: Request) -> Response:
+        sample = int(request.query_params.get("sample", "50"))
+        notes, tasks = db.table("meeting_notes"), db.table("tasks")
+        return json_response([
+            {
+                "user_id": user_id,
+                "note_ids": list(notes.by_user.get(user_id, {}))[:sample],
+                "task_ids": list(tasks.by_user.get(user_id, {}))[:sample],
+                "dated_task_ids": [
+                    task_id for task_id, task in tasks.by_user.get(user_id, {}).items() if task.get("due_date")
+                ][:sample]
+            }
+            for user_id in notes.by_user
+        ])
+
+    async def stats_endpoint(request: Request) -> Response:
+        if request.method == "POST":
+            db.stats.clear()
+            return json_response({})
+        return json_response({
+            "requests": sum(db.stats.values()),
+            "by_operation": dict(db.stats),
+            "rows": {name: len(table.rows) for name, table in db.tables.items()}
+        })
+
+    return Starlette(routes=[
+        Route("/rest/v1/rpc/{function}", rpc_endpoint, methods=["POST"]),
+        Route("/rest/v1/{table}", table_endpoint, methods=["GET", "HEAD", "POST", "PATCH", "DELETE"]),
+        Route("/__bench__/users", users_endpoint),
+        Route("/__bench__/stats", stats_endpoint, methods=["GET"]),
+        Route("/__bench__/stats/reset", stats_endpoint, methods=["POST"])
+    ])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--notes-per-user", type=int, default=20)
+    parser.add_argument("--tasks-per-note", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+
+    db = Database(latency=args.latency)
+    db.seed(args.users, args.notes_per_user, args.tasks_per_note, args.seed)
+    uvicorn.run(create_app(db), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Check how long importing the app takes, against a budget.
+
+    cd backend && python -m benchmarks.import_time [--budget 1.0] [--repeat 5] [--forbid MODULE ...]
+
+Imports main in fresh interpreters (python -X importtime) and reports the median time and
+the slowest top-level imports. The exit status is 1 when the median exceeds --budget
+seconds or when one of the --forbid modules (by default the LLM stack, which is imported
+when the chains are warmed up) is imported at startup.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_FORBIDDEN = ["openai", "langchain_openai", "langchain", "langchain_core", "ics"]
+# "import time: self [us] | cumulative | <indent>module"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def measure_once(target: str) -> Tuple[float, Dict[str, float], Set[str]]:
+    """Seconds to import target, cumulative seconds per top-level import and every module imported"""
+    code = f"import time; started = time.perf_counter(); import {target}; print(time.perf_counter() - started)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    top_level: Dict[str, float] = {}
+    modules: Set[str] = set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, module = match.groups()
+        modules.add(module)
+        # Direct imports of the target sit one level below it
+        if len(indent) == 2:
+            top_level[module] = int(cumulative) / 1e6
+    return float(result.stdout.strip().splitlines()[-1]), top_level, modules
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default="main", help="module to import")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds the median import may take")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN, help="modules that must not be imported")
+    args = parser.parse_args()
+
+    durations: List[float] = []
+    per_module: Dict[str, List[float]] = defaultdict(list)
+    imported: Set[str] = set()
+    for _ in range(args.repeat):
+        seconds, top_level, modules = measure_once(args.target)
+        durations.append(seconds)
+        for module, cumulative in top_level.items():
+            per_module[module].append(cumulative)
+        imported |= modules
+
+    median = statistics.median(durations)
+    print(f"import {args.target}: median {median:.3f}s, min {min(durations):.3f}s, max {max(durations):.3f}s "
+          f"over {args.repeat} runs (budget {args.budget:.3f}s)")
+    print(f"\nslowest imports of {args.target}:")
+    slowest = sorted(per_module.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for module, values in slowest[:args.top]:
+        print(f"  {statistics.median(values) * 1000:8.1f} ms  {module}")
+
+    failures = []
+    if median > args.budget:
+        failures.append(f"median import time {median:.3f}s exceeds the budget of {args.budget:.3f}s")
+    forbidden = sorted(module for module in args.forbid if module in imported)
+    if forbidden:
+        failures.append(f"imported at startup: {', '.join(forbidden)}")
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
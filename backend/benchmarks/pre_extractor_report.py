@@ -0,0 +1,54 @@
+"""
+Report how many notes of a corpus the rule-based pre-extractor handles without the LLM.
+
+    cd backend && python -m benchmarks.pre_extractor_report [--corpus FILE] [--llm-latency SECONDS]
+
+The corpus is NDJSON of {"text": ...} objects (benchmarks/sample_notes.jsonl by default).
+Saved latency is estimated from --llm-latency, the mean latency of processing one note
+with the model (measure it on /stats under llm_models, or with the benchmark harness).
+"""
+import argparse
+import json
+import time
+from datetime import date
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.pre_extractor import pre_extract
+
+DEFAULT_CORPUS = Path(__file__).parent / "sample_notes.jsonl"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--reference-date", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--llm-latency", type=float, default=2.5, help="mean seconds per note processed by the model")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the result for every note")
+    args = parser.parse_args()
+
+    texts = [json.loads(line)["text"] for line in args.corpus.read_text().splitlines() if line.strip()]
+    calls_per_note = 1 if settings.AI_PROCESSING_MODE == "single" else 2
+    handled = hinted = 0
+    elapsed = 0.0
+    for text in texts:
+        started = time.perf_counter()
+        result = pre_extract(text, args.reference_date)
+        elapsed += time.perf_counter() - started
+        handled += result.trivial
+        hinted += bool(result.tasks) and not result.trivial
+        if args.verbose:
+            status = "local" if result.trivial else "llm+hints" if result.tasks else "llm"
+            print(f"[{status}] {text.splitlines()[0][:60]!r}")
+            for task in result.tasks:
+                print(f"    {task.description} -> {task.due_date}")
+
+    print(f"notes:                     {len(texts)}")
+    print(f"handled without the LLM:   {handled} ({handled / len(texts):.0%})")
+    print(f"sent with candidate hints: {hinted}")
+    print(f"LLM calls skipped:         {handled * calls_per_note} of {len(texts) * calls_per_note}")
+    print(f"pre-extraction time:       {elapsed / len(texts) * 1000:.3f} ms per note")
+    print(f"latency saved:             {args.llm_latency * handled:.1f} s in total, "
+          f"{args.llm_latency * handled / len(texts):.2f} s per note on average")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Scripted load profiles for the API routers.
+
+A profile is one user interaction, possibly several requests long (submitting notes
+and following the job until it finishes, subscribing to the change feed and waiting for
+an update to arrive). benchmarks.run times each step as a whole and reports the status
+it returns: the HTTP status, or a short label when a 200 response carried an error.
+Profiles run in registration order, so the ones that delete data come last.
+"""
+import json
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import count
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+import httpx
+
+API = "/api/v1"
+TASK_STATUSES = ("open", "in_progress", "completed")
+
+Status = Union[int, str]
+
+@dataclass
+class VirtualUser:
+    user_id: str
+    headers: Dict[str, str]
+    note_ids: List[str]
+    task_ids: List[str]
+    dated_task_ids: List[str]
+    sync_cursor: Optional[str] = None
+
+@dataclass
+class Session:
+    """What a profile step works with: the HTTP client, the seeded users and the note corpus"""
+    client: httpx.AsyncClient
+    users: List[VirtualUser]
+    notes: List[str]
+    rng: random.Random
+    # Fraction of submitted notes repeated verbatim from the corpus (LLM cache hits)
+    repeat_ratio: float = 0.0
+    batch_size: int = 5
+    _serial: count = field(default_factory=count)
+
+    def user(self) -> VirtualUser:
+        return self.rng.choice(self.users)
+
+    def note_text(self) -> str:
+        text = self.rng.choice(self.notes)
+        if self.rng.random() < self.repeat_ratio:
+            return text
+        # A unique reference defeats the exact and near-duplicate LLM caches
+        return f"{text}\nRef: bench-{next(self._serial)}-{uuid.uuid4().hex}"
+
+@dataclass
+class Profile:
+    name: str
+    description: str
+    step: Callable[[Session], Awaitable[Status]]
+    # Calls the LLM: slower, fewer requests per run
+    llm: bool = False
+
+    @property
+    def router(self) -> str:
+        return self.name.split(".")[0]
+
+PROFILES: Dict[str, Profile] = {}
+
+def profile(name: str, description: str, llm: bool = False):
+    def register(step: Callable[[Session], Awaitable[Status]]):
+        PROFILES[name] = Profile(name, description, step, llm)
+        return step
+    return register
+
+def select_profiles(patterns: List[str]) -> List[Profile]:
+    """Profiles whose name is one of the patterns or starts with "<pattern>." ("all" selects everything)"""
+    if not patterns or "all" in patterns:
+        return list(PROFILES.values())
+    selected = [p for p in PROFILES.values() if any(p.name == pat or p.name.startswith(f"{pat}.") for pat in patterns)]
+    unknown = [pat for pat in patterns if not any(p.name == pat or p.name.startswith(f"{pat}.") for p in PROFILES.values())]
+    if unknown:
+        raise ValueError(f"Unknown profiles: {', '.join(unknown)} (available: {', '.join(PROFILES)})")
+    return selected
+
+async def _drain(response: httpx.Response) -> bytes:
+    body = b""
+    async for chunk in response.aiter_bytes():
+        body += chunk
+    return body
+
+# Notes router
+@profile("notes.process", "POST /notes/process: summarize, extract tasks and save a note", llm=True)
+async def notes_process(s: Session) -> Status:
+    user = s.user()
+    response = await s.client.post(f"{API}/notes/process", json={"text": s.note_text()}, headers=user.headers)
+    return response.status_code
+
+@profile("notes.process_stream", "POST /notes/process-stream, read to the done event", llm=True)
+async def notes_process_stream(s: Session) -> Status:
+    user = s.user()
+    async with s.client.stream("POST", f"{API}/notes/process-stream", json={"text": s.note_text()}, headers=user.headers) as response:
+        body = await _drain(response)
+    if response.status_code == 200 and b"event: done" not in body:
+        return "stream_error"
+    return response.status_code
+
+@profile("notes.process_async", "POST /notes/process-async, then follow /jobs/{id}/events until the job finishes", llm=True)
+async def notes_process_async(s: Session) -> Status:
+    user = s.user()
+    response = await s.client.post(f"{API}/notes/process-async", json={"text": s.note_text()}, headers=user.headers)
+    if response.status_code != 202:
+        return response.status_code
+    job_id = response.json()["job_id"]
+    async with s.client.stream("GET", f"{API}/notes/jobs/{job_id}/events", headers=user.headers) as events:
+        async for line in events.aiter_lines():
+            if line.startswith("data:"):
+                job_status = json.loads(line[5:])["status"]
+                if job_status == "failed":
+                    return "job_failed"
+                if job_status == "completed":
+                    break
+    final = await s.client.get(f"{API}/notes/jobs/{job_id}", headers=user.headers)
+    return final.status_code
+
+@profile("notes.batch", "POST /notes/batch with --batch-size notes, read the NDJSON results", llm=True)
+async def notes_batch(s: Session) -> Status:
+    user = s.user()
+    payload = {"notes": [{"text": s.note_text()} for _ in range(s.batch_size)]}
+    async with s.client.stream("POST", f"{API}/notes/batch", json=payload, headers=user.headers) as response:
+        body = await _drain(response)
+    if response.status_code == 200 and any('"error"' in line for line in body.decode().splitlines()):
+        return "item_error"
+    return response.status_code
+
+@profile("notes.batch_upload", "POST /notes/batch/upload with an NDJSON body of --batch-size notes", llm=True)
+async def notes_batch_upload(s: Session) -> Status:
+    user = s.user()
+    upload = "".join(json.dumps({"text": s.note_text()}) + "\n" for _ in range(s.batch_size))
+    headers = {**user.headers, "Content-Type": "application/x-ndjson"}
+    async with s.client.stream("POST", f"{API}/notes/batch/upload", content=upload.encode(), headers=headers) as response:
+        body = await _drain(response)
+    if response.status_code == 200 and any('"error"' in line for line in body.decode().splitlines()):
+        return "item_error"
+    return response.status_code
+
+@profile("notes.save_tasks", "POST /notes/{note_id}/tasks with three tasks and an Idempotency-Key")
+async def notes_save_tasks(s: Session) -> Status:
+    user = s.user()
+    due = (date.today() + timedelta(days=s.rng.randint(0, 14))).isoformat()
+    payload = {"tasks": [{"description": f"Benchmark task {i}", "due_date": due if i else None} for i in range(3)]}
+    headers = {**user.headers, "Idempotency-Key": uuid.uuid4().hex}
+    response = await s.client.post(f"{API}/notes/{s.rng.choice(user.note_ids)}/tasks", json=payload, headers=headers)
+    return response.status_code
+
+# Tasks router
+@profile("tasks.list", "GET /tasks?limit=50 (ETag response cache)")
+async def tasks_list(s: Session) -> Status:
+    response = await s.client.get(f"{API}/tasks", params={"limit": 50}, headers=s.user().headers)
+    return response.status_code
+
+@profile("tasks.list_pages", "GET /tasks?status=open&limit=20, following X-Next-Cursor for up to three pages")
+async def tasks_list_pages(s: Session) -> Status:
+    user = s.user()
+    params = {"status": "open", "limit": 20}
+    for _ in range(3):
+        response = await s.client.get(f"{API}/tasks", params=params, headers=user.headers)
+        cursor = response.headers.get("x-next-cursor")
+        if response.status_code != 200 or not cursor:
+            break
+        params = {**params, "cursor": cursor}
+    return response.status_code
+
+@profile("tasks.update_status", "PUT /tasks/{task_id}/status")
+async def tasks_update_status(s: Session) -> Status:
+    user = s.user()
+    response = await s.client.put(
+        f"{API}/tasks/{s.rng.choice(user.task_ids)}/status", json={"status": s.rng.choice(TASK_STATUSES)}, headers=user.headers
+    )
+    return response.status_code
+
+@profile("tasks.update_importance", "PUT /tasks/{task_id}/importance")
+async def tasks_update_importance(s: Session) -> Status:
+    user = s.user()
+    response = await s.client.put(
+        f"{API}/tasks/{s.rng.choice(user.task_ids)}/importance", json={"is_important": s.rng.random() < 0.5}, headers=user.headers
+    )
+    return response.status_code
+
+@profile("tasks.bulk", "POST /tasks/bulk with 20 status and importance updates")
+async def tasks_bulk(s: Session) -> Status:
+    user = s.user()
+    operations = []
+    for task_id in s.rng.sample(user.task_ids, min(20, len(user.task_ids))):
+        if s.rng.random() < 0.5:
+            operations.append({"op": "update_status", "task_id": task_id, "status": s.rng.choice(TASK_STATUSES)})
+        else:
+            operations.append({"op": "update_importance", "task_id": task_id, "is_important": s.rng.random() < 0.5})
+    response = await s.client.post(f"{API}/tasks/bulk", json={"operations": operations}, headers=user.headers)
+    return response.status_code
+
+@profile("tasks.daily_digest", "GET /tasks/daily-digest")
+async def tasks_daily_digest(s: Session) -> Status:
+    response = await s.client.get(f"{API}/tasks/daily-digest", headers=s.user().headers)
+    return response.status_code
+
+@profile("tasks.by_note", "GET /tasks/by-note/{note_id}")
+async def tasks_by_note(s: Session) -> Status:
+    user = s.user()
+    response = await s.client.get(f"{API}/tasks/by-note/{s.rng.choice(user.note_ids)}", headers=user.headers)
+    return response.status_code
+
+@profile("tasks.notes", "GET /tasks/notes?limit=20")
+async def tasks_notes(s: Session) -> Status:
+    response = await s.client.get(f"{API}/tasks/notes", params={"limit": 20}, headers=s.user().headers)
+    return response.status_code
+
+@profile("tasks.events", "GET /tasks/events, update a task, wait for its change event")
+async def tasks_events(s: Session) -> Status:
+    user = s.user()
+    async with s.client.stream("GET", f"{API}/tasks/events", headers=user.headers) as events:
+        if events.status_code != 200:
+            return events.status_code
+        lines = events.aiter_lines()
+        async for line in lines:
+            if line.startswith(": connected"):
+                break
+        update = await s.client.put(
+            f"{API}/tasks/{s.rng.choice(user.task_ids)}/status", json={"status": s.rng.choice(TASK_STATUSES)}, headers=user.headers
+        )
+        if update.status_code != 200:
+            return update.status_code
+        async for line in lines:
+            if line.startswith("event: updated"):
+                return 200
+    return "no_event"
+
+# Calendar router
+@profile("calendar.ics", "GET /tasks/{task_id}/calendar_event.ics")
+async def calendar_ics(s: Session) -> Status:
+    user = s.user()
+    response = await s.client.get(f"{API}/tasks/{s.rng.choice(user.dated_task_ids)}/calendar_event.ics", headers=user.headers)
+    return response.status_code
+
+# Sync router
+@profile("sync.full", "GET /sync without a cursor (full snapshot)")
+async def sync_full(s: Session) -> Status:
+    response = await s.client.get(f"{API}/sync", headers=s.user().headers)
+    return response.status_code
+
+@profile("sync.delta", "GET /sync?since=<the user's last cursor> (a full sync the first time per user)")
+async def sync_delta(s: Session) -> Status:
+    user = s.user()
+    params = {"since": user.sync_cursor} if user.sync_cursor else {}
+    response = await s.client.get(f"{API}/sync", params=params, headers=user.headers)
+    if response.status_code == 200:
+        user.sync_cursor = response.json()["cursor"]
+    elif response.status_code == 410:
+        user.sync_cursor = None
+    return response.status_code
+
+# Destructive profiles last
+@profile("tasks.delete", "DELETE /tasks/{task_id}, each seeded task at most once")
+async def tasks_delete(s: Session) -> Status:
+    user = s.user()
+    if not user.task_ids:
+        return "exhausted"
+    task_id = user.task_ids.pop(s.rng.randrange(len(user.task_ids)))
+    if task_id in user.dated_task_ids:
+        user.dated_task_ids.remove(task_id)
+    response = await s.client.delete(f"{API}/tasks/{task_id}", headers=user.headers)
+    return response.status_code
@@ -0,0 +1,288 @@
+"""
+Offline end-to-end benchmark of the API against local PostgREST and OpenAI stand-ins.
+
+    cd backend && python -m benchmarks.run [--profiles tasks,sync.delta] [--duration 10] [--concurrency 16]
+                                          [--env AI_PROCESSING_MODE=single] [-o results.json]
+
+Starts benchmarks.fake_postgrest (seeded with --users x --notes-per-user x --tasks-per-note),
+benchmarks.fake_openai (with the --llm-* latency and error options) and the API under test
+(benchmarks.serve) as subprocesses on free local ports, then runs each selected profile
+(see benchmarks.profiles, "all" by default) for --duration seconds with --concurrency
+virtual users after --warmup seconds. Settings of the API can be overridden with --env.
+
+The results are written as JSON (to benchmarks/results/<time>-<commit>.json unless -o is
+given): the time from launching the API until it answered, and per profile the throughput,
+latency percentiles, status counts, event-loop lag and memory of the API process, and the
+calls it made to the database and the model.
+Compare two runs with `python -m benchmarks.compare`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import jwt
+
+from benchmarks import fake_openai
+from benchmarks.profiles import Profile, Session, VirtualUser, select_profiles
+from benchmarks.stats import summarize
+
+BENCHMARKS_DIR = Path(__file__).parent
+BACKEND_DIR = BENCHMARKS_DIR.parent
+JWT_SECRET = "benchmark-jwt-secret"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+def access_token(user_id: str) -> str:
+    return jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "role": "authenticated", "exp": int(time.time()) + 86400},
+        JWT_SECRET,
+        algorithm="HS256"
+    )
+
+class Services:
+    """The stand-ins and the API under test, as subprocesses"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.db_url = f"http://127.0.0.1:{free_port()}"
+        self.llm_url = f"http://127.0.0.1:{free_port()}"
+        self.api_url = f"http://127.0.0.1:{free_port()}"
+        self.processes: List[subprocess.Popen] = []
+        # Seconds from launching the API process until it answers requests
+        self.api_startup_seconds: Optional[float] = None
+
+    def spawn(self, module: str, url: str, argv: List[str], env: Optional[Dict[str, str]] = None) -> None:
+        port = url.rsplit(":", 1)[1]
+        log = open(BENCHMARKS_DIR / "results" / f"{module.rsplit('.', 1)[1]}.log", "w")
+        self.processes.append(subprocess.Popen(
+            [sys.executable, "-m", module, "--port", port, *argv],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        ))
+
+    def api_environment(self) -> Dict[str, str]:
+        env = {
+            **os.environ,
+            "SUPABASE_URL": self.db_url,
+            "SUPABASE_SERVICE_ROLE_KEY": "benchmark-service-role-key",
+            "SUPABASE_JWT_SECRET": JWT_SECRET,
+            "SUPABASE_JWKS_URL": "",
+            "OPENAI_API_KEY": "sk-benchmark",
+            "OPENAI_BASE_URL": f"{self.llm_url}/v1",
+            "REDIS_URL": "",
+            "PYTHONUNBUFFERED": "1"
+        }
+        for override in self.args.env:
+            name, _, value = override.partition("=")
+            env[name] = value
+        return env
+
+    async def start(self) -> None:
+        args = self.args
+        self.spawn("benchmarks.fake_postgrest", self.db_url, [
+            "--users", str(args.users), "--notes-per-user", str(args.notes_per_user),
+            "--tasks-per-note", str(args.tasks_per_note), "--seed", str(args.seed), "--latency", str(args.db_latency)
+        ])
+        self.spawn("benchmarks.fake_openai", self.llm_url, ["--seed", str(args.seed), *fake_openai.forward_arguments(args, "llm-")])
+        await self.wait_ready([f"{self.db_url}/__bench__/stats", f"{self.llm_url}/__bench__/stats"])
+        started = time.monotonic()
+        self.spawn("benchmarks.serve", self.api_url, [], env=self.api_environment())
+        await self.wait_ready([f"{self.api_url}/"])
+        self.api_startup_seconds = round(time.monotonic() - started, 3)
+
+    async def wait_ready(self, urls: List[str], timeout: float = 60) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            for url in urls:
+                while True:
+                    if any(process.poll() is not None for process in self.processes):
+                        raise RuntimeError(f"A benchmark server exited early, see {BENCHMARKS_DIR / 'results'}/*.log")
+                    try:
+                        if (await client.get(url)).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"{url} did not come up within {timeout} s")
+                    await asyncio.sleep(0.05)
+
+    def stop(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+async def run_profile(profile: Profile, services: Services, session: Session, args: argparse.Namespace) -> Dict[str, Any]:
+    duration = args.llm_duration if profile.llm and args.llm_duration else args.duration
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker(deadline: float, record: bool) -> None:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await profile.step(session)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if record:
+                statuses[str(status)] += 1
+                latencies.append(elapsed)
+
+    async with httpx.AsyncClient() as control:
+        if args.warmup > 0:
+            deadline = time.monotonic() + args.warmup
+            await asyncio.gather(*(worker(deadline, False) for _ in range(args.concurrency)))
+        for url in (f"{services.db_url}/__bench__/stats/reset", f"{services.llm_url}/__bench__/stats/reset",
+                    f"{services.api_url}/__bench__/probe/reset"):
+            await control.post(url)
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(started + duration, True) for _ in range(args.concurrency)))
+        elapsed = time.monotonic() - started
+
+        probe = (await control.get(f"{services.api_url}/__bench__/probe")).json()
+        db_stats = (await control.get(f"{services.db_url}/__bench__/stats")).json()
+        llm_stats = (await control.get(f"{services.llm_url}/__bench__/stats")).json()
+
+    ok = sum(count for status, count in statuses.items() if status.isdigit() and 200 <= int(status) < 400)
+    return {
+        "name": profile.name,
+        "router": profile.router,
+        "description": profile.description,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": len(latencies),
+        "ok": ok,
+        "errors": len(latencies) - ok,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize(latencies, scale=1000),
+        "status_counts": dict(statuses),
+        "event_loop_lag_ms": probe["event_loop_lag_ms"],
+        "memory_mb": probe["memory_mb"],
+        "upstream": {
+            "db_requests": db_stats["requests"],
+            "db_requests_per_step": round(db_stats["requests"] / len(latencies), 2) if latencies else None,
+            "llm_calls": llm_stats.get("calls", 0),
+            "llm_prompt_tokens": llm_stats.get("prompt_tokens", 0),
+            "llm_completion_tokens": llm_stats.get("completion_tokens", 0),
+            "llm_errors": llm_stats.get("errors_429", 0) + llm_stats.get("errors_500", 0) + llm_stats.get("hangs", 0)
+        }
+    }
+
+async def load_users(services: Services) -> List[VirtualUser]:
+    async with httpx.AsyncClient() as client:
+        seeded = (await client.get(f"{services.db_url}/__bench__/users")).json()
+    return [
+        VirtualUser(
+            user_id=user["user_id"],
+            headers={"Authorization": f"Bearer {access_token(user['user_id'])}"},
+            note_ids=user["note_ids"],
+            task_ids=user["task_ids"],
+            dated_task_ids=user["dated_task_ids"]
+        )
+        for user in seeded
+    ]
+
+def print_summary(result: Dict[str, Any]) -> None:
+    latency = result["latency_ms"]
+    print(
+        f"{result['name']:<24} {result['rps']:>9.1f} rps  p50 {latency['p50']:>8.1f}  p95 {latency['p95']:>8.1f}  "
+        f"p99 {latency['p99']:>8.1f} ms  errors {result['errors']:>5}  loop lag p99 {result['event_loop_lag_ms']['p99']:>6.1f} ms  "
+        f"rss {result['memory_mb']['rss']:>6.1f} MB",
+        file=sys.stderr
+    )
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    profiles = select_profiles(args.profiles)
+    services = Services(args)
+    try:
+        await services.start()
+        users = await load_users(services)
+        notes = [json.loads(line)["text"] for line in args.corpus.read_text().splitlines() if line.strip()]
+        limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+        headers = {"Accept-Encoding": args.accept_encoding}
+        async with httpx.AsyncClient(base_url=services.api_url, timeout=args.timeout, limits=limits, headers=headers) as client:
+            session = Session(client, users, notes, random.Random(args.seed),
+                              repeat_ratio=args.repeat_ratio, batch_size=args.batch_size)
+            results = []
+            for profile in profiles:
+                result = await run_profile(profile, services, session, args)
+                print_summary(result)
+                results.append(result)
+    finally:
+        services.stop()
+
+    return {
+        "schema": 1,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items() if key != "output"},
+        "api_startup_seconds": services.api_startup_seconds,
+        "profiles": results
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=lambda value: [p.strip() for p in value.split(",") if p.strip()], default=["all"],
+                        help='comma-separated profile names or router prefixes, e.g. "tasks,sync.delta"')
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per profile")
+    parser.add_argument("--llm-duration", type=float, default=None, help="seconds per profile that calls the LLM (default --duration)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unrecorded seconds before each profile")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users issuing steps back to back")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--notes-per-user", type=int, default=20)
+    parser.add_argument("--tasks-per-note", type=int, default=4)
+    parser.add_argument("--db-latency", type=float, default=0.001, help="seconds the database stand-in adds per request")
+    parser.add_argument("--corpus", type=Path, default=BENCHMARKS_DIR / "sample_notes.jsonl", help="NDJSON of {\"text\": ...} notes")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="fraction of notes submitted verbatim (LLM cache hits)")
+    parser.add_argument("--batch-size", type=int, default=5, help="notes per /notes/batch request")
+    parser.add_argument("--accept-encoding", default="identity",
+                        help='Accept-Encoding of the virtual users, e.g. "br, gzip" (decoding then costs the load generator CPU)')
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="API setting override, repeatable")
+    fake_openai.add_arguments(parser, "llm-")
+    parser.add_argument("-o", "--output", type=Path, default=None, help='result file, "-" for stdout')
+    args = parser.parse_args()
+
+    (BENCHMARKS_DIR / "results").mkdir(exist_ok=True)
+    report = asyncio.run(run(args))
+    body = json.dumps(report, indent=2)
+    if args.output is not None and str(args.output) == "-":
+        print(body)
+        return
+    output = args.output or BENCHMARKS_DIR / "results" / (
+        f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{(report['git']['commit'] or 'unknown')[:10]}.json"
+    )
+    output.write_text(body + "\n")
+    print(f"Results written to {output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
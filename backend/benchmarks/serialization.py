@@ -0,0 +1,108 @@
+"""
+Compare the ways a task list response can be serialized, at several list sizes.
+
+    cd backend && python -m benchmarks.serialization [--sizes 100,1000,10000] [--min-time 0.5]
+
+Paths, all from PostgREST-shaped rows (strings for UUIDs, dates and timestamps):
+  response_model  what FastAPI does for a returned list with response_model (validate,
+                  dump, jsonable_encoder, json.dumps); the daily digest used to go this way
+  validated       TypeAdapter validate_python + dump_json, the default list endpoint path
+  fast            project_rows + orjson, the FAST_JSON_ENABLED path
+and the cost and size of compressing the fast body with each supported encoding.
+The fast and validated bodies are checked to describe the same tasks.
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.compression import SUPPORTED_ENCODINGS, compress
+from app.core.fast_json import dumps, orjson, project_rows
+from app.models.task_schemas import TaskResponseSchema
+
+task_list_adapter = TypeAdapter(List[TaskResponseSchema])
+
+def make_rows(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Task rows as PostgREST returns them for TASK_COLUMNS"""
+    user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    note_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(max(1, count // 4))]
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        created += timedelta(seconds=rng.randint(1, 3600), microseconds=rng.randint(0, 999_999))
+        due = date(2026, 1, 1) + timedelta(days=rng.randint(0, 365)) if rng.random() < 0.6 else None
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "description": f"Follow up on item {i} with the {rng.choice(['design', 'sales', 'platform'])} team",
+            "due_date": due.isoformat() if due else None,
+            "status": rng.choice(["open", "in_progress", "completed"]),
+            "created_at": created.isoformat(),
+            "note_id": rng.choice(note_ids),
+            "is_important": rng.random() < 0.2,
+            "user_id": user_id
+        })
+    return rows
+
+def response_model_path(rows: List[Dict[str, Any]]) -> bytes:
+    value = task_list_adapter.dump_python(task_list_adapter.validate_python(rows), mode="json")
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def validated_path(rows: List[Dict[str, Any]]) -> bytes:
+    return task_list_adapter.dump_json(task_list_adapter.validate_python(rows))
+
+def fast_path(rows: List[Dict[str, Any]]) -> bytes:
+    return dumps(project_rows(rows, TaskResponseSchema))
+
+PATHS: Dict[str, Callable[[List[Dict[str, Any]]], bytes]] = {
+    "response_model": response_model_path,
+    "validated": validated_path,
+    "fast": fast_path,
+}
+
+def best_time(function: Callable[[], Any], min_time: float) -> float:
+    """Fastest of repeated calls, running for at least min_time seconds (and at least 3 calls)"""
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < 3 or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[100, 1000, 10000])
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to repeat each measurement for")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"JSON encoder: {'orjson ' + orjson.__version__ if orjson is not None else 'json (orjson is not installed)'}; "
+          f"encodings: {', '.join(SUPPORTED_ENCODINGS)}")
+    for size in args.sizes:
+        rows = make_rows(size, rng)
+        fast_body = fast_path(rows)
+        assert task_list_adapter.validate_json(fast_body) == task_list_adapter.validate_json(validated_path(rows))
+
+        print(f"\n{size} tasks")
+        baseline = None
+        for name, path in PATHS.items():
+            seconds = best_time(lambda: path(rows), args.min_time)
+            baseline = baseline or seconds
+            body = path(rows)
+            print(f"  {name:<17} {seconds * 1000:9.3f} ms  {seconds / size * 1e6:7.2f} us/task  "
+                  f"{len(body) / 1024:9.1f} KiB  {baseline / seconds:6.1f}x")
+        for encoding in SUPPORTED_ENCODINGS:
+            seconds = best_time(lambda: compress(fast_body, encoding), args.min_time)
+            compressed = compress(fast_body, encoding)
+            print(f"  {encoding + ' (fast body)':<17} {seconds * 1000:9.3f} ms  {seconds / size * 1e6:7.2f} us/task  "
+                  f"{len(compressed) / 1024:9.1f} KiB  {len(fast_body) / len(compressed):6.1f}x smaller")
+
+if __name__ == "__main__":
+    main()
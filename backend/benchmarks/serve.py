@@ -0,0 +1,108 @@
+"""
+Run the API under test for benchmarks, with an event-loop lag and memory probe.
+
+    cd backend && python -m benchmarks.serve --port 8000
+
+Serves main:app in a single uvicorn worker. A background task sleeps for --probe-interval
+and records how late it wakes up (event-loop lag); GET /__bench__/probe reports the lag
+percentiles and memory since the last POST /__bench__/probe/reset.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+import uvicorn
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from benchmarks.stats import summarize
+
+class LoopProbe:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lags: Deque[float] = deque(maxlen=200_000)
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - started - self.interval))
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def reset(self) -> None:
+        self.lags.clear()
+        self.peak_rss = rss_bytes()
+
+    def report(self) -> Dict[str, Any]:
+        rss = rss_bytes()
+        return {
+            "event_loop_lag_ms": {**summarize(list(self.lags), scale=1000), "samples": len(self.lags)},
+            "memory_mb": {
+                "rss": round(rss / 2**20, 1),
+                # Sampled with the lag probe since the last reset
+                "peak_rss": round(max(self.peak_rss, rss) / 2**20, 1),
+                # Process lifetime high-water mark
+                "max_rss": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+            }
+        }
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc; the lifetime peak elsewhere)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def create_app(probe: LoopProbe):
+    from main import app
+
+    lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def probed_lifespan(app_):
+        async with lifespan(app_) as state:
+            probe.start()
+            try:
+                yield state
+            finally:
+                await probe.stop()
+
+    app.router.lifespan_context = probed_lifespan
+
+    async def probe_report(request: Request):
+        return JSONResponse(probe.report())
+
+    async def probe_reset(request: Request):
+        probe.reset()
+        return JSONResponse({})
+
+    app.add_route("/__bench__/probe", probe_report, methods=["GET"])
+    app.add_route("/__bench__/probe/reset", probe_reset, methods=["POST"])
+    return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="seconds between event-loop lag samples")
+    args = parser.parse_args()
+    uvicorn.run(create_app(LoopProbe(args.probe_interval)), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
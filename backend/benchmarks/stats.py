@@ -0,0 +1,23 @@
+import math
+from typing import Dict, Sequence
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(values: Sequence[float], scale: float = 1.0, digits: int = 3) -> Dict[str, float]:
+    """Mean, p50/p90/p95/p99 and max of values, multiplied by scale (e.g. 1000 for seconds to ms)"""
+    ordered = sorted(values)
+    if not ordered:
+        return {"mean": 0.0, "p50": 0.0, "p90": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "mean": round(sum(ordered) / len(ordered) * scale, digits),
+        "p50": round(percentile(ordered, 50) * scale, digits),
+        "p90": round(percentile(ordered, 90) * scale, digits),
+        "p95": round(percentile(ordered, 95) * scale, digits),
+        "p99": round(percentile(ordered, 99) * scale, digits),
+        "max": round(ordered[-1] * scale, digits)
+    }
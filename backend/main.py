@@ -1,6 +1,8 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -11,15 +13,56 @@ load_dotenv()
 from app.api.v1.endpoints.notes_router import router as notes_router
 from app.api.v1.endpoints.tasks_router import router as tasks_router
 from app.api.v1.endpoints.calendar_router import router as calendar_router
+from app.api.v1.endpoints.sync_router import router as sync_router
+from app.db.client import open_db_client, close_db_client
+from app.core.redis_client import close_redis
+from app.services.llm_cache import llm_cache
+from app.services.note_jobs import note_jobs
+from app.services.digest_store import digest_store
+from app.services.response_cache import response_cache
+from app.services.change_feed import change_feed
+from app.services.rate_limiter import llm_rate_limiter
+from app.services.llm_scheduler import llm_scheduler
+from app.services.llm_resilience import llm_caller
+from app.services.model_router import model_router
+from app.services import pre_extractor
+from app.services.idempotency import idempotency_store
+from app.services.token_usage import token_usage
+from app.services.ai_processing_service import close_llm_client, warm_up_llm
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.auth.security import require_stats_token
 
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
     print("Starting TaskFlow AI API...")
+    await open_db_client()
+    await note_jobs.start()
+    digest_store.start()
+    await change_feed.start()
+    token_usage.start()
+    # Importing LangChain and building the chains takes about a second; by default it happens
+    # in a thread after startup, so the worker is ready for everything else immediately
+    warmup = None
+    if settings.LLM_WARMUP == "startup":
+        await asyncio.to_thread(warm_up_llm)
+    elif settings.LLM_WARMUP == "background":
+        warmup = asyncio.create_task(asyncio.to_thread(warm_up_llm))
     yield
     # Shutdown logic
     print("Shutting down TaskFlow AI API...")
+    if warmup is not None:
+        await asyncio.gather(warmup, return_exceptions=True)
+    await note_jobs.stop()
+    await digest_store.stop()
+    await change_feed.stop()
+    # Write pending token usage while the database client is still open
+    await token_usage.stop()
+    await close_db_client()
+    await close_redis()
+    await close_llm_client()
 
 # Create FastAPI app
 app = FastAPI(
@@ -37,12 +80,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed"],
 )
+# Outermost, so request latency includes the other middleware
+app.add_middleware(MetricsMiddleware)
 
 # Include API routers
 app.include_router(notes_router, prefix="/api/v1/notes", tags=["notes"])
 app.include_router(tasks_router, prefix="/api/v1/tasks", tags=["tasks"])
 app.include_router(calendar_router, prefix="/api/v1", tags=["calendar"])
+app.include_router(sync_router, prefix="/api/v1", tags=["sync"])
 
 @app.get("/")
 async def root():
@@ -52,6 +99,33 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/stats", dependencies=[Depends(require_stats_token)])
+async def stats():
+    """Cache, queue, scheduler and LLM usage stats of this worker (needs STATS_TOKEN)"""
+    return {
+        "llm_cache": llm_cache.get_stats(),
+        "note_jobs": note_jobs.get_stats(),
+        "daily_digest": digest_store.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "change_feed": change_feed.get_stats(),
+        "llm_rate_limiter": llm_rate_limiter.get_stats(),
+        "llm_scheduler": llm_scheduler.get_stats(),
+        "llm_resilience": llm_caller.get_stats(),
+        "llm_models": model_router.get_stats(),
+        "pre_extractor": pre_extractor.get_stats(),
+        "idempotency": idempotency_store.get_stats(),
+        "token_usage": token_usage.get_stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics of this worker"""
+    body = render_metrics()
+    if body is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Development server; run `python server.py` in production
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Production server: several uvicorn workers sharing one listening socket.
+
+    cd backend && python server.py [--workers N] [--host 0.0.0.0] [--port 8000] [--no-preload]
+
+Defaults come from WEB_CONCURRENCY (one worker per core), HOST, PORT, SERVER_PRELOAD and
+SERVER_GRACEFUL_TIMEOUT. uvicorn uses uvloop and httptools when they are installed.
+
+With preload the supervisor imports the app and the LLM stack once and forks the workers
+from it, so each worker starts without repeating the imports and the imported code is
+shared between them. On SIGTERM or SIGINT the workers stop accepting connections and
+finish their in-flight requests (up to SERVER_GRACEFUL_TIMEOUT seconds) before the
+supervisor exits. A worker that dies is replaced.
+
+The response cache keeps its per-user versions in Redis when REDIS_URL is set. Without it
+the versions are per process, so a write handled by one worker would not invalidate the
+lists cached by the others: with more than one worker and no Redis the cache is disabled.
+
+For development use `python main.py`, which reloads on code changes.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.redis_client import redis_configured
+
+# A worker that exits sooner than this after starting is crashing; wait before replacing it
+MIN_WORKER_UPTIME_SECONDS = 5.0
+
+def require_shared_response_cache(workers: int) -> None:
+    """Disable the response cache when several workers would each keep their own versions"""
+    if workers > 1 and settings.RESPONSE_CACHE_ENABLED and not redis_configured():
+        print("The response cache needs REDIS_URL (and the redis package) to stay coherent across "
+              f"{workers} workers; disabling it")
+        # Set before forking, so every worker inherits it
+        settings.RESPONSE_CACHE_ENABLED = False
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket) -> None:
+    # The supervisor's handlers do not apply here; uvicorn installs its own for graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as e:
+        print(f"Error in worker {os.getpid()}: {e}")
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Skip the supervisor's atexit handlers and buffers inherited through fork
+        os._exit(exit_code)
+
+class Supervisor:
+    """Forks the workers, replaces the ones that die and stops them all on a signal"""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int, graceful_timeout: float):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self._started: Dict[int, float] = {}
+        self._stopping = False
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self.config, self.sock)
+        self._started[pid] = time.monotonic()
+
+    def _stop(self, signum, frame) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        print(f"Stopping {len(self._started)} worker(s)...")
+        for pid in self._started:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self, deadline: float) -> None:
+        """Wait for the stopping workers, killing the ones still running at the deadline"""
+        while self._started:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self._started.pop(pid, None)
+                continue
+            if time.monotonic() > deadline:
+                for pid in self._started:
+                    print(f"Killing worker {pid} after the graceful timeout")
+                    os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            time.sleep(0.05)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+        while not self._stopping:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self._started.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, replacing it")
+            if time.monotonic() - started < MIN_WORKER_UPTIME_SECONDS:
+                time.sleep(MIN_WORKER_UPTIME_SECONDS)
+            if not self._stopping:
+                self._spawn()
+        # Workers get the graceful timeout plus a little for their lifespan shutdown
+        self._reap(time.monotonic() + self.graceful_timeout + 10)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=settings.SERVER_PRELOAD,
+                        help="import the app in the supervisor before forking the workers")
+    parser.add_argument("--graceful-timeout", type=float, default=settings.SERVER_GRACEFUL_TIMEOUT)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    config = uvicorn.Config(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+        # Azure Container Apps terminates TLS in front of the app
+        proxy_headers=True,
+        forwarded_allow_ips="*"
+    )
+    fork = hasattr(os, "fork") and args.workers > 1
+    if fork:
+        require_shared_response_cache(args.workers)
+    if args.preload and fork:
+        from app.services.ai_processing_service import preload_llm_stack
+        config.load()
+        preload_llm_stack()
+        print(f"Preloaded the app in {time.perf_counter() - started:.2f}s")
+
+    if not fork:
+        uvicorn.Server(config).run()
+        return
+    sock = config.bind_socket()
+    print(f"Starting {args.workers} workers on {args.host}:{args.port}")
+    Supervisor(config, sock, args.workers, args.graceful_timeout).run()
+    sock.close()
+
+if __name__ == "__main__":
+    main()
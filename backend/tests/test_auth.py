@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.auth import security
+from app.auth.security import VerifiedTokenCache, get_current_user
+
+# conftest sets SUPABASE_JWT_SECRET to this before the app is imported
+SECRET = "test-jwt-secret"
+USER = "00000000-0000-0000-0000-000000000001"
+
+def make_token(secret=SECRET, expires_in=3600, **claims):
+    payload = {"sub": USER, "aud": "authenticated", "exp": int(time.time()) + expires_in, **claims}
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+def authenticate(token):
+    return asyncio.run(get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)))
+
+@pytest.fixture(autouse=True)
+def token_cache(monkeypatch):
+    cache = VerifiedTokenCache(max_size=2)
+    monkeypatch.setattr(security, "token_cache", cache)
+    return cache
+
+@pytest.fixture
+def verifications(monkeypatch):
+    """Count the tokens that go through signature verification"""
+    verified = []
+    verify = security.verify_token
+
+    async def counting_verify(token):
+        verified.append(token)
+        return await verify(token)
+
+    monkeypatch.setattr(security, "verify_token", counting_verify)
+    return verified
+
+def test_valid_token_gives_the_user():
+    assert authenticate(make_token()) == {"user_id": USER}
+
+@pytest.mark.parametrize("token", [
+    make_token(secret="another-secret"),
+    make_token(expires_in=-60),
+    make_token(aud="anon"),
+    # No sub claim
+    jwt.encode({"aud": "authenticated", "exp": int(time.time()) + 3600}, SECRET, algorithm="HS256"),
+    # Tampered signature
+    make_token()[:-4] + "AAAA",
+], ids=["wrong secret", "expired", "wrong audience", "no subject", "tampered"])
+def test_invalid_tokens_are_rejected(token):
+    with pytest.raises(HTTPException) as error:
+        authenticate(token)
+    assert error.value.status_code == 401
+
+def test_verified_tokens_are_served_from_the_cache(verifications):
+    token = make_token()
+    for _ in range(3):
+        assert authenticate(token) == {"user_id": USER}
+    assert verifications == [token]
+
+def test_cached_tokens_are_dropped_at_their_expiry(token_cache, verifications):
+    token = make_token()
+    token_cache.put(token, time.time() - 1, {"user_id": "stale"})
+    assert authenticate(token) == {"user_id": USER}
+    assert verifications == [token]
+
+def test_the_cache_is_bounded(token_cache):
+    tokens = [make_token(jti=str(i)) for i in range(3)]
+    for token in tokens:
+        authenticate(token)
+    assert len(token_cache._entries) == 2
+    assert token_cache.get(tokens[0]) is None
@@ -0,0 +1,118 @@
+from uuid import UUID
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints.tasks_router import router
+from app.auth.security import get_current_user
+from app.core.config import settings
+from app.db import client as db_client
+from app.db import supabase_ops
+from app.db.client import close_db_client
+from benchmarks.fake_postgrest import Database, create_app
+
+USER = "00000000-0000-0000-0000-000000000001"
+OTHER_USER = "00000000-0000-0000-0000-000000000002"
+
+@pytest.fixture(params=["function", "fallback"])
+def db(request, serve_asgi, monkeypatch):
+    """A fresh PostgREST stand-in per test, with or without the bulk_mutate_tasks function"""
+    db = Database(latency=0)
+    for user_id in (USER, OTHER_USER):
+        for i in range(5):
+            db.insert("tasks", {"id": str(UUID(int=int(user_id[-1]) * 100 + i)), "user_id": user_id,
+                                "description": f"task {i}"})
+    if request.param == "fallback":
+        monkeypatch.delitem(db.functions, "bulk_mutate_tasks")
+    monkeypatch.setattr(settings, "SUPABASE_URL", serve_asgi(create_app(db)))
+    monkeypatch.setattr(db_client, "_client", None)
+    return db
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+
+    async def publish(user_id, action, rows):
+        events.append((user_id, action, sorted(row["id"] for row in rows)))
+
+    monkeypatch.setattr(supabase_ops, "publish_task_change", publish)
+    return events
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1/tasks")
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": USER}
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(close_db_client)
+
+def task_id(user_id, i):
+    return str(UUID(int=int(user_id[-1]) * 100 + i))
+
+def bulk(client, *operations):
+    response = client.post("/api/v1/tasks/bulk", json={"operations": list(operations)})
+    assert response.status_code == 200, response.text
+    return response.json()["results"]
+
+def test_one_result_per_operation_in_request_order(client, db, published):
+    results = bulk(
+        client,
+        {"op": "delete", "task_id": task_id(USER, 0)},
+        {"op": "update_status", "task_id": task_id(USER, 1), "status": "completed"},
+        {"op": "update_importance", "task_id": task_id(USER, 2), "is_important": True},
+        {"op": "update_status", "task_id": task_id(OTHER_USER, 1), "status": "completed"},
+        {"op": "delete", "task_id": task_id(OTHER_USER, 2)},
+    )
+    assert [(result["op"], result["ok"]) for result in results] == [
+        ("delete", True), ("update_status", True), ("update_importance", True),
+        ("update_status", False), ("delete", False)
+    ]
+    assert results[1]["task"]["status"] == "completed"
+    assert results[2]["task"]["is_important"] is True
+    assert results[3]["error"] == "Task not found"
+
+    tasks = db.table("tasks").rows
+    assert task_id(USER, 0) not in tasks
+    # Another user's tasks are never touched
+    assert tasks[task_id(OTHER_USER, 1)]["status"] == "open"
+    assert task_id(OTHER_USER, 2) in tasks
+    # One change event per kind, not one per task
+    assert published == [
+        (USER, "updated", sorted([task_id(USER, 1), task_id(USER, 2)])),
+        (USER, "deleted", [task_id(USER, 0)])
+    ]
+
+def test_the_last_operation_on_a_task_wins(client, db, published):
+    bulk(
+        client,
+        {"op": "update_status", "task_id": task_id(USER, 1), "status": "in_progress"},
+        {"op": "update_status", "task_id": task_id(USER, 1), "status": "completed"},
+        {"op": "update_importance", "task_id": task_id(USER, 3), "is_important": True},
+        {"op": "delete", "task_id": task_id(USER, 3)},
+    )
+    tasks = db.table("tasks").rows
+    assert tasks[task_id(USER, 1)]["status"] == "completed"
+    # Updates run before deletes, and a deleted task is only published as deleted
+    assert task_id(USER, 3) not in tasks
+    assert published == [(USER, "updated", [task_id(USER, 1)]), (USER, "deleted", [task_id(USER, 3)])]
+
+def test_bulk_takes_a_few_round_trips_where_single_calls_take_one_per_task(client, db, published):
+    operations = [{"op": "update_status", "task_id": task_id(USER, i), "status": "completed"} for i in range(5)]
+    operations += [{"op": "update_importance", "task_id": task_id(USER, i), "is_important": True} for i in range(5)]
+    bulk(client, *operations)
+    database_calls = sum(db.stats.values())
+    # One function call; without the function, one statement per status and per importance value after it
+    assert database_calls == (1 if "bulk_mutate_tasks" in db.functions else 3)
+
+    db.stats.clear()
+    for operation in operations[:5]:
+        response = client.put(f"/api/v1/tasks/{operation['task_id']}/status", json={"status": "open"})
+        assert response.status_code == 200
+    assert sum(db.stats.values()) == 5
+
+def test_operations_are_validated(client):
+    response = client.post("/api/v1/tasks/bulk", json={"operations": [{"op": "update_status", "task_id": task_id(USER, 1)}]})
+    assert response.status_code == 422
+    assert client.post("/api/v1/tasks/bulk", json={"operations": []}).status_code == 422
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.services.change_feed import ChangeFeed, ChangeFeedFullError, LocalBroker
+
+TASK = {"id": "task-1", "description": "Send the report", "status": "open"}
+
+def make_feed(max_buffer=4, max_connections=100):
+    return ChangeFeed(LocalBroker(), max_buffer=max_buffer, max_connections=max_connections)
+
+def test_changes_reach_only_the_users_connections():
+    feed = make_feed()
+
+    async def scenario():
+        await feed.start()
+        tabs = [feed.subscribe("user-a") for _ in range(2)]
+        other = feed.subscribe("user-b")
+        await feed.on_task_change("user-a", "updated", [TASK])
+        frames = [await tab.next_frames(0.1) for tab in tabs]
+        return frames, await other.next_frames(0.01)
+
+    frames, other_frames = asyncio.run(scenario())
+    assert frames[0] == ['event: updated\ndata: {"tasks": [{"id": "task-1", "description": "Send the report", '
+                         '"status": "open"}]}\n\n']
+    # Serialized once for every connection of the user
+    assert frames[0][0] is frames[1][0]
+    assert other_frames == []
+    assert feed.stats["delivered"] == 2
+
+def test_idle_connections_of_other_users_cost_nothing_per_change():
+    feed = make_feed(max_connections=20_000)
+
+    async def scenario():
+        await feed.start()
+        idle = [feed.subscribe(f"user-{i}") for i in range(10_000)]
+        waiting = [asyncio.create_task(subscription.next_frames(5)) for subscription in idle[:100]]
+        target = feed.subscribe("user-target")
+        await feed.on_task_change("user-target", "created", [TASK])
+        frames = await target.next_frames(0.1)
+        await feed.stop()
+        # Stopping ends every stream, including the ones waiting for a change
+        await asyncio.wait_for(asyncio.gather(*waiting), 1)
+        return frames, idle
+
+    frames, idle = asyncio.run(scenario())
+    assert len(frames) == 1
+    assert feed.stats["delivered"] == 1
+    assert all(subscription.closed and not subscription._buffer for subscription in idle)
+
+def test_a_consumer_that_falls_behind_is_evicted():
+    feed = make_feed(max_buffer=2)
+
+    async def scenario():
+        await feed.start()
+        slow, fast = feed.subscribe("user-a"), feed.subscribe("user-a")
+        for _ in range(2):
+            await feed.on_task_change("user-a", "updated", [TASK])
+        assert len(await fast.next_frames(0.1)) == 2
+        await feed.on_task_change("user-a", "updated", [TASK])
+        return slow, fast
+
+    slow, fast = asyncio.run(scenario())
+    assert slow.evicted and not slow._buffer
+    assert not fast.evicted
+    assert feed.stats["evictions"] == 1
+    assert feed.get_stats()["connections"] == 1
+
+def test_connections_are_capped_per_worker():
+    feed = make_feed(max_connections=2)
+    first = feed.subscribe("user-a")
+    feed.subscribe("user-b")
+    with pytest.raises(ChangeFeedFullError):
+        feed.subscribe("user-c")
+    feed.unsubscribe(first)
+    feed.subscribe("user-c")
+    assert feed.get_stats()["users"] == 2
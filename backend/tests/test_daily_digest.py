@@ -0,0 +1,77 @@
+import asyncio
+from datetime import date
+from uuid import UUID
+
+import pytest
+
+from app.core.config import settings
+from app.db import client as db_client
+from app.db.client import close_db_client
+from app.db.supabase_ops import get_daily_digest_tasks, rank_digest_tasks
+from benchmarks.fake_postgrest import Database, create_app
+
+# A Wednesday: its week runs from Monday 2026-10-12 to Sunday 2026-10-18
+TODAY = date(2026, 10, 14)
+
+def task(task_id, created_at, due_date=None, is_important=False):
+    return {"id": task_id, "created_at": f"2026-10-{created_at:02d}T09:00:00+00:00",
+            "due_date": due_date, "is_important": is_important}
+
+def ids(tasks):
+    return [t["id"] for t in tasks]
+
+def test_tasks_are_ranked_by_bucket_then_due_date_then_newest():
+    tasks = [
+        task("later", 10, "2026-11-01"),
+        task("this-sunday", 9, "2026-10-18"),
+        task("recent", 8),
+        task("today", 7, "2026-10-14"),
+        task("important", 6, is_important=True),
+        task("this-monday", 5, "2026-10-12"),
+        task("older", 4),
+    ]
+    assert ids(rank_digest_tasks(tasks, TODAY, 10)) == [
+        "important", "today", "this-monday", "this-sunday", "later", "recent", "older"
+    ]
+
+def test_a_task_in_several_buckets_is_listed_once():
+    tasks = [task("both", 2, "2026-10-14", is_important=True), task("today", 1, "2026-10-14")]
+    assert ids(rank_digest_tasks(tasks, TODAY, 10)) == ["both", "today"]
+
+def test_the_digest_is_bounded():
+    tasks = [task(f"task-{i}", 1 + i % 28, is_important=i % 7 == 0) for i in range(100)]
+    digest = rank_digest_tasks(tasks, TODAY, 5)
+    assert len(digest) == 5
+    assert all(t["is_important"] for t in digest)
+
+@pytest.fixture(scope="module")
+def db(serve_asgi):
+    db = Database(latency=0)
+    db.seed(2, notes_per_user=5, tasks_per_note=10, seed=3)
+    db.url = serve_asgi(create_app(db))
+    return db
+
+@pytest.fixture
+def use_db(db, monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_URL", db.url)
+    monkeypatch.setattr(db_client, "_client", None)
+    return db
+
+def fetch_digest(user_id, limit):
+    async def scenario():
+        digest = await get_daily_digest_tasks(UUID(user_id), TODAY, limit)
+        await close_db_client()
+        return digest
+
+    return asyncio.run(scenario())
+
+def test_database_ranking_and_fallback_agree(use_db, monkeypatch):
+    user_id = next(iter(use_db.table("tasks").by_user))
+    ranked_in_database = fetch_digest(user_id, 8)
+    assert use_db.stats["GET tasks"] == 0
+    # PGRST202 until the migration is applied: the tasks are ranked here instead
+    monkeypatch.delitem(use_db.functions, "get_daily_digest")
+    ranked_here = fetch_digest(user_id, 8)
+    assert len(ranked_here) == 8
+    assert ids(ranked_here) == ids(ranked_in_database)
+    assert use_db.stats["GET tasks"] == 1
@@ -0,0 +1,102 @@
+import asyncio
+from uuid import UUID
+
+import pytest
+
+from app.core.config import settings
+from app.db import client as db_client
+from app.db.client import close_db_client, get_db, open_db_client
+from app.db.supabase_ops import get_daily_digest_tasks, get_tasks_for_user
+from benchmarks.fake_postgrest import Database, create_app
+
+USERS = 10
+TASKS_PER_USER = 8
+
+class ConnectionCounter:
+    """
+    ASGI middleware recording the client address of every request (one per TCP
+    connection) and the most requests in flight at once
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.clients = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def reset(self):
+        self.clients.clear()
+        self.max_in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.clients.append(tuple(scope["client"]))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+@pytest.fixture(scope="module")
+def postgrest(serve_asgi):
+    """A PostgREST stand-in with a little latency per request, served from a background thread"""
+    db = Database(latency=0.02)
+    db.seed(USERS, notes_per_user=2, tasks_per_note=TASKS_PER_USER // 2, seed=1)
+    app = ConnectionCounter(create_app(db))
+    return db, app, serve_asgi(app)
+
+@pytest.fixture
+def pooled(postgrest, monkeypatch):
+    db, counter, url = postgrest
+    monkeypatch.setattr(settings, "SUPABASE_URL", url)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 4)
+    monkeypatch.setattr(settings, "DB_POOL_KEEPALIVE", 4)
+    monkeypatch.setattr(db_client, "_client", None)
+    counter.reset()
+    return db, counter
+
+def test_concurrent_requests_share_the_pooled_client(pooled):
+    db, counter = pooled
+    users = [UUID(user_id) for user_id in db.table("tasks").by_user]
+
+    async def scenario():
+        client = await open_db_client()
+        assert await open_db_client() is client
+        results = await asyncio.gather(*(
+            query(user_id) for user_id in users for query in (get_tasks_for_user, get_daily_digest_tasks)
+            for _ in range(3)
+        ))
+        assert get_db() is client
+        await close_db_client()
+        return client, results
+
+    client, results = asyncio.run(scenario())
+
+    assert len(results) == USERS * 6
+    assert all(len(result) == TASKS_PER_USER for result in results)
+    assert len(counter.clients) == USERS * 6
+    # 60 requests over at most DB_POOL_SIZE connections, reused from the keep-alive pool
+    assert len(set(counter.clients)) <= 4
+    # The requests ran concurrently, as many at once as the pool allows
+    assert 1 < counter.max_in_flight <= 4
+    assert client.session.is_closed
+    assert db_client._client is None
+
+def test_client_is_recreated_after_shutdown(pooled):
+    async def scenario():
+        first = await open_db_client()
+        await get_tasks_for_user(UUID(int=0))
+        await close_db_client()
+        # Used outside the lifespan, e.g. by a script: created again lazily
+        second = get_db()
+        await get_tasks_for_user(UUID(int=0))
+        still_open = not second.session.is_closed
+        await close_db_client()
+        return first, second, still_open
+
+    first, second, still_open = asyncio.run(scenario())
+    assert first is not second
+    assert first.session.is_closed
+    assert still_open
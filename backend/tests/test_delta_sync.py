@@ -0,0 +1,86 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import pytest
+
+from app.services import delta_sync
+from app.services.delta_sync import _page_cut, decode_sync_cursor, get_sync_changes
+
+USER = UUID("00000000-0000-0000-0000-000000000001")
+BASE = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(hours=1)
+
+def at(seconds):
+    return (BASE + timedelta(seconds=seconds)).isoformat()
+
+@pytest.fixture
+def changes(monkeypatch):
+    """In-memory change streams answering like the get_changed_* queries"""
+    streams = {"tasks": [], "notes": [], "tombstones": []}
+
+    def fetcher(name, column):
+        async def fetch(user_id, since, limit, until=None):
+            rows = [
+                row for row in streams[name]
+                if (since is None or datetime.fromisoformat(row[column]) > since)
+                and (until is None or datetime.fromisoformat(row[column]) <= until)
+            ]
+            rows.sort(key=lambda row: (row[column], row["id"]))
+            return rows[:limit] if limit is not None else rows
+        return fetch
+
+    monkeypatch.setattr(delta_sync, "get_changed_tasks", fetcher("tasks", "updated_at"))
+    monkeypatch.setattr(delta_sync, "get_changed_notes", fetcher("notes", "updated_at"))
+    monkeypatch.setattr(delta_sync, "get_tombstones", fetcher("tombstones", "deleted_at"))
+    return streams
+
+def sync_all(since, limit):
+    """Page until caught up, returning every page"""
+    pages = []
+    while True:
+        page = asyncio.run(get_sync_changes(USER, since, limit))
+        pages.append(page)
+        since = decode_sync_cursor(page["cursor"])
+        if not page["has_more"]:
+            return pages
+
+def test_page_cut_defers_rows_tied_with_the_first_row_left_out():
+    rows = [{"updated_at": at(second)} for second in (1, 2, 3, 3, 3)]
+    assert _page_cut(rows, "updated_at", 4) == BASE + timedelta(seconds=2)
+    assert _page_cut(rows, "updated_at", 5) is None
+
+def test_group_sharing_a_timestamp_larger_than_the_page_is_returned_whole(changes):
+    changes["tasks"] = [{"id": f"task-{i}", "updated_at": at(10)} for i in range(5)]
+    changes["tasks"].append({"id": "later", "updated_at": at(20)})
+
+    first, second = sync_all(None, limit=2)
+    assert [task["id"] for task in first["tasks"]] == [f"task-{i}" for i in range(5)]
+    assert first["has_more"]
+    assert [task["id"] for task in second["tasks"]] == ["later"]
+
+def test_tied_tombstones_are_not_skipped(changes):
+    changes["tombstones"] = [
+        {"id": i, "table_name": "tasks", "record_id": f"task-{i}", "deleted_at": at(10)} for i in range(4)
+    ]
+    pages = sync_all((BASE, False), limit=1)
+    assert [record for page in pages for record in page["deleted"]["tasks"]] == [f"task-{i}" for i in range(4)]
+
+def test_paging_returns_every_change_exactly_once(changes):
+    rng = random.Random(7)
+    # Few distinct timestamps, so many changes share one
+    changes["tasks"] = [{"id": f"task-{i}", "updated_at": at(rng.randint(0, 8))} for i in range(60)]
+    changes["notes"] = [{"id": f"note-{i}", "updated_at": at(rng.randint(0, 8))} for i in range(25)]
+    changes["tombstones"] = [
+        {"id": i, "table_name": "tasks", "record_id": f"gone-{i}", "deleted_at": at(rng.randint(0, 8))}
+        for i in range(20)
+    ]
+
+    for limit in (1, 3, 7, 100):
+        pages = sync_all((BASE - timedelta(seconds=1), False), limit)
+        tasks = [task["id"] for page in pages for task in page["tasks"]]
+        notes = [note["id"] for page in pages for note in page["notes"]]
+        deleted = [record for page in pages for record in page["deleted"]["tasks"]]
+        assert sorted(tasks) == sorted(task["id"] for task in changes["tasks"])
+        assert sorted(notes) == sorted(note["id"] for note in changes["notes"])
+        assert sorted(deleted) == sorted(row["record_id"] for row in changes["tombstones"])
@@ -0,0 +1,192 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.services import digest_store as digest_store_module
+from app.services.digest_store import DigestEntry, DigestStore
+
+USER = UUID("00000000-0000-0000-0000-000000000001")
+TZ = "UTC"
+# A Wednesday
+TODAY = date(2026, 3, 4)
+
+def task(task_id, important=False, due=None, created="2026-03-01T09:00:00+00:00"):
+    return {"id": task_id, "description": task_id, "is_important": important, "due_date": due, "created_at": created}
+
+def ids(tasks):
+    return [t["id"] for t in tasks]
+
+@pytest.fixture
+def database(monkeypatch):
+    """The tasks get_daily_digest_tasks returns, and the calls made to it"""
+    state = {"tasks": [], "calls": []}
+
+    async def get_daily_digest_tasks(user_id, today, limit):
+        state["calls"].append((user_id, today, limit))
+        return state["tasks"][:limit]
+
+    monkeypatch.setattr(digest_store_module, "get_daily_digest_tasks", get_daily_digest_tasks)
+    return state
+
+@pytest.fixture
+def store():
+    return DigestStore(max_users=100, max_staleness=60)
+
+def entry(*tasks, limit=3):
+    return DigestEntry(today=TODAY, limit=limit, tasks=list(tasks))
+
+def test_created_task_is_ranked_into_a_digest_with_room():
+    digest = entry(task("due-today", due="2026-03-04"), task("later"))
+    assert DigestStore(10, 60)._apply(digest, "created", [task("important", important=True)])
+    assert ids(digest.tasks) == ["important", "due-today", "later"]
+
+def test_created_task_ranked_below_a_full_digest_is_left_out():
+    digest = entry(task("a", important=True), task("b", due="2026-03-04"), task("c", due="2026-03-06"))
+    assert DigestStore(10, 60)._apply(digest, "created", [task("no-due-date")])
+    assert ids(digest.tasks) == ["a", "b", "c"]
+
+def test_created_task_ranked_into_a_full_digest_pushes_out_the_last():
+    digest = entry(task("a", important=True), task("b", due="2026-03-04"), task("c", due="2026-03-06"))
+    assert DigestStore(10, 60)._apply(digest, "created", [task("new", due="2026-03-05")])
+    assert ids(digest.tasks) == ["a", "b", "new"]
+
+def test_newest_task_comes_first_within_a_bucket():
+    digest = entry(task("old", created="2026-03-01T09:00:00+00:00"))
+    assert DigestStore(10, 60)._apply(digest, "created", [task("new", created="2026-03-02T09:00:00+00:00")])
+    assert ids(digest.tasks) == ["new", "old"]
+
+def test_updated_task_is_reordered():
+    digest = entry(task("a", due="2026-03-04"), task("b"))
+    assert DigestStore(10, 60)._apply(digest, "updated", [task("b", important=True)])
+    assert ids(digest.tasks) == ["b", "a"]
+    assert digest.tasks[0]["is_important"]
+
+def test_updated_task_dropping_out_of_a_full_digest_invalidates_it():
+    digest = entry(task("a", important=True), task("b", due="2026-03-04"), task("c", due="2026-03-06"))
+    # Its replacement is some task the entry does not hold
+    assert not DigestStore(10, 60)._apply(digest, "updated", [task("a")])
+
+def test_deleted_task_is_removed_from_a_digest_with_room():
+    digest = entry(task("a"), task("b"))
+    assert DigestStore(10, 60)._apply(digest, "deleted", [task("a")])
+    assert ids(digest.tasks) == ["b"]
+
+def test_deleted_task_of_a_full_digest_invalidates_it():
+    digest = entry(task("a"), task("b"), task("c"))
+    assert not DigestStore(10, 60)._apply(digest, "deleted", [task("b")])
+
+def test_deleting_a_task_outside_the_digest_keeps_it():
+    digest = entry(task("a"), task("b"), task("c"))
+    assert DigestStore(10, 60)._apply(digest, "deleted", [task("elsewhere")])
+    assert ids(digest.tasks) == ["a", "b", "c"]
+
+def test_writes_update_stored_digests_without_a_query(store, database):
+    database["tasks"] = [task("a")]
+
+    async def scenario():
+        await store.get_digest(USER, TZ, TODAY, 3)
+        await store.on_task_change(str(USER), "created", [task("b", important=True)])
+        return await store.get_digest(USER, TZ, TODAY, 3)
+
+    assert ids(asyncio.run(scenario())) == ["b", "a"]
+    assert len(database["calls"]) == 1
+    assert store.stats["incremental_updates"] == 1
+
+def test_invalidated_digest_is_recomputed_on_the_next_read(store, database):
+    database["tasks"] = [task("a"), task("b"), task("c"), task("d")]
+
+    async def scenario():
+        await store.get_digest(USER, TZ, TODAY, 3)
+        database["tasks"] = [task("b"), task("c"), task("d")]
+        await store.on_task_change(str(USER), "deleted", [task("a")])
+        return await store.get_digest(USER, TZ, TODAY, 3)
+
+    assert ids(asyncio.run(scenario())) == ["b", "c", "d"]
+    assert len(database["calls"]) == 2
+    assert store.stats["invalidations"] == 1
+
+def test_digest_computed_during_a_write_is_not_stored(store, database, monkeypatch):
+    database["tasks"] = [task("a")]
+
+    async def scenario():
+        original = digest_store_module.get_daily_digest_tasks
+
+        async def slow_query(user_id, today, limit):
+            # The write lands while the query is in flight
+            await store.on_task_change(str(USER), "created", [task("b")])
+            return await original(user_id, today, limit)
+
+        monkeypatch.setattr(digest_store_module, "get_daily_digest_tasks", slow_query)
+        await store.get_digest(USER, TZ, TODAY, 3)
+        monkeypatch.setattr(digest_store_module, "get_daily_digest_tasks", original)
+        await store.get_digest(USER, TZ, TODAY, 3)
+
+    asyncio.run(scenario())
+    assert store.stats["misses"] == 2
+
+def test_reads_within_the_staleness_bound_are_hits(store, database):
+    database["tasks"] = [task("a")]
+
+    async def scenario():
+        for _ in range(3):
+            await store.get_digest(USER, TZ, TODAY, 3)
+
+    asyncio.run(scenario())
+    assert len(database["calls"]) == 1
+    assert (store.stats["hits"], store.stats["misses"]) == (2, 1)
+
+def test_digest_older_than_the_staleness_bound_is_recomputed(store, database):
+    database["tasks"] = [task("a")]
+
+    async def scenario():
+        await store.get_digest(USER, TZ, TODAY, 3)
+        # A write made by another process, which this store never heard of
+        database["tasks"] = [task("a"), task("other-process")]
+        stored = store._entries[str(USER)][(TZ, 3)]
+        stored.computed_at -= store.max_staleness - 1
+        fresh = await store.get_digest(USER, TZ, TODAY, 3)
+        stored.computed_at -= 2
+        return fresh, await store.get_digest(USER, TZ, TODAY, 3)
+
+    within_bound, past_bound = asyncio.run(scenario())
+    assert ids(within_bound) == ["a"]
+    assert ids(past_bound) == ["a", "other-process"]
+    assert len(database["calls"]) == 2
+
+def test_reading_on_a_new_day_recomputes_the_digest(store, database):
+    database["tasks"] = [task("a")]
+
+    async def scenario():
+        await store.get_digest(USER, TZ, TODAY, 3)
+        await store.get_digest(USER, TZ, TODAY + timedelta(days=1), 3)
+
+    asyncio.run(scenario())
+    assert [today for _, today, _ in database["calls"]] == [TODAY, TODAY + timedelta(days=1)]
+
+def test_rollover_refresh_recomputes_only_entries_of_a_past_day(store, database):
+    today = datetime.now(ZoneInfo(TZ)).date()
+    yesterday_user, current_user = "00000000-0000-0000-0000-00000000000a", "00000000-0000-0000-0000-00000000000b"
+    store._store(yesterday_user, TZ, DigestEntry(today=today - timedelta(days=1), limit=3, tasks=[task("stale")]))
+    store._store(current_user, TZ, DigestEntry(today=today, limit=3, tasks=[task("current")]))
+    database["tasks"] = [task("fresh")]
+
+    assert asyncio.run(store.refresh_rollovers()) == 1
+    assert database["calls"] == [(UUID(yesterday_user), today, 3)]
+    assert ids(store._entries[yesterday_user][(TZ, 3)].tasks) == ["fresh"]
+    assert store._entries[yesterday_user][(TZ, 3)].today == today
+    assert ids(store._entries[current_user][(TZ, 3)].tasks) == ["current"]
+    assert store.stats["rollovers"] == 1
+
+def test_failed_rollover_refresh_drops_the_entry(store, monkeypatch):
+    today = datetime.now(ZoneInfo(TZ)).date()
+    store._store(str(USER), TZ, DigestEntry(today=today - timedelta(days=1), limit=3, tasks=[task("stale")]))
+
+    async def failing_query(user_id, today, limit):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(digest_store_module, "get_daily_digest_tasks", failing_query)
+    assert asyncio.run(store.refresh_rollovers()) == 0
+    assert store._entries[str(USER)] == {}
@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from main import app
+
+# Without the context manager the lifespan (database, workers) does not run
+client = TestClient(app)
+
+def test_health_is_only_a_liveness_check():
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy"}
+
+def test_stats_are_disabled_without_a_token(monkeypatch):
+    monkeypatch.setattr(settings, "STATS_TOKEN", None)
+    assert client.get("/stats", headers={"Authorization": "Bearer anything"}).status_code == 404
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}])
+def test_stats_need_the_token(monkeypatch, headers):
+    monkeypatch.setattr(settings, "STATS_TOKEN", "stats-secret")
+    assert client.get("/stats", headers=headers).status_code in (401, 403)
+
+def test_stats_with_the_token(monkeypatch):
+    monkeypatch.setattr(settings, "STATS_TOKEN", "stats-secret")
+    response = client.get("/stats", headers={"Authorization": "Bearer stats-secret"})
+    assert response.status_code == 200
+    assert {"idempotency", "daily_digest", "llm_scheduler", "llm_resilience", "token_usage"} <= set(response.json())
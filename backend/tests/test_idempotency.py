@@ -0,0 +1,171 @@
+import asyncio
+import time
+import uuid
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, Header, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.services import idempotency
+from app.services.idempotency import IdempotencyKeyReusedError, IdempotencyStore, idempotent_response
+
+class FakeRedis:
+    """The few Redis commands the store uses, in memory, with expiry"""
+
+    def __init__(self):
+        self._values = {}
+
+    def _live(self, key):
+        value, expires_at = self._values.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and self._live(key) is not None:
+            return None
+        self._values[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def expire(self, key, seconds):
+        if self._live(key) is None:
+            return False
+        self._values[key] = (self._values[key][0], time.monotonic() + seconds)
+        return True
+
+    async def exists(self, key):
+        return int(self._live(key) is not None)
+
+    async def delete(self, key):
+        self._values.pop(key, None)
+
+def make_store(redis=None, lock_seconds=120):
+    return IdempotencyStore(ttl_seconds=60, max_entries=100, lock_seconds=lock_seconds, redis_client=redis)
+
+class Counter:
+    """execute callback counting its runs, optionally slow or failing"""
+
+    def __init__(self, seconds=0.0, failures=0):
+        self.seconds = seconds
+        self.failures = failures
+        self.runs = 0
+
+    async def __call__(self):
+        self.runs += 1
+        await asyncio.sleep(self.seconds)
+        if self.runs <= self.failures:
+            raise RuntimeError("LLM unavailable")
+        return 201, f'{{"run": {self.runs}}}'.encode()
+
+def test_concurrent_duplicates_execute_once():
+    store = make_store()
+    execute = Counter(seconds=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(store.run("key", "fingerprint", execute) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert execute.runs == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True, True, True]
+    assert {stored.body for stored, _ in results} == {b'{"run": 1}'}
+    assert store.stats["collapsed"] == 4
+
+def test_failures_are_not_stored():
+    store = make_store()
+    execute = Counter(seconds=0.05, failures=1)
+
+    async def scenario():
+        first = await asyncio.gather(*(store.run("key", "fingerprint", execute) for _ in range(3)),
+                                     return_exceptions=True)
+        return first, await store.run("key", "fingerprint", execute)
+
+    first, (stored, replayed) = asyncio.run(scenario())
+    # The duplicates waiting on the failed execution get its error
+    assert all(isinstance(result, RuntimeError) for result in first)
+    assert (stored.body, replayed) == (b'{"run": 2}', False)
+    assert execute.runs == 2
+
+def test_reused_key_with_another_request_is_rejected():
+    store = make_store()
+
+    async def scenario():
+        await store.run("key", "fingerprint", Counter())
+        await store.run("key", "another fingerprint", Counter())
+
+    with pytest.raises(IdempotencyKeyReusedError):
+        asyncio.run(scenario())
+
+def test_lock_outlives_its_ttl_while_the_request_runs():
+    redis = FakeRedis()
+    # Two workers sharing Redis; the first request runs for longer than the lock's TTL
+    first_worker, second_worker = make_store(redis, lock_seconds=0.3), make_store(redis, lock_seconds=0.3)
+    execute = Counter(seconds=0.7)
+
+    async def scenario():
+        first = asyncio.create_task(first_worker.run("key", "fingerprint", execute))
+        await asyncio.sleep(0.5)
+        return await asyncio.gather(first, second_worker.run("key", "fingerprint", execute))
+
+    (first, first_replayed), (second, second_replayed) = asyncio.run(scenario())
+    assert execute.runs == 1
+    assert (first_replayed, second_replayed) == (False, True)
+    assert first.body == second.body
+    # The lock is released once the response is stored
+    assert asyncio.run(redis.exists("taskflow:idem:lock:key")) == 0
+
+class ProcessRequest(BaseModel):
+    text: str
+
+@pytest.fixture
+def client(monkeypatch):
+    """An endpoint behind idempotent_response, with a fresh store; returns the client and its run count"""
+    monkeypatch.setattr(idempotency, "idempotency_store", make_store())
+    app = FastAPI()
+    runs = []
+
+    @app.post("/notes/process")
+    async def process(payload: ProcessRequest, request: Request, user: str = Header("user-a"),
+                      idempotency_key: Optional[str] = Header(None)):
+        async def execute():
+            runs.append(payload.text)
+            return f'{{"note_id": "{uuid.uuid4()}", "text": "{payload.text}"}}'.encode()
+        return await idempotent_response(request, user, idempotency_key, payload, execute, 201)
+
+    return TestClient(app), runs
+
+def test_duplicate_replays_the_stored_response_byte_for_byte(client):
+    client, runs = client
+    first = client.post("/notes/process", json={"text": "notes"}, headers={"Idempotency-Key": "k1"})
+    second = client.post("/notes/process", json={"text": "notes"}, headers={"Idempotency-Key": "k1"})
+    assert (first.status_code, second.status_code) == (201, 201)
+    assert second.content == first.content
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert runs == ["notes"]
+
+def test_key_reused_with_a_different_body_is_422(client):
+    client, runs = client
+    client.post("/notes/process", json={"text": "notes"}, headers={"Idempotency-Key": "k1"})
+    response = client.post("/notes/process", json={"text": "other notes"}, headers={"Idempotency-Key": "k1"})
+    assert response.status_code == 422
+    assert runs == ["notes"]
+
+def test_keys_are_scoped_to_the_user(client):
+    client, runs = client
+    client.post("/notes/process", json={"text": "notes"}, headers={"Idempotency-Key": "k1", "User": "user-a"})
+    response = client.post("/notes/process", json={"text": "notes"}, headers={"Idempotency-Key": "k1", "User": "user-b"})
+    assert "idempotent-replayed" not in response.headers
+    assert runs == ["notes", "notes"]
+
+def test_requests_without_a_key_always_execute(client):
+    client, runs = client
+    first = client.post("/notes/process", json={"text": "notes"})
+    second = client.post("/notes/process", json={"text": "notes"})
+    assert first.content != second.content
+    assert runs == ["notes", "notes"]
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_cache import LLMResultCache
+
+NAMESPACE = "fast:v1:two_step"
+NOTE = (
+    "Weekly sync with the platform team about the billing migration. Alice will draft the rollout plan "
+    "for the new invoices service and Bob will review the database schema changes before Friday. "
+    "The team agreed to freeze the old endpoints next month and to notify the largest customers first."
+)
+# The same note with a couple of words changed
+NEAR_DUPLICATE = NOTE.replace("largest customers", "biggest accounts")
+RESULT = ("Billing migration sync.", [{"description": "Draft the rollout plan", "due_date": None}])
+
+@pytest.fixture
+def cache():
+    return LLMResultCache(max_entries=100, ttl_seconds=60, max_distance=8, min_words=10)
+
+def test_near_duplicate_of_the_same_users_note_is_a_hit(cache):
+    async def scenario():
+        await cache.set(NAMESPACE, NOTE, RESULT, owner="user-a")
+        return await cache.get(NAMESPACE, NEAR_DUPLICATE, owner="user-a")
+
+    assert asyncio.run(scenario()) == RESULT
+    assert cache.stats["near_hits"] == 1
+
+def test_another_user_never_gets_a_near_duplicate_entry(cache):
+    async def scenario():
+        await cache.set(NAMESPACE, NOTE, RESULT, owner="user-a")
+        return (
+            await cache.get(NAMESPACE, NEAR_DUPLICATE, owner="user-b"),
+            await cache.get(NAMESPACE, NEAR_DUPLICATE),
+        )
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert cache.stats["near_hits"] == 0
+
+def test_users_near_duplicates_are_kept_apart(cache):
+    other = ("Someone else's summary.", [])
+
+    async def scenario():
+        await cache.set(NAMESPACE, NOTE, RESULT, owner="user-a")
+        await cache.set(NAMESPACE, NEAR_DUPLICATE, other, owner="user-b")
+        tweaked = NOTE.replace("Weekly sync", "Weekly call")
+        return await cache.get(NAMESPACE, tweaked, owner="user-a"), await cache.get(NAMESPACE, tweaked, owner="user-b")
+
+    assert asyncio.run(scenario()) == (RESULT, other)
+
+def test_exact_text_is_shared(cache):
+    async def scenario():
+        await cache.set(NAMESPACE, NOTE, RESULT, owner="user-a")
+        # Only case and punctuation differ: the caller sent the same note
+        return await cache.get(NAMESPACE, NOTE.upper().replace(".", ""), owner="user-b")
+
+    assert asyncio.run(scenario()) == RESULT
+    assert cache.stats["hits"] == 1
+
+def test_evicted_entries_leave_the_band_index(cache):
+    cache.max_entries = 1
+
+    async def scenario():
+        await cache.set(NAMESPACE, NOTE, RESULT, owner="user-a")
+        await cache.set(NAMESPACE, "an unrelated note " * 5, RESULT, owner="user-a")
+        return await cache.get(NAMESPACE, NEAR_DUPLICATE, owner="user-a")
+
+    assert asyncio.run(scenario()) is None
+    assert set().union(*cache._band_index.values()) == set(cache._entries)
@@ -0,0 +1,27 @@
+import asyncio
+
+from app.services import ai_processing_service as ai
+
+def test_closing_the_llm_client_drops_everything_built_on_it():
+    async def scenario():
+        client = ai.get_llm_http_client()
+        ai.get_model_chains()
+        assert ai._model_chains and ai._chat_models
+        await ai.close_llm_client()
+        closed = (client.is_closed, ai._llm_http_client, dict(ai._model_chains), dict(ai._chat_models))
+
+        # Used again after shutdown (e.g. by another lifespan in the same process)
+        ai.get_model_chains()
+        rebuilt_client = ai._llm_http_client
+        await ai.close_llm_client()
+        return closed, rebuilt_client
+
+    (was_closed, client, chains, models), rebuilt_client = asyncio.run(scenario())
+    assert was_closed
+    assert (client, chains, models) == (None, {}, {})
+    assert rebuilt_client is not None and rebuilt_client is not ai._llm_http_client
+    assert rebuilt_client.is_closed
+
+def test_closing_without_a_client_is_a_no_op():
+    asyncio.run(ai.close_llm_client())
+    assert ai._llm_http_client is None
@@ -0,0 +1,243 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_resilience
+from app.services.llm_resilience import CircuitBreaker, LatencyTracker, LLMUnavailableError, ResilientCaller
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_resilience, "time", clock)
+    return clock
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Upper bounds of the jittered backoffs; the retries themselves do not wait"""
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append(high)
+        return 0
+
+    monkeypatch.setattr(llm_resilience.random, "uniform", uniform)
+    return bounds
+
+def open_breaker(clock, reset_seconds=30, trial_timeout_seconds=120):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=reset_seconds,
+                             trial_timeout_seconds=trial_timeout_seconds)
+    breaker.record_failure(asyncio.TimeoutError())
+    assert breaker.state == "open"
+    return breaker
+
+def test_retries_stop_at_the_cap(monkeypatch, backoffs):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 5)
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_SECONDS", 0.5)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_SECONDS", 3)
+    caller = ResilientCaller(CircuitBreaker(100, 30, 120), LatencyTracker())
+    attempts = []
+
+    async def always_times_out():
+        attempts.append(1)
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(caller.call(always_times_out))
+    assert len(attempts) == 6
+    # Exponential backoff, capped at LLM_RETRY_MAX_SECONDS
+    assert backoffs == [0.5, 1, 2, 3, 3]
+    assert caller.stats["retries"] == 5
+    assert caller.stats["failures"] == 1
+
+def test_non_retryable_errors_are_not_retried(backoffs):
+    caller = ResilientCaller(CircuitBreaker(100, 30, 120), LatencyTracker())
+    attempts = []
+
+    async def bad_request():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(caller.call(bad_request))
+    assert len(attempts) == 1
+    assert backoffs == []
+
+def test_open_circuit_stops_retrying(monkeypatch, backoffs):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 5)
+    caller = ResilientCaller(CircuitBreaker(2, 30, 120), LatencyTracker())
+    attempts = []
+
+    async def always_times_out():
+        attempts.append(1)
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(LLMUnavailableError) as raised:
+        asyncio.run(caller.call(always_times_out))
+    assert len(attempts) == 2
+    assert raised.value.retry_after > 0
+    assert caller.breaker.state == "open"
+
+def test_open_circuit_rejects_until_reset(clock):
+    breaker = open_breaker(clock)
+    with pytest.raises(LLMUnavailableError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_after == 30
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    assert breaker.stats == {"opened": 1, "rejected": 1}
+
+def test_half_open_lets_a_single_trial_through(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    breaker.before_call()
+    for _ in range(3):
+        with pytest.raises(LLMUnavailableError):
+            breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.before_call()
+
+def test_failed_trial_opens_the_circuit_again(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure(asyncio.TimeoutError())
+    assert breaker.state == "open"
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+    assert breaker.stats["opened"] == 2
+
+@pytest.mark.parametrize("release", [
+    lambda breaker: breaker.cancel_trial(),
+    # Not the provider's fault: no verdict, but the trial is over
+    lambda breaker: breaker.record_failure(ValueError("bad request")),
+])
+def test_trial_without_a_verdict_hands_over_to_the_next_call(clock, release):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    breaker.before_call()
+    release(breaker)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+def test_leaked_trial_expires(clock):
+    breaker = open_breaker(clock, trial_timeout_seconds=60)
+    clock.now += 30
+    # A trial whose caller never reports back
+    breaker.before_call()
+    clock.now += 59
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+    clock.now += 1
+    breaker.before_call()
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+def test_cancelled_call_releases_the_trial(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    caller = ResilientCaller(breaker, LatencyTracker())
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hangs():
+            started.set()
+            await asyncio.Event().wait()
+
+        call = asyncio.create_task(caller.call(hangs))
+        await started.wait()
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+
+    asyncio.run(scenario())
+    breaker.before_call()
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(settings, "LLM_HEDGE_PERCENTILE", 95)
+    latencies = LatencyTracker()
+    for _ in range(5):
+        latencies.record(0.02)
+    return ResilientCaller(CircuitBreaker(100, 30, 120), latencies)
+
+class Attempts:
+    """Factory whose attempts take the given durations in turn, recording how each one ended"""
+
+    def __init__(self, *durations):
+        self.durations = list(durations)
+        self.outcomes = []
+
+    async def __call__(self):
+        number = len(self.outcomes)
+        self.outcomes.append("running")
+        try:
+            await asyncio.sleep(self.durations[number])
+        except asyncio.CancelledError:
+            self.outcomes[number] = "cancelled"
+            raise
+        self.outcomes[number] = "finished"
+        return number
+
+def test_hedge_wins_and_the_slow_attempt_is_cancelled(hedging):
+    attempts = Attempts(5, 0.01)
+
+    async def scenario():
+        result = await hedging.call(attempts)
+        # Let the cancellation reach the slow attempt
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario()) == 1
+    assert attempts.outcomes == ["cancelled", "finished"]
+    assert (hedging.stats["hedges"], hedging.stats["hedge_wins"]) == (1, 1)
+
+def test_no_hedge_before_the_latency_percentile(hedging):
+    attempts = Attempts(0.001)
+    assert asyncio.run(hedging.call(attempts)) == 0
+    assert attempts.outcomes == ["finished"]
+    assert hedging.stats["hedges"] == 0
+
+def test_original_attempt_can_still_win_after_hedging(hedging):
+    attempts = Attempts(0.03, 5)
+
+    async def scenario():
+        result = await hedging.call(attempts)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario()) == 0
+    assert attempts.outcomes == ["finished", "cancelled"]
+    assert (hedging.stats["hedges"], hedging.stats["hedge_wins"]) == (1, 0)
+
+def test_cancelling_the_caller_cancels_every_attempt(hedging):
+    attempts = Attempts(5, 5)
+
+    async def scenario():
+        call = asyncio.create_task(hedging.call(attempts))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert attempts.outcomes == ["cancelled", "cancelled"]
+
+def test_hedging_needs_enough_samples(hedging):
+    hedging.latencies = LatencyTracker()
+    hedging.latencies.record(0.02)
+    assert hedging._hedge_delay() is None
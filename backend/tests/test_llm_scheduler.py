@@ -0,0 +1,176 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.llm_scheduler import BATCH, INTERACTIVE, LLMScheduler, SchedulerFullError
+from app.services.rate_limiter import AdaptiveRateLimiter
+
+# Simulated LLM request duration
+SERVICE_SECONDS = 0.01
+
+def make_scheduler(max_concurrency=1, max_queue_depth=1000, batch_max_wait=60.0):
+    # Rate limits far above what the tests issue, so only the scheduler decides
+    limiter = AdaptiveRateLimiter(rpm=10**7, tpm=10**9)
+    return LLMScheduler(limiter, max_concurrency=max_concurrency,
+                        max_queue_depth=max_queue_depth, batch_max_wait=batch_max_wait)
+
+class SimulatedBackend:
+    """Runs LLM work through a scheduler, recording admission order and queue waits"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.admitted = []
+        self.waits = {INTERACTIVE: [], BATCH: []}
+
+    async def call(self, user_id, priority, name=None, service=SERVICE_SECONDS):
+        enqueued = time.monotonic()
+        async with self.scheduler.slot(user_id, priority):
+            self.waits[priority].append(time.monotonic() - enqueued)
+            self.admitted.append(name or (user_id, priority))
+            await asyncio.sleep(service)
+
+async def hold_slot(scheduler, release):
+    """Occupy the scheduler's capacity until release is set, so later work queues up"""
+    async with scheduler.slot("holder", INTERACTIVE):
+        await release.wait()
+
+async def queued(backend, calls):
+    """Start the calls in order behind a held slot and wait for all of them"""
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold_slot(backend.scheduler, release))
+    await asyncio.sleep(0)
+    tasks = []
+    for args in calls:
+        tasks.append(asyncio.create_task(backend.call(*args)))
+        # Each call is enqueued before the next one is started
+        await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+
+def test_users_are_served_in_weighted_fair_order():
+    async def scenario():
+        backend = SimulatedBackend(make_scheduler())
+        burst = [("alice", INTERACTIVE, f"alice-{i}") for i in range(4)]
+        late = [("bob", INTERACTIVE, f"bob-{i}") for i in range(2)]
+        await queued(backend, burst + late)
+        return backend.admitted
+
+    # Bob arrives behind Alice's burst but is not queued behind all of it
+    assert asyncio.run(scenario()) == ["alice-0", "bob-0", "alice-1", "bob-1", "alice-2", "alice-3"]
+
+def test_weight_scales_a_users_share():
+    async def scenario():
+        backend = SimulatedBackend(make_scheduler())
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(backend.scheduler, release))
+        await asyncio.sleep(0)
+
+        async def call(user_id, name, weight):
+            async with backend.scheduler.slot(user_id, INTERACTIVE, weight=weight):
+                backend.admitted.append(name)
+
+        tasks = []
+        for i in range(4):
+            tasks.append(asyncio.create_task(call("heavy", f"heavy-{i}", 2.0)))
+            await asyncio.sleep(0)
+        for i in range(2):
+            tasks.append(asyncio.create_task(call("light", f"light-{i}", 1.0)))
+            await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return backend.admitted
+
+    assert asyncio.run(scenario()) == ["heavy-0", "heavy-1", "light-0", "heavy-2", "heavy-3", "light-1"]
+
+def test_interactive_latency_stays_bounded_under_a_batch_flood():
+    async def scenario():
+        backend = SimulatedBackend(make_scheduler(max_concurrency=2))
+        batch = [asyncio.create_task(backend.call("importer", BATCH)) for _ in range(40)]
+        await asyncio.sleep(SERVICE_SECONDS * 2)
+
+        async def user(user_id):
+            for _ in range(5):
+                await backend.call(user_id, INTERACTIVE)
+
+        await asyncio.gather(user("alice"), user("bob"))
+        interactive_done = len(backend.admitted)
+        await asyncio.gather(*batch)
+        return backend, interactive_done
+
+    backend, interactive_done = asyncio.run(scenario())
+    interactive = [entry for entry in backend.admitted[:interactive_done] if entry[1] == INTERACTIVE]
+    assert len(interactive) == 10
+    # Both users were served while most of the batch work was still queued
+    assert backend.admitted[interactive_done:].count(("importer", BATCH)) > 20
+    # An interactive request waits for at most the requests already running, never the batch queue
+    assert max(backend.waits[INTERACTIVE]) < SERVICE_SECONDS * 5
+    assert max(backend.waits[BATCH]) > SERVICE_SECONDS * 15
+
+def test_no_batch_work_is_admitted_ahead_of_queued_interactive_work():
+    async def scenario():
+        backend = SimulatedBackend(make_scheduler())
+        calls = [("importer", BATCH, f"batch-{i}") for i in range(3)]
+        calls += [("alice", INTERACTIVE, "alice-0"), ("bob", INTERACTIVE, "bob-0")]
+        await queued(backend, calls)
+        return backend.admitted
+
+    assert asyncio.run(scenario()) == ["alice-0", "bob-0", "batch-0", "batch-1", "batch-2"]
+
+def test_batch_work_is_not_starved():
+    async def scenario():
+        backend = SimulatedBackend(make_scheduler(batch_max_wait=SERVICE_SECONDS * 3))
+        batch = asyncio.create_task(backend.call("importer", BATCH, "batch"))
+        await asyncio.sleep(0)
+
+        async def user(user_id):
+            for i in range(10):
+                await backend.call(user_id, INTERACTIVE, f"{user_id}-{i}")
+
+        # Two users keep interactive work queued the whole time
+        await asyncio.gather(user("alice"), user("bob"), batch)
+        return backend.admitted
+
+    admitted = asyncio.run(scenario())
+    assert admitted.index("batch") < len(admitted) - 1
+
+def test_full_queue_rejects_new_work():
+    async def scenario():
+        scheduler = make_scheduler(max_queue_depth=2)
+        backend = SimulatedBackend(scheduler)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(scheduler, release))
+        await asyncio.sleep(0)
+        waiting = [asyncio.create_task(backend.call("alice", INTERACTIVE)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerFullError):
+            await backend.call("bob", INTERACTIVE)
+        release.set()
+        await asyncio.gather(holder, *waiting)
+        return scheduler.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats[INTERACTIVE]["rejected"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == {INTERACTIVE: 0, BATCH: 0}
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = make_scheduler()
+        backend = SimulatedBackend(scheduler)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(scheduler, release))
+        await asyncio.sleep(0)
+        gone = asyncio.create_task(backend.call("alice", INTERACTIVE, "gone"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.gather(gone, return_exceptions=True)
+        release.set()
+        await holder
+        await backend.call("bob", INTERACTIVE, "bob")
+        return backend.admitted, scheduler.get_stats()
+
+    admitted, stats = asyncio.run(scenario())
+    assert admitted == ["bob"]
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"][INTERACTIVE] == 0
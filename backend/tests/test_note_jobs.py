@@ -0,0 +1,44 @@
+import asyncio
+
+from app.services.note_jobs import NoteJobQueue
+
+def make_queue():
+    return NoteJobQueue(executor="external", concurrency=1, max_depth=10)
+
+def test_waiting_past_the_timeout_leaves_nothing_behind():
+    queue = make_queue()
+
+    async def scenario():
+        for _ in range(3):
+            await queue.wait_for_update("job-1", 0.01)
+
+    asyncio.run(scenario())
+    assert queue._updates == {} and queue._waiters == {}
+
+def test_notify_wakes_every_waiter_of_the_job():
+    queue = make_queue()
+
+    async def scenario():
+        waiters = [asyncio.create_task(queue.wait_for_update("job-1", 5)) for _ in range(2)]
+        other = asyncio.create_task(queue.wait_for_update("job-2", 0.05))
+        await asyncio.sleep(0.01)
+        queue.notify("job-1")
+        await asyncio.wait_for(asyncio.gather(*waiters), 1)
+        # job-2 is still waited on until its timeout
+        assert list(queue._updates) == ["job-2"]
+        await other
+
+    asyncio.run(scenario())
+    assert queue._updates == {} and queue._waiters == {}
+
+def test_a_waiter_leaving_early_keeps_the_event_for_the_others():
+    queue = make_queue()
+
+    async def scenario():
+        patient = asyncio.create_task(queue.wait_for_update("job-1", 5))
+        await queue.wait_for_update("job-1", 0.01)
+        queue.notify("job-1")
+        await asyncio.wait_for(patient, 1)
+
+    asyncio.run(scenario())
+    assert queue._updates == {} and queue._waiters == {}
@@ -0,0 +1,85 @@
+import asyncio
+from uuid import UUID
+
+import pytest
+
+from app.models.note_schemas import ProcessNoteRequest
+from app.services import note_import, note_jobs
+from app.services.note_import import import_notes, read_ndjson_notes
+
+USER = UUID("00000000-0000-0000-0000-000000000001")
+NOTE_ID = "00000000-0000-0000-0000-0000000000aa"
+JOB_ID = "00000000-0000-0000-0000-0000000000bb"
+
+@pytest.fixture
+def analyzed(monkeypatch):
+    """Time zones the notes were analyzed in, by note text"""
+    zones = {}
+
+    async def generate(text, user_id=None, priority=None, timezone=None):
+        zones[text] = timezone
+        return f"Summary of {text}", []
+
+    monkeypatch.setattr(note_import, "generate_summary_and_extract_tasks", generate)
+    monkeypatch.setattr(note_jobs, "generate_summary_and_extract_tasks", generate)
+    return zones
+
+def test_imported_notes_are_analyzed_in_their_time_zone(analyzed, monkeypatch):
+    async def save(user_id, notes):
+        return [({"id": f"note-{i}"}, []) for i, _ in enumerate(notes)]
+
+    monkeypatch.setattr(note_import, "create_notes_with_tasks_batch", save)
+    body = b'{"text": "standup", "timezone": "Asia/Tokyo"}\n{"text": "retro"}\n'
+
+    async def scenario():
+        return [result async for result in import_notes(USER, read_ndjson_notes(body, 10))]
+
+    results = asyncio.run(scenario())
+    assert results[-1] == {"status": "done", "completed": 2, "failed": 0}
+    assert analyzed == {"standup": "Asia/Tokyo", "retro": None}
+
+def test_batch_notes_keep_their_time_zone(analyzed, monkeypatch):
+    async def save(user_id, notes):
+        return [({"id": f"note-{i}"}, []) for i, _ in enumerate(notes)]
+
+    monkeypatch.setattr(note_import, "create_notes_with_tasks_batch", save)
+    notes = [ProcessNoteRequest(text="planning", timezone="America/Denver")]
+
+    async def scenario():
+        async def source():
+            for note in notes:
+                yield note
+        return [result async for result in import_notes(USER, source())]
+
+    asyncio.run(scenario())
+    assert analyzed == {"planning": "America/Denver"}
+
+def test_background_job_runs_in_the_time_zone_it_was_queued_with(analyzed, monkeypatch):
+    job = {"id": JOB_ID, "user_id": str(USER), "note_id": NOTE_ID, "status": "queued", "attempts": 0,
+           "timezone": "Europe/Berlin"}
+    updates = []
+
+    async def get_job(job_id, user_id=None):
+        return dict(job)
+
+    async def claim(job_id, attempts):
+        return {**job, "status": "running", "attempts": attempts + 1}
+
+    async def get_note(note_id, user_id):
+        return {"id": NOTE_ID, "original_text": "board prep", "created_at": None}
+
+    async def update_summary(note_id, summary):
+        return None
+
+    async def update_job(job_id, status, result=None, error=None):
+        updates.append(status)
+
+    monkeypatch.setattr(note_jobs, "get_processing_job", get_job)
+    monkeypatch.setattr(note_jobs, "claim_processing_job", claim)
+    monkeypatch.setattr(note_jobs, "get_meeting_note_by_id", get_note)
+    monkeypatch.setattr(note_jobs, "update_meeting_note_summary", update_summary)
+    monkeypatch.setattr(note_jobs, "update_processing_job", update_job)
+
+    asyncio.run(note_jobs.run_note_job(JOB_ID))
+    assert updates == ["completed"]
+    assert analyzed == {"board prep": "Europe/Berlin"}
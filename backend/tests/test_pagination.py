@@ -0,0 +1,83 @@
+import asyncio
+from uuid import UUID
+
+import pytest
+
+from app.core.config import settings
+from app.db import client as db_client
+from app.db.client import close_db_client
+from app.db.pagination import decode_cursor, encode_cursor, next_cursor
+from app.db.supabase_ops import get_notes_with_tasks, get_tasks_for_user
+from benchmarks.fake_postgrest import Database, create_app
+
+USER = "00000000-0000-0000-0000-000000000001"
+OTHER_USER = "00000000-0000-0000-0000-000000000002"
+
+@pytest.fixture(scope="module")
+def db(serve_asgi):
+    db = Database(latency=0)
+    db.seed(3, notes_per_user=4, tasks_per_note=5, seed=7)
+    note = db.insert("meeting_notes", {"user_id": USER, "original_text": "notes", "summary": "summary"})
+    # Rows sharing a created_at are ordered by id, so pages must not skip or repeat them
+    for i in range(23):
+        db.insert("tasks", {
+            "user_id": USER, "note_id": note["id"], "description": f"task {i}",
+            "status": "completed" if i % 3 == 0 else "open", "created_at": f"2026-10-{1 + i // 4:02d}T09:00:00+00:00"
+        })
+    db.insert("tasks", {"user_id": OTHER_USER, "description": "someone else's", "created_at": "2026-10-02T09:00:00+00:00"})
+    db.url = serve_asgi(create_app(db))
+    return db
+
+@pytest.fixture(autouse=True)
+def use_db(db, monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_URL", db.url)
+    monkeypatch.setattr(db_client, "_client", None)
+
+def newest_first(rows):
+    return sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+
+def page_through(fetch, limit):
+    async def scenario():
+        pages, after = [], None
+        while True:
+            rows = await fetch(after, limit)
+            pages.append(rows)
+            cursor = next_cursor(rows, limit)
+            if cursor is None:
+                await close_db_client()
+                return pages
+            after = decode_cursor(cursor)
+
+    return asyncio.run(scenario())
+
+def test_cursor_round_trip():
+    row = {"created_at": "2026-10-18T09:00:00.123456+00:00", "id": "5f0c2a0e-8a5b-4c59-9a3e-1d1f3c7e2b10"}
+    assert decode_cursor(encode_cursor(row)) == (row["created_at"], row["id"])
+    assert decode_cursor(None) is None
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor({"created_at": "yesterday", "id": USER}),
+                                    encode_cursor({"created_at": "2026-10-18T09:00:00", "id": "1) or (true"})])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 23, 50])
+def test_pages_return_every_task_once_newest_first(db, limit):
+    pages = page_through(lambda after, limit: get_tasks_for_user(UUID(USER), limit, after), limit)
+    rows = [row for page in pages for row in page]
+    assert [row["id"] for row in rows] == [row["id"] for row in newest_first(db.table("tasks").by_user[USER].values())]
+    assert all(len(page) <= limit for page in pages)
+
+def test_pages_apply_the_filters(db):
+    pages = page_through(lambda after, limit: get_tasks_for_user(UUID(USER), limit, after, status="open"), 5)
+    open_tasks = [row for row in db.table("tasks").by_user[USER].values() if row["status"] == "open"]
+    assert [row["id"] for page in pages for row in page] == [row["id"] for row in newest_first(open_tasks)]
+
+def test_note_pages_only_hold_notes_with_tasks(db):
+    user = next(user_id for user_id in db.table("meeting_notes").by_user if user_id != USER)
+    db.insert("meeting_notes", {"user_id": user, "original_text": "no action items", "summary": "nothing to do"})
+    pages = page_through(lambda after, limit: get_notes_with_tasks(UUID(user), limit, after), 3)
+    notes = [row for page in pages for row in page]
+    with_tasks = {row["note_id"] for row in db.table("tasks").by_user[user].values()}
+    assert {row["id"] for row in notes} == with_tasks
+    assert all("original_text" not in row for row in notes)
@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+
+from app.services.pre_extractor import find_due_date, pre_extract
+
+# A Wednesday
+REFERENCE = date(2026, 3, 4)
+
+@pytest.mark.parametrize("text", [
+    "TODO: Decide 3 options for the venue",
+    "Augment 2 servers before the launch",
+    "Check the market 5 times a day",
+    "Octopus 4 is the codename",
+    "Send the 3 junk reports",
+])
+def test_words_starting_with_a_month_are_not_dates(text):
+    assert find_due_date(text, REFERENCE)[0] is None
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ship it by Dec 3", date(2026, 12, 3)),
+    ("Ship it by Dec. 3", date(2026, 12, 3)),
+    ("Ship it by December 3rd", date(2026, 12, 3)),
+    ("Ship it on Sept 9", date(2026, 9, 9)),
+    ("Ship it on 2 August 2027", date(2027, 8, 2)),
+    ("Ship it by March 1", date(2027, 3, 1)),
+])
+def test_month_names_and_abbreviations_are_dates(text, expected):
+    assert find_due_date(text, REFERENCE)[0] == expected
+
+@pytest.mark.parametrize("line", [
+    "- AI-powered search shipped last sprint",
+    "Task-level metrics look fine",
+    "TODO-list cleanup was discussed",
+])
+def test_hyphenated_words_are_not_action_markers(line):
+    result = pre_extract(line, REFERENCE)
+    assert result.tasks == []
+    assert not result.trivial
+
+@pytest.mark.parametrize("line, description", [
+    ("TODO: send the deck", "Send the deck"),
+    ("- AI: book the room", "Book the room"),
+    ("Task - update the roadmap", "Update the roadmap"),
+    ("[ ] email the client", "Email the client"),
+])
+def test_action_markers(line, description):
+    result = pre_extract(line, REFERENCE)
+    assert [task.description for task in result.tasks] == [description]
+    assert result.trivial
+
+@pytest.mark.parametrize("line, description", [
+    ("- Mon team will sync", "Mon team will sync"),
+    ("TODO: may need to review budget", "May need to review budget"),
+    ("TODO: these 3 may need review", "These 3 may need review"),
+    ("Action item: wed the two datasets", "Wed the two datasets"),
+    ("TODO: fri-day party prep", "Fri-day party prep"),
+])
+def test_words_that_look_like_abbreviated_dates_are_not_dates(line, description):
+    result = pre_extract(line, REFERENCE)
+    assert [(task.description, task.due_date) for task in result.tasks] == [(description, None)]
+
+@pytest.mark.parametrize("text, expected", [
+    ("Send the deck by Mon", date(2026, 3, 9)),
+    ("Send the deck on Thu", date(2026, 3, 5)),
+    ("Sync next wed with Bob", date(2026, 3, 11)),
+    ("Send the deck Fri", date(2026, 3, 6)),
+    ("Send the deck Fri, then review it", date(2026, 3, 6)),
+    ("Send the deck Tues. after standup", date(2026, 3, 10)),
+    ("Ship it 3 May", date(2026, 5, 3)),
+])
+def test_abbreviations_read_as_dates_after_a_preposition_or_before_punctuation(text, expected):
+    assert find_due_date(text, REFERENCE)[0] == expected
+
+@pytest.mark.parametrize("line, description, due_date", [
+    ("TODO: finish report on the 3rd of May", "Finish report", date(2026, 5, 3)),
+    ("TODO: finish report by the end of the week", "Finish report", date(2026, 3, 6)),
+    ("TODO: send the deck by Friday (final)", "Send the deck (final)", date(2026, 3, 6)),
+    ("TODO: meet Bob at the 3/20 offsite", "Meet Bob offsite", date(2026, 3, 20)),
+])
+def test_date_is_cut_out_of_the_description_with_its_connecting_words(line, description, due_date):
+    result = pre_extract(line, REFERENCE)
+    assert [(task.description, task.due_date) for task in result.tasks] == [(description, due_date)]
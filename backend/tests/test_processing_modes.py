@@ -0,0 +1,73 @@
+import asyncio
+import json
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+from app.core.config import settings
+from app.services import ai_processing_service
+from app.services.ai_processing_service import ModelChains
+
+NOTES = "Alice will send the budget report by 2026-10-20. Bob will book the venue."
+SUMMARY = "The team split the event preparation."
+TASKS = [{"description": "Send the budget report", "due_date": "2026-10-20"},
+         {"description": "Book the venue", "due_date": None}]
+
+class ScriptedChatModel(BaseChatModel):
+    """Answers each prompt of the workflow like the model would, recording the prompts"""
+
+    combined_reply: str = json.dumps({"summary": SUMMARY, "tasks": TASKS})
+    prompts: List[str] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = messages[-1].content
+        self.prompts.append(prompt)
+        if '"summary" and "tasks"' in prompt:
+            reply = self.combined_reply
+        elif prompt.startswith("Please summarize"):
+            reply = SUMMARY
+        else:
+            reply = json.dumps({"tasks": TASKS})
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+@pytest.fixture
+def model(monkeypatch):
+    model = ScriptedChatModel()
+    monkeypatch.setattr(ai_processing_service, "get_llm", lambda model_name=None: model)
+    return model
+
+def run_workflow(mode, monkeypatch):
+    monkeypatch.setattr(settings, "AI_PROCESSING_MODE", mode)
+    return asyncio.run(ModelChains("scripted").workflow.ainvoke({"notes_text": NOTES, "context": ""}))
+
+@pytest.mark.parametrize("mode", ["single", "parallel"])
+def test_both_modes_give_the_same_result(model, monkeypatch, mode):
+    summary, tasks = run_workflow(mode, monkeypatch)
+    assert summary == SUMMARY
+    assert [{**task, "due_date": task["due_date"] and task["due_date"].isoformat()} for task in tasks] == TASKS
+
+def test_single_mode_sends_the_notes_to_the_model_once(model, monkeypatch):
+    run_workflow("single", monkeypatch)
+    assert len(model.prompts) == 1
+    assert NOTES in model.prompts[0]
+
+def test_parallel_mode_makes_a_call_per_chain(model, monkeypatch):
+    run_workflow("parallel", monkeypatch)
+    assert len(model.prompts) == 2
+    assert all(NOTES in prompt for prompt in model.prompts)
+
+def test_single_mode_falls_back_when_the_combined_output_does_not_parse(model, monkeypatch):
+    model.combined_reply = "Sorry, here is a summary instead of JSON."
+    summary, tasks = run_workflow("single", monkeypatch)
+    assert summary == SUMMARY
+    assert len(tasks) == 2
+    # The combined call, then the summary and extraction calls of the two-chain workflow
+    assert len(model.prompts) == 3
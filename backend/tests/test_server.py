@@ -0,0 +1,24 @@
+import pytest
+
+import server
+from app.core.config import settings
+
+@pytest.fixture(autouse=True)
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+
+def test_response_cache_is_disabled_for_several_workers_without_redis(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_URL", None)
+    server.require_shared_response_cache(4)
+    assert settings.RESPONSE_CACHE_ENABLED is False
+
+def test_response_cache_stays_enabled_for_a_single_worker(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_URL", None)
+    server.require_shared_response_cache(1)
+    assert settings.RESPONSE_CACHE_ENABLED is True
+
+def test_response_cache_stays_enabled_with_a_shared_redis(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(server, "redis_configured", lambda: True)
+    server.require_shared_response_cache(4)
+    assert settings.RESPONSE_CACHE_ENABLED is True
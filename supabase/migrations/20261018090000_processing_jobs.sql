@@ -0,0 +1,42 @@
+/*
+  # Background note processing jobs
+
+  1. New Tables
+     - `processing_jobs`
+       - `id` (uuid, primary key)
+       - `user_id` (uuid, references auth.users)
+       - `note_id` (uuid, references meeting_notes.id)
+       - `status` (text: queued, running, completed, failed)
+       - `result` (jsonb, summary and extracted tasks once completed)
+       - `error` (text, nullable)
+       - `attempts` (integer)
+       - `created_at`, `updated_at` (timestamptz)
+
+  2. Security
+     - Enable RLS; users can view their own jobs
+*/
+
+CREATE TABLE IF NOT EXISTS processing_jobs (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id uuid NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  note_id uuid NOT NULL REFERENCES meeting_notes(id) ON DELETE CASCADE,
+  status text NOT NULL DEFAULT 'queued',
+  result jsonb,
+  error text,
+  attempts integer NOT NULL DEFAULT 0,
+  created_at timestamptz DEFAULT now(),
+  updated_at timestamptz DEFAULT now()
+);
+
+-- Pending jobs are picked up in creation order on startup and by external workers
+CREATE INDEX IF NOT EXISTS processing_jobs_status_created_at_idx
+  ON processing_jobs (status, created_at)
+  WHERE status IN ('queued', 'running');
+
+ALTER TABLE processing_jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own processing jobs"
+  ON processing_jobs
+  FOR SELECT
+  TO authenticated
+  USING (auth.uid() = user_id);
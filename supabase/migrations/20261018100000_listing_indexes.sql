@@ -0,0 +1,35 @@
+/*
+  # Indexes for task and note listing
+
+  Supports keyset pagination over (created_at DESC, id DESC) per user and the
+  status, importance and due date filters of the task list endpoints.
+
+  1. Indexes on `tasks`
+     - `(user_id, created_at DESC, id DESC)` for GET /tasks
+     - `(user_id, note_id, created_at DESC, id DESC)` for GET /tasks/by-note/{note_id}
+     - `(user_id, status, created_at DESC, id DESC)` for status-filtered lists
+     - `(user_id, due_date)` for due date ranges
+     - `(note_id)` for the meeting_notes ON DELETE CASCADE and note joins
+
+  2. Indexes on `meeting_notes`
+     - `(user_id, created_at DESC, id DESC)` for GET /tasks/notes
+*/
+
+CREATE INDEX IF NOT EXISTS tasks_user_created_at_idx
+  ON tasks (user_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS tasks_user_note_created_at_idx
+  ON tasks (user_id, note_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS tasks_user_status_created_at_idx
+  ON tasks (user_id, status, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS tasks_user_due_date_idx
+  ON tasks (user_id, due_date)
+  WHERE due_date IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS tasks_note_id_idx
+  ON tasks (note_id);
+
+CREATE INDEX IF NOT EXISTS meeting_notes_user_created_at_idx
+  ON meeting_notes (user_id, created_at DESC, id DESC);
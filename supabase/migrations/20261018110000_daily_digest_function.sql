@@ -0,0 +1,33 @@
+/*
+  # Daily digest ranking in the database
+
+  `get_daily_digest(p_user_id, p_today, p_limit)` returns at most `p_limit` tasks
+  of a user ranked by priority bucket:
+    0. important tasks
+    1. tasks due on `p_today`
+    2. tasks due in the Monday-to-Sunday week containing `p_today`
+    3. everything else
+  Within a bucket, earlier due dates come first, then newer tasks.
+  `p_today` is passed in by the API so "today" follows the user's time zone.
+*/
+
+CREATE OR REPLACE FUNCTION get_daily_digest(p_user_id uuid, p_today date, p_limit integer DEFAULT 20)
+RETURNS SETOF tasks
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT *
+  FROM tasks t
+  WHERE t.user_id = p_user_id
+  ORDER BY
+    CASE
+      WHEN t.is_important THEN 0
+      WHEN t.due_date = p_today THEN 1
+      WHEN t.due_date BETWEEN date_trunc('week', p_today)::date
+                          AND date_trunc('week', p_today)::date + 6 THEN 2
+      ELSE 3
+    END,
+    t.due_date ASC NULLS LAST,
+    t.created_at DESC
+  LIMIT p_limit;
+$$;
@@ -0,0 +1,122 @@
+/*
+  # Delta sync: change timestamps and tombstones
+
+  Lets clients fetch only what changed since their last sync
+  (GET /api/v1/sync?since=<cursor>) instead of refetching every task and note.
+
+  1. Columns
+     - `tasks.updated_at` and `meeting_notes.updated_at` (timestamptz), set by a
+       trigger on every insert and update. clock_timestamp() is used instead of now()
+       so rows written by one multi-row statement get distinct, increasing timestamps.
+
+  2. New Tables
+     - `sync_tombstones` records every deleted task and note (including tasks removed
+       by the meeting_notes ON DELETE CASCADE), so deletions can be synced too.
+       - `id` (bigserial, primary key)
+       - `user_id` (uuid)
+       - `table_name` (text, 'tasks' or 'meeting_notes')
+       - `record_id` (uuid)
+       - `deleted_at` (timestamptz)
+
+  3. Indexes
+     - `(user_id, updated_at, id)` on `tasks` and `meeting_notes`
+     - `(user_id, deleted_at, id)` on `sync_tombstones`
+
+  4. Functions
+     - `purge_sync_tombstones(p_retention interval)` deletes tombstones older than the
+       retention (schedule it, e.g. with pg_cron). The API rejects sync cursors older
+       than the retention with 410 so those clients do a full resync.
+
+  5. Security
+     - RLS on `sync_tombstones`; users can only read their own tombstones
+*/
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT clock_timestamp();
+ALTER TABLE meeting_notes ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT clock_timestamp();
+
+-- Existing rows: start from their creation time
+UPDATE tasks SET updated_at = created_at WHERE created_at IS NOT NULL;
+UPDATE meeting_notes SET updated_at = created_at WHERE created_at IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION set_sync_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := clock_timestamp();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS tasks_set_updated_at ON tasks;
+CREATE TRIGGER tasks_set_updated_at
+  BEFORE INSERT OR UPDATE ON tasks
+  FOR EACH ROW EXECUTE FUNCTION set_sync_updated_at();
+
+DROP TRIGGER IF EXISTS meeting_notes_set_updated_at ON meeting_notes;
+CREATE TRIGGER meeting_notes_set_updated_at
+  BEFORE INSERT OR UPDATE ON meeting_notes
+  FOR EACH ROW EXECUTE FUNCTION set_sync_updated_at();
+
+-- Tombstones
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+  id bigserial PRIMARY KEY,
+  user_id uuid NOT NULL,
+  table_name text NOT NULL CHECK (table_name IN ('tasks', 'meeting_notes')),
+  record_id uuid NOT NULL,
+  deleted_at timestamptz NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO sync_tombstones (user_id, table_name, record_id)
+  VALUES (OLD.user_id, TG_TABLE_NAME, OLD.id);
+  RETURN OLD;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS tasks_record_tombstone ON tasks;
+CREATE TRIGGER tasks_record_tombstone
+  AFTER DELETE ON tasks
+  FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone();
+
+DROP TRIGGER IF EXISTS meeting_notes_record_tombstone ON meeting_notes;
+CREATE TRIGGER meeting_notes_record_tombstone
+  AFTER DELETE ON meeting_notes
+  FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone();
+
+CREATE OR REPLACE FUNCTION purge_sync_tombstones(p_retention interval)
+RETURNS bigint
+LANGUAGE sql
+AS $$
+  WITH purged AS (
+    DELETE FROM sync_tombstones
+    WHERE deleted_at < now() - p_retention
+    RETURNING 1
+  )
+  SELECT count(*) FROM purged;
+$$;
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS tasks_user_updated_at_idx
+  ON tasks (user_id, updated_at, id);
+
+CREATE INDEX IF NOT EXISTS meeting_notes_user_updated_at_idx
+  ON meeting_notes (user_id, updated_at, id);
+
+CREATE INDEX IF NOT EXISTS sync_tombstones_user_deleted_at_idx
+  ON sync_tombstones (user_id, deleted_at, id);
+
+-- Security
+ALTER TABLE sync_tombstones ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can read their own tombstones"
+  ON sync_tombstones
+  FOR SELECT
+  TO authenticated
+  USING (auth.uid() = user_id);
@@ -0,0 +1,55 @@
+/*
+  # Bulk task mutations
+
+  `bulk_mutate_tasks(p_user_id, p_ops)` applies a list of task operations of one user
+  in a single transaction, as one set-based statement per kind of operation:
+    - `{"op": "update_status", "task_id": ..., "status": ...}`
+    - `{"op": "update_importance", "task_id": ..., "is_important": ...}`
+    - `{"op": "delete", "task_id": ...}`
+  Status and importance updates run before deletes. Only tasks of `p_user_id` are
+  touched; one row is returned per task changed, with the task as it is after the
+  update (or before the delete). Operations on unknown tasks return no row.
+*/
+
+CREATE OR REPLACE FUNCTION bulk_mutate_tasks(p_user_id uuid, p_ops jsonb)
+RETURNS TABLE (op_name text, row_id uuid, task jsonb)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  RETURN QUERY
+  WITH ops AS (
+    SELECT DISTINCT ON ((o->>'task_id')::uuid) (o->>'task_id')::uuid AS id, o->>'status' AS status
+    FROM jsonb_array_elements(p_ops) WITH ORDINALITY AS e(o, n)
+    WHERE o->>'op' = 'update_status'
+    ORDER BY (o->>'task_id')::uuid, n DESC
+  )
+  UPDATE tasks t
+  SET status = ops.status
+  FROM ops
+  WHERE t.id = ops.id AND t.user_id = p_user_id
+  RETURNING 'update_status'::text, t.id, to_jsonb(t);
+
+  RETURN QUERY
+  WITH ops AS (
+    SELECT DISTINCT ON ((o->>'task_id')::uuid) (o->>'task_id')::uuid AS id, (o->>'is_important')::boolean AS is_important
+    FROM jsonb_array_elements(p_ops) WITH ORDINALITY AS e(o, n)
+    WHERE o->>'op' = 'update_importance'
+    ORDER BY (o->>'task_id')::uuid, n DESC
+  )
+  UPDATE tasks t
+  SET is_important = ops.is_important
+  FROM ops
+  WHERE t.id = ops.id AND t.user_id = p_user_id
+  RETURNING 'update_importance'::text, t.id, to_jsonb(t);
+
+  RETURN QUERY
+  DELETE FROM tasks t
+  WHERE t.user_id = p_user_id
+    AND t.id = ANY (ARRAY(
+      SELECT (o->>'task_id')::uuid
+      FROM jsonb_array_elements(p_ops) AS e(o)
+      WHERE o->>'op' = 'delete'
+    ))
+  RETURNING 'delete'::text, t.id, to_jsonb(t);
+END;
+$$;
@@ -0,0 +1,70 @@
+/*
+  # Per-user LLM token accounting
+
+  1. New Tables
+     - `llm_token_usage`, one row per user and UTC day
+       - `user_id` (uuid, references auth.users)
+       - `usage_date` (date, UTC)
+       - `prompt_tokens`, `completion_tokens` (bigint)
+       - `requests` (integer, LLM requests)
+       - `cost_usd` (numeric, estimated from the configured model prices)
+       - `updated_at` (timestamptz)
+
+  2. Functions
+     - `record_llm_token_usage(p_rows jsonb)` adds a batch of usage deltas
+       `[{"user_id", "usage_date", "prompt_tokens", "completion_tokens", "requests", "cost_usd"}]`
+       in one statement and returns the new total tokens of every row touched.
+       API workers call it periodically with everything they counted since the last call.
+
+  3. Security
+     - Enable RLS; users can view their own usage
+*/
+
+CREATE TABLE IF NOT EXISTS llm_token_usage (
+  user_id uuid NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  usage_date date NOT NULL,
+  prompt_tokens bigint NOT NULL DEFAULT 0,
+  completion_tokens bigint NOT NULL DEFAULT 0,
+  requests integer NOT NULL DEFAULT 0,
+  cost_usd numeric(14, 6) NOT NULL DEFAULT 0,
+  updated_at timestamptz DEFAULT now(),
+  PRIMARY KEY (user_id, usage_date)
+);
+
+-- Heaviest users of a day
+CREATE INDEX IF NOT EXISTS llm_token_usage_date_idx
+  ON llm_token_usage (usage_date, (prompt_tokens + completion_tokens) DESC);
+
+ALTER TABLE llm_token_usage ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own token usage"
+  ON llm_token_usage
+  FOR SELECT
+  TO authenticated
+  USING (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION record_llm_token_usage(p_rows jsonb)
+RETURNS TABLE (user_id uuid, usage_date date, total_tokens bigint)
+LANGUAGE sql
+AS $$
+  INSERT INTO llm_token_usage AS u (user_id, usage_date, prompt_tokens, completion_tokens, requests, cost_usd, updated_at)
+  SELECT
+    (r->>'user_id')::uuid,
+    (r->>'usage_date')::date,
+    sum((r->>'prompt_tokens')::bigint),
+    sum((r->>'completion_tokens')::bigint),
+    sum((r->>'requests')::integer),
+    sum((r->>'cost_usd')::numeric),
+    now()
+  FROM jsonb_array_elements(p_rows) AS e(r)
+  GROUP BY 1, 2
+  ON CONFLICT ON CONSTRAINT llm_token_usage_pkey DO UPDATE
+  SET prompt_tokens = u.prompt_tokens + EXCLUDED.prompt_tokens,
+      completion_tokens = u.completion_tokens + EXCLUDED.completion_tokens,
+      requests = u.requests + EXCLUDED.requests,
+      cost_usd = u.cost_usd + EXCLUDED.cost_usd,
+      updated_at = now()
+  RETURNING u.user_id, u.usage_date, u.prompt_tokens + u.completion_tokens;
+$$;
+
+REVOKE EXECUTE ON FUNCTION record_llm_token_usage(jsonb) FROM PUBLIC, anon, authenticated;
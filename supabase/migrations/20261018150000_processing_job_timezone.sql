@@ -0,0 +1,10 @@
+/*
+  # Time zone of background note processing jobs
+
+  1. Changes
+     - `processing_jobs.timezone` (text, nullable): the IANA time zone the request
+       named, so relative due dates in the note are resolved in the user's time zone
+       when the job runs (DEFAULT_TIMEZONE when null)
+*/
+
+ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS timezone text;